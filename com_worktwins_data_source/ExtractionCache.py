@@ -0,0 +1,128 @@
+# ExtractionCache.py
+
+import os
+import gzip
+import json
+from hashlib import sha256
+
+
+class ExtractionCache:
+    """
+    Compressed, resumable cache of the text extracted from PDFs, keyed by the PDF content hash.
+
+    Each PDF gets a directory named after its sha256, holding one gzip-compressed JSON file
+    per completed page range and an index with the page offsets once the book is complete.
+    Ranges are written atomically as soon as they are extracted, so an interrupted
+    extraction resumes from the ranges already on disk. Identical PDFs share one entry.
+    """
+    # Fixed range size, so that cached ranges line up whatever the number of workers
+    PAGES_PER_RANGE = 16
+
+    def __init__(self, cache_dir):
+        """
+        Initializes the ExtractionCache.
+
+        Args:
+            cache_dir (str): Root directory of the cache, usually shared by a whole library.
+        """
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def fingerprint(pdf_path, known=None):
+        """
+        Fingerprint of a PDF: size, mtime and sha256 of its content. The content hash is
+        only recomputed when the size or mtime differ from a previously known fingerprint.
+
+        Args:
+            pdf_path (str): Path to the PDF.
+            known (dict, optional): A previous fingerprint of the same file.
+
+        Returns:
+            dict: {"size", "mtime", "sha256"}.
+        """
+        stat = os.stat(pdf_path)
+        if known and known.get("size") == stat.st_size and known.get("mtime") == stat.st_mtime:
+            return known
+
+        digest = sha256()
+        with open(pdf_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": digest.hexdigest()}
+
+    @classmethod
+    def page_ranges(cls, total_pages):
+        """
+        Splits the pages into the fixed ranges the cache is organized by.
+
+        Returns:
+            list: (start, end) page index pairs.
+        """
+        return [
+            (start, min(start + cls.PAGES_PER_RANGE, total_pages))
+            for start in range(0, total_pages, cls.PAGES_PER_RANGE)
+        ]
+
+    def entry_dir(self, fingerprint):
+        return os.path.join(self.cache_dir, fingerprint["sha256"])
+
+    def range_path(self, fingerprint, start, end):
+        return os.path.join(self.entry_dir(fingerprint), f"pages-{start:06d}-{end:06d}.json.gz")
+
+    def index_path(self, fingerprint):
+        return os.path.join(self.entry_dir(fingerprint), "index.json")
+
+    def write_atomic(self, path, data, compress):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        opener = gzip.open if compress else open
+        with opener(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def load_range(self, fingerprint, start, end):
+        """
+        Loads the texts of a cached page range.
+
+        Returns:
+            list: The text of each page, or None if the range is not cached (or unreadable).
+        """
+        path = self.range_path(fingerprint, start, end)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                pages = json.load(f)
+        except (OSError, EOFError, json.JSONDecodeError):
+            print(f"Ignoring corrupt extraction cache file {path}.")
+            return None
+        return pages if len(pages) == end - start else None
+
+    def save_range(self, fingerprint, start, end, pages):
+        """
+        Stores the texts of an extracted page range.
+        """
+        self.write_atomic(self.range_path(fingerprint, start, end), pages, compress=True)
+
+    def load_index(self, fingerprint):
+        """
+        Loads the page index of a completely extracted PDF.
+
+        Returns:
+            dict: {"total_pages", "page_offsets"}, or None if the extraction never completed.
+        """
+        path = self.index_path(fingerprint)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_index(self, fingerprint, total_pages, page_offsets):
+        """
+        Marks a PDF as completely extracted and stores its page offsets.
+        """
+        self.write_atomic(
+            self.index_path(fingerprint),
+            {"total_pages": total_pages, "page_offsets": page_offsets},
+            compress=False,
+        )
@@ -4,30 +4,85 @@ import os
 import json
 import hashlib
 from hashlib import sha256
+from bisect import bisect_right
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import fitz  # PyMuPDF
-import spacy
 from alive_progress import alive_bar
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 
 # Import the updated Pipe subclasses
+from com_worktwins_pipe.BlockSegmentationPipe import BlockSegmentationPipe
 from com_worktwins_pipe.ParagraphsAndCodeUnifiedPipe import ParagraphsAndCodeUnifiedPipe
 from com_worktwins_pipe.SemanticTreePipe import SemanticTreePipe
 from com_worktwins_pipe.SemanticNormalizationPipe import SemanticNormalizationPipe
 from com_worktwins_pipe.WordFrequenciesPipe import WordFrequenciesPipe
+from com_worktwins_pipe.CorpusStatistics import CorpusStatistics
+from com_worktwins_pipe.PipelineRunner import PipelineRunner
+from com_worktwins_pipe.PipeStorage import JSONStorage, NumpyStorage
+from com_worktwins_pipe.PipeCache import PipeCache
+from com_worktwins_pipe.VectorIndex import VectorIndex
+from com_worktwins_pipe.InvertedIndex import InvertedIndex
+from com_worktwins_pipe.PipeMetrics import PipeMetrics
+from com_worktwins_pipe.StreamingPipeline import StreamingPipeline
+from com_worktwins_pipe.EmbeddingCache import EmbeddingCache
+from com_worktwins_pipe.EmbeddingEngine import EmbeddingEngine
+from com_worktwins_pipe.SummaryCache import SummaryCache
+from com_worktwins_pipe.SummarizationEngine import SummarizationEngine
+from com_worktwins_pipe.InferenceBackend import create_backend
+from com_worktwins_data_source.ExtractionCache import ExtractionCache
+
+# Below this many pages per worker, process start-up costs more than it saves
+MIN_PAGES_PER_WORKER = 32
+
+
+def extract_page_range(pdf_path, start, end):
+    """
+    Extract the text of pages [start, end) of a PDF. Runs in a worker process, which opens
+    its own fitz document (documents cannot be shared across processes).
+
+    Args:
+        pdf_path (str): Path to the PDF.
+        start (int): First page index.
+        end (int): Page index after the last page.
+
+    Returns:
+        list: The text of each page.
+    """
+    with fitz.open(pdf_path) as pdf:
+        return [pdf[page_num].get_text("text") for page_num in range(start, end)]
 
-# Load spaCy model
-nlp = spacy.load("en_core_web_sm")
 
 class PDFBook:
-    def __init__(self, pdf_path):
+    def __init__(self, pdf_path, cache_dir=None, embedding_cache_dir=None, summary_cache_dir=None,
+                 embedding_backend="torch", summarization_backend="torch", onnx_cache_dir=None, corpus_dir=None,
+                 wordfreq_cache_dir=None):
         self.pdf_path = pdf_path
         self.name = os.path.splitext(os.path.basename(pdf_path))[0]
         self.output_dir = os.path.join(os.path.dirname(pdf_path), self.name)
+        # Extraction, embedding, summary and wordfreq caches shared by the books of the same folder by default
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(pdf_path), ".extraction_cache")
+        self.embedding_cache_dir = embedding_cache_dir or os.path.join(os.path.dirname(pdf_path), ".embedding_cache")
+        self.summary_cache_dir = summary_cache_dir or os.path.join(os.path.dirname(pdf_path), ".summary_cache")
+        self.wordfreq_cache_dir = wordfreq_cache_dir or os.path.join(os.path.dirname(pdf_path), ".wordfreq_cache")
+        # Inference backend of each transformer pipe: "torch", "onnx" (int8) or "onnx-fp32"
+        onnx_cache_dir = onnx_cache_dir or os.path.join(os.path.dirname(pdf_path), ".onnx_cache")
+        self.embedding_backend = create_backend(embedding_backend, onnx_cache_dir)
+        self.summarization_backend = create_backend(summarization_backend, onnx_cache_dir)
+        # Word statistics of the whole library (e.g. the folder's ".corpus"), off by default
+        self.corpus_statistics = CorpusStatistics(corpus_dir) if corpus_dir else None
         os.makedirs(self.output_dir, exist_ok=True)
         self.book_frequency = None
         self.english_frequency = None
+        self.page_offsets = None
+        self.page_starts = None
+        self.embedding_cache = None
+        self.summary_cache = None
+        self.embedding_engine = None
+        self.vector_index = None
+        self.vector_index_hash = None
+        self.inverted_index = None
+        self.inverted_index_hash = None
 
     def load_word_frequencies(self):
         """
@@ -43,61 +98,379 @@ class PDFBook:
             self.book_frequency = {item["word"]: item["book_frequency"] for item in word_frequencies}
             self.english_frequency = {item["word"]: item["english_frequency"] for item in word_frequencies}
 
-    def extract_raw(self):
+    def extract_raw(self, workers=None, use_cache=True):
         """
-        Extract raw text from the PDF.
+        Extract raw text from the PDF. Page ranges are extracted in parallel by a process
+        pool, each worker opening its own fitz document, and reassembled in order. The
+        character offsets of every page in the returned text are kept in self.page_offsets
+        and saved to {name}-PageIndex.json.
+
+        Extracted ranges are stored in a compressed cache keyed by the PDF fingerprint
+        (size, mtime and content hash): an unchanged PDF is never extracted twice, and an
+        interrupted extraction resumes from the last completed range.
+
+        Args:
+            workers (int, optional): Number of worker processes. Defaults to the CPU count;
+                small PDFs are extracted in-process.
+            use_cache (bool, optional): Reuse and fill the extraction cache.
+
+        Returns:
+            str: The pages joined by blank lines.
         """
         if not os.path.exists(self.pdf_path):
             raise FileNotFoundError(f"The file {self.pdf_path} does not exist.")
 
+        txt_output_path = os.path.join(self.output_dir, f"{self.name}.txt")
+        fingerprint, known_fingerprint = self.load_fingerprint()
+        cache = ExtractionCache(self.cache_dir) if use_cache else None
+
+        # Unchanged PDF with a complete cache entry: reuse the text written last time
+        index = cache.load_index(fingerprint) if cache else None
+        if index and fingerprint == known_fingerprint and os.path.exists(txt_output_path):
+            print(f"Reusing extracted text of {self.name}.")
+            self.set_page_offsets(index["page_offsets"])
+            with open(txt_output_path, "r", encoding="utf-8") as f:
+                return f.read()
+
         with fitz.open(self.pdf_path) as pdf:
-            text_content = []
             total_pages = pdf.page_count
-            with alive_bar(total_pages, title="Extracting Raw Text") as bar:
-                for page_num in range(total_pages):
-                    page = pdf[page_num]
-                    text = page.get_text("text")
-                    text_content.append(text)
-                    bar()
 
-        txt_output_path = os.path.join(self.output_dir, f"{self.name}.txt")
+        page_ranges = ExtractionCache.page_ranges(total_pages)
+        extracted = {}
+        if cache:
+            for start, end in page_ranges:
+                pages = cache.load_range(fingerprint, start, end)
+                if pages is not None:
+                    extracted[start] = pages
+        missing = [(start, end) for start, end in page_ranges if start not in extracted]
+
+        workers = workers or os.cpu_count() or 1
+        workers = min(workers, max(1, (total_pages - sum(map(len, extracted.values()))) // MIN_PAGES_PER_WORKER))
+
+        with alive_bar(total_pages, title="Extracting Raw Text") as bar:
+            bar(sum(map(len, extracted.values())))
+
+            def completed(start, end, pages):
+                # Persist each range as soon as it is done, so an interruption can resume
+                extracted[start] = pages
+                if cache:
+                    cache.save_range(fingerprint, start, end, pages)
+                bar(end - start)
+
+            if workers == 1:
+                for start, end in missing:
+                    completed(start, end, extract_page_range(self.pdf_path, start, end))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = {
+                        executor.submit(extract_page_range, self.pdf_path, start, end): (start, end)
+                        for start, end in missing
+                    }
+                    for future in as_completed(futures):
+                        start, end = futures[future]
+                        completed(start, end, future.result())
+
+        text_content = [text for start, _ in page_ranges for text in extracted[start]]
+        raw_text = "\n\n".join(text_content)
+        self.set_page_offsets(self.compute_page_offsets(text_content))
+        self.save_page_index()
+        if cache:
+            cache.save_index(fingerprint, total_pages, self.page_offsets)
+
         with open(txt_output_path, "w", encoding="utf-8") as f:
-            f.write("\n\n".join(text_content))
+            f.write(raw_text)
+        self.save_fingerprint(fingerprint)
+
+        return raw_text
+
+    def load_fingerprint(self):
+        """
+        Fingerprint the PDF, reusing the content hash saved in {name}-Fingerprint.json
+        while the size and mtime of the file are unchanged.
+
+        Returns:
+            tuple: The current fingerprint and the saved one (None if never saved).
+        """
+        fingerprint_path = os.path.join(self.output_dir, f"{self.name}-Fingerprint.json")
+        known_fingerprint = None
+        if os.path.exists(fingerprint_path):
+            with open(fingerprint_path, "r", encoding="utf-8") as f:
+                known_fingerprint = json.load(f)
+        return ExtractionCache.fingerprint(self.pdf_path, known_fingerprint), known_fingerprint
+
+    def save_fingerprint(self, fingerprint):
+        """
+        Save the fingerprint of the PDF to {name}-Fingerprint.json.
+        """
+        fingerprint_path = os.path.join(self.output_dir, f"{self.name}-Fingerprint.json")
+        with open(fingerprint_path, "w", encoding="utf-8") as f:
+            json.dump(fingerprint, f, indent=4)
+
+    @staticmethod
+    def compute_page_offsets(pages, separator="\n\n"):
+        """
+        Compute the [start, end) character offsets of each page in the joined text.
+
+        Args:
+            pages (list): The text of each page.
+            separator (str): The separator the pages are joined with.
+
+        Returns:
+            list: One [start, end] pair per page.
+        """
+        offsets = []
+        position = 0
+        for text in pages:
+            offsets.append([position, position + len(text)])
+            position += len(text) + len(separator)
+        return offsets
 
-        return "\n\n".join(text_content)
+    def set_page_offsets(self, page_offsets):
+        """
+        Set the page offsets, and the page starts page_at searches.
+        """
+        self.page_offsets = page_offsets
+        self.page_starts = [start for start, _ in page_offsets]
+
+    def save_page_index(self):
+        """
+        Save the page offsets to {name}-PageIndex.json so later stages can map text back to pages.
+        """
+        page_index_path = os.path.join(self.output_dir, f"{self.name}-PageIndex.json")
+        with open(page_index_path, "w", encoding="utf-8") as f:
+            json.dump({"pages": [
+                {"page": page_num + 1, "start": start, "end": end}
+                for page_num, (start, end) in enumerate(self.page_offsets)
+            ]}, f, indent=4)
+
+    def page_at(self, offset):
+        """
+        Return the 1-based page number containing a character offset of the raw text.
+
+        Args:
+            offset (int): Character offset in the text returned by extract_raw.
 
-    def evaluate(self, keywords):
+        Returns:
+            int: The page number, or None if extract_raw has not run.
+        """
+        if not self.page_offsets:
+            return None
+        return max(1, bisect_right(self.page_starts, offset))
+
+    def iter_pages(self, use_cache=True):
+        """
+        Lazily yield the text of each page, separated as in extract_raw.
+
+        Page ranges are read from the extraction cache when it holds them for the current
+        PDF fingerprint; the others are parsed with fitz and saved to the cache as they go,
+        so that a second pass over an unchanged PDF never parses it again.
+
+        Args:
+            use_cache (bool, optional): Read and fill the extraction cache.
+
+        Yields:
+            str: The text of one page.
+        """
+        if not os.path.exists(self.pdf_path):
+            raise FileNotFoundError(f"The file {self.pdf_path} does not exist.")
+
+        fingerprint, known_fingerprint = self.load_fingerprint()
+        cache = ExtractionCache(self.cache_dir) if use_cache else None
+        index = cache.load_index(fingerprint) if cache else None
+        if index:
+            total_pages = index["total_pages"]
+        else:
+            with fitz.open(self.pdf_path) as pdf:
+                total_pages = pdf.page_count
+
+        page_offsets = []
+        position = 0
+        for start, end in ExtractionCache.page_ranges(total_pages):
+            pages = cache.load_range(fingerprint, start, end) if cache else None
+            if pages is None:
+                pages = extract_page_range(self.pdf_path, start, end)
+                if cache:
+                    cache.save_range(fingerprint, start, end, pages)
+            for text in pages:
+                yield ("\n\n" if page_offsets else "") + text
+                page_offsets.append([position, position + len(text)])
+                position += len(text) + 2
+
+        self.set_page_offsets(page_offsets)
+        if cache and not index:
+            cache.save_index(fingerprint, total_pages, page_offsets)
+        if fingerprint != known_fingerprint:
+            self.save_fingerprint(fingerprint)
+
+    def evaluate(self, keywords, top_n=5, threshold=0.7, candidates=None):
         """
         Evaluate the book for topics matching the given keywords using semantic similarity.
+
+        The keywords are embedded in one batch and matched against the book's vector index
+        with a single vectorized search; the index is built on first use. With candidates,
+        only the paragraphs ranked best by BM25 in the inverted index are compared.
         """
-        semantic_tree_path = os.path.join(self.output_dir, f"{self.name}-SemanticTree.json")
-        if not os.path.exists(semantic_tree_path):
-            raise FileNotFoundError(f"Semantic tree data not found at {semantic_tree_path}. Ensure SemanticTreePipe has run.")
+        index = self.load_vector_index()
+        if not keywords or not len(index):
+            return []
 
-        with open(semantic_tree_path, "r", encoding="utf-8") as tree_file:
-            semantic_tree = json.load(tree_file)["semantic_tree"]
+        ids = None
+        if candidates is not None:
+            hits = self.load_inverted_index().bm25(" ".join(keywords), k=candidates)
+            ids = [paragraph_id for paragraph_id, _ in hits]
 
         keyword_embeddings = self.get_embeddings(keywords)
-        matches = []
-        for node_id, node in semantic_tree.items():
-            node_embedding = self.get_embeddings([node["text"]])[0]
-            score = cosine_similarity([node_embedding], keyword_embeddings).max()
-            print(f"Node: {node['text']}, Score: {score}")  # Debugging output
-            if score >= 0.7:
-                matches.append({
-                    "id": node_id,
-                    "path": node.get("path", "Unknown"),
-                    "semantics": node["text"],
-                    "relevance_score": score,
-                })
-
-        return self.filter_results(matches)
+        matches = [
+            {
+                "id": node_id,
+                "path": node.get("path", "Unknown"),
+                "page": node.get("page"),
+                "semantics": node["text"],
+                "relevance_score": score,
+            }
+            for node_id, score, node in index.query(keyword_embeddings, k=top_n, threshold=threshold, ids=ids)
+        ]
+        return self.filter_results(matches, top_n)
+
+    def vector_index_dir(self):
+        return os.path.join(self.output_dir, f"{self.name}-VectorIndex")
+
+    def semantic_tree_hash(self):
+        entry = PipeCache(self.output_dir, self.name).get("SemanticTree")
+        return entry["output_hash"] if entry else None
+
+    def build_vector_index(self, semantic_tree=None, backend="exact"):
+        """
+        Build and save the vector index of the semantic tree nodes.
+
+        Args:
+            semantic_tree (dict, optional): The semantic tree; loaded from the SemanticTree output if omitted.
+            backend (str, optional): "exact", or the faiss "flat" or "hnsw" index.
+
+        Returns:
+            VectorIndex: The index.
+        """
+        if semantic_tree is None:
+            tree_storage = NumpyStorage(array_fields=("embedding",))
+            semantic_tree_path = tree_storage.path(self.output_dir, self.name, "SemanticTree")
+            if not os.path.exists(semantic_tree_path):
+                raise FileNotFoundError(f"Semantic tree data not found at {semantic_tree_path}. Ensure SemanticTreePipe has run.")
+            semantic_tree = tree_storage.load(semantic_tree_path)["semantic_tree"]
+
+        nodes = list(semantic_tree.values())
+        if nodes and all("embedding" in node for node in nodes):
+            vectors = np.stack([np.asarray(node["embedding"], dtype=np.float32) for node in nodes])
+        else:
+            vectors = self.get_embeddings([node["text"] for node in nodes])
+        index = VectorIndex(
+            [node["id"] for node in nodes],
+            vectors.reshape(len(nodes), -1),
+            metadata=[
+                {"text": node["text"], "path": node.get("path", "Unknown"), "page": node.get("page")}
+                for node in nodes
+            ],
+            backend=backend
+        )
+        self.vector_index_hash = self.semantic_tree_hash()
+        index.save(self.vector_index_dir(), source_hash=self.vector_index_hash)
+        self.vector_index = index
+        return index
+
+    def load_vector_index(self, backend=None):
+        """
+        Load the vector index, rebuilding it when the semantic tree has changed since it was built.
+
+        Returns:
+            VectorIndex: The index.
+        """
+        tree_hash = self.semantic_tree_hash()
+        if self.vector_index is None or self.vector_index_hash != tree_hash:
+            if tree_hash is not None and VectorIndex.source_hash(self.vector_index_dir()) == tree_hash:
+                self.vector_index = VectorIndex.load(self.vector_index_dir(), backend=backend)
+                self.vector_index_hash = tree_hash
+            else:
+                print(f"Building the vector index of {self.name}.")
+                self.build_vector_index(backend=backend or "exact")
+        return self.vector_index
+
+    def inverted_index_dir(self):
+        return os.path.join(self.output_dir, f"{self.name}-InvertedIndex")
+
+    def unified_report_hash(self):
+        entry = PipeCache(self.output_dir, self.name).get("ParagraphsAndCodeUnified")
+        return entry["output_hash"] if entry else None
+
+    def build_inverted_index(self, unified_report=None):
+        """
+        Build and save the inverted index of the paragraphs and sentences of the book.
+
+        Args:
+            unified_report (list, optional): The ParagraphsAndCodeUnified entries; loaded from its output if omitted.
+
+        Returns:
+            InvertedIndex: The index.
+        """
+        if unified_report is None:
+            report_path = JSONStorage().path(self.output_dir, self.name, "ParagraphsAndCodeUnified")
+            if not os.path.exists(report_path):
+                raise FileNotFoundError(f"Unified report not found at {report_path}. Ensure ParagraphsAndCodeUnifiedPipe has run.")
+            unified_report = JSONStorage().load(report_path)["unified_report"]
+
+        index = InvertedIndex.build([entry for entry in unified_report if entry["type"] == "paragraph"])
+        self.inverted_index_hash = self.unified_report_hash()
+        index.save(self.inverted_index_dir(), source_hash=self.inverted_index_hash)
+        self.inverted_index = index
+        return index
+
+    def load_inverted_index(self):
+        """
+        Load the inverted index, rebuilding it when the unified report has changed since it was built.
+
+        Returns:
+            InvertedIndex: The index.
+        """
+        report_hash = self.unified_report_hash()
+        if self.inverted_index is None or self.inverted_index_hash != report_hash:
+            if report_hash is not None and InvertedIndex.source_hash(self.inverted_index_dir()) == report_hash:
+                self.inverted_index = InvertedIndex.load(self.inverted_index_dir())
+                self.inverted_index_hash = report_hash
+            else:
+                print(f"Building the inverted index of {self.name}.")
+                self.build_inverted_index()
+        return self.inverted_index
+
+    def get_embedding_cache(self):
+        """
+        Embedding cache of the semantic tree model, shared by the SemanticTreePipe and evaluate(),
+        keyed by its encoding parameters.
+        """
+        if self.embedding_cache is None:
+            # The engine loads no model until it encodes; only its default parameters are read here
+            params = EmbeddingEngine().get_params()
+            self.embedding_cache = EmbeddingCache(
+                self.embedding_cache_dir, self.embedding_backend.cache_name(EmbeddingEngine.DEFAULT_MODEL), params
+            )
+        return self.embedding_cache
+
+    def get_summary_cache(self):
+        """
+        Summary cache of the semantic normalization model, keyed by its generation parameters.
+        """
+        if self.summary_cache is None:
+            # The engine loads no model until it summarizes; only its default parameters are read here
+            params = SummarizationEngine().get_params()
+            self.summary_cache = SummaryCache(
+                self.summary_cache_dir, self.summarization_backend.cache_name(SummarizationEngine.DEFAULT_MODEL), params
+            )
+        return self.summary_cache
 
     def get_embeddings(self, texts):
         """
-        Generate vector embeddings for a list of texts using spaCy.
+        Generate vector embeddings for a list of texts with the semantic tree model.
         """
-        return [nlp(text).vector for text in texts]
+        if self.embedding_engine is None:
+            self.embedding_engine = EmbeddingEngine(cache=self.get_embedding_cache(), backend=self.embedding_backend)
+        return self.embedding_engine.encode(texts)
 
     def filter_results(self, matches, top_n=5):
         """
@@ -105,48 +478,158 @@ class PDFBook:
         """
         return sorted(matches, key=lambda x: -x["relevance_score"])[:top_n]
 
-    def to_knowledge_hooks(self):
+    def to_knowledge_hooks(self, max_workers=None, profile=None, normalization="abstractive"):
         """
-        Generate all knowledge hooks for the book and save the results.
+        Generate all knowledge hooks for the book and save the results, along with a run
+        report ({name}-RunReport.json/.csv) of per-stage timings.
+
+        Args:
+            max_workers (int, optional): Maximum number of pipes executed concurrently.
+            profile (str, optional): "cprofile" or "pyinstrument" to capture a profile per stage.
+            normalization (str, optional): "abstractive" (BART) or "fast" (extractive) semantics.
         """
-        raw_text = self.extract_raw()
+        metrics = PipeMetrics(book=self.name, profile=profile, profile_dir=self.output_dir)
+        with metrics.measure("ExtractRaw", "run"):
+            raw_text = self.extract_raw()
 
-        # Step 1: Execute WordFrequenciesPipe
+        # Step 1: WordFrequenciesPipe
         word_frequencies_pipe = WordFrequenciesPipe(
             name="WordFrequencies",
             output_dir=self.output_dir,
-            pdf_name=self.name
+            pdf_name=self.name,
+            metrics=metrics,
+            corpus_statistics=self.corpus_statistics,
+            wordfreq_cache_dir=self.wordfreq_cache_dir
         )
-        word_frequencies = word_frequencies_pipe.execute(input_data=raw_text)
 
-        # Step 2: Execute ParagraphsAndCodeUnifiedPipe with WordFrequenciesPipe as a dependency
+        # Step 2: One segmentation of the text into paragraph and code blocks, shared downstream
+        block_segmentation_pipe = BlockSegmentationPipe(
+            name="BlockSegmentation",
+            output_dir=self.output_dir,
+            pdf_name=self.name,
+            metrics=metrics
+        )
+
+        # Step 3: ParagraphsAndCodeUnifiedPipe over the blocks, with WordFrequenciesPipe as a dependency
         unified_extraction_pipe = ParagraphsAndCodeUnifiedPipe(
             name="ParagraphsAndCodeUnified",
             output_dir=self.output_dir,
             pdf_name=self.name,
-            dependencies=[word_frequencies_pipe]
+            dependencies=[word_frequencies_pipe, block_segmentation_pipe],
+            metrics=metrics,
+            corpus_statistics=self.corpus_statistics,
+            wordfreq_cache_dir=self.wordfreq_cache_dir
         )
-        unified_report = unified_extraction_pipe.execute(input_data=raw_text)
 
-        # Step 3: Perform semantic normalization on the unified report
+        # Step 4: Semantic normalization of the unified report
         semantic_normalization_pipe = SemanticNormalizationPipe(
             name="SemanticNormalization",
             output_dir=self.output_dir,
             pdf_name=self.name,
-            dependencies=[unified_extraction_pipe]
+            dependencies=[unified_extraction_pipe],
+            metrics=metrics,
+            summary_cache=self.get_summary_cache(),
+            strategy=normalization,
+            backend=self.summarization_backend
         )
-        normalized_data = semantic_normalization_pipe.execute(input_data=unified_report)
 
-        # Step 4: Generate semantic tree
-        semantic_tree_input = {
-            "normalized_paragraphs": normalized_data["normalized_paragraphs"],  # Updated key
-            "book_frequencies": word_frequencies,
-        }
+        # Step 5: Semantic tree
         semantic_tree_pipe = SemanticTreePipe(
             name="SemanticTree",
             output_dir=self.output_dir,
+            pdf_name=self.name,
+            dependencies=[semantic_normalization_pipe, word_frequencies_pipe],
+            metrics=metrics,
+            embedding_cache=self.get_embedding_cache(),
+            backend=self.embedding_backend
+        )
+
+        # Run the pipes as a DAG; independent branches are executed concurrently
+        runner = PipelineRunner([semantic_tree_pipe], max_workers=max_workers)
+        results = runner.run({
+            word_frequencies_pipe.name: raw_text,
+            block_segmentation_pipe.name: {"raw_text": raw_text, "page_offsets": self.page_offsets},
+            unified_extraction_pipe.name: lambda results: results[block_segmentation_pipe.name],
+            semantic_normalization_pipe.name: lambda results: results[unified_extraction_pipe.name],
+            semantic_tree_pipe.name: lambda results: {
+                "normalized_paragraphs": results[semantic_normalization_pipe.name]["normalized_paragraphs"],
+                "book_frequencies": results[word_frequencies_pipe.name],
+            },
+        })
+
+        # Queries then cost one keyword embedding and a single vectorized search
+        with metrics.measure("VectorIndex", "run"):
+            self.build_vector_index(results[semantic_tree_pipe.name]["semantic_tree"])
+        # Keyword, phrase and BM25 lookups without rescanning the text; kept while the report is unchanged
+        with metrics.measure("InvertedIndex", "run"):
+            report_hash = self.unified_report_hash()
+            if report_hash is None or InvertedIndex.source_hash(self.inverted_index_dir()) != report_hash:
+                self.build_inverted_index(results[unified_extraction_pipe.name]["unified_report"])
+
+        metrics.write_json(os.path.join(self.output_dir, f"{self.name}-RunReport.json"))
+        metrics.write_csv(os.path.join(self.output_dir, f"{self.name}-RunReport.csv"))
+        return results
+
+    def stream_knowledge_hooks(self, queue_size=64, normalization="abstractive"):
+        """
+        Generate the knowledge hooks in streaming mode: pages flow through the block
+        segmentation, the unified extraction, the semantic normalization and the semantic
+        tree through bounded queues, and each stage writes its records incrementally as JSONL.
+
+        Args:
+            queue_size (int, optional): Maximum number of records buffered between two stages.
+            normalization (str, optional): "abstractive" (BART) or "fast" (extractive) semantics.
+
+        Returns:
+            dict: Stage name -> JSONL output path and number of records.
+        """
+        # Word frequencies are a whole-book statistic and are computed up front. This first
+        # pass over the pages fills the extraction cache the streaming pass then reads from.
+        word_frequencies_pipe = WordFrequenciesPipe(
+            name="WordFrequencies",
+            output_dir=self.output_dir,
+            pdf_name=self.name,
+            corpus_statistics=self.corpus_statistics,
+            wordfreq_cache_dir=self.wordfreq_cache_dir
+        )
+        raw_text = "".join(self.iter_pages())
+        word_frequencies_pipe.execute(input_data=raw_text)
+
+        block_segmentation_pipe = BlockSegmentationPipe(
+            name="BlockSegmentation",
+            output_dir=self.output_dir,
             pdf_name=self.name
         )
-        semantic_tree_pipe.execute(input_data=semantic_tree_input)
+        unified_extraction_pipe = ParagraphsAndCodeUnifiedPipe(
+            name="ParagraphsAndCodeUnified",
+            output_dir=self.output_dir,
+            pdf_name=self.name,
+            dependencies=[word_frequencies_pipe, block_segmentation_pipe],
+            corpus_statistics=self.corpus_statistics
+        )
+        # Like word frequencies, the language mentions that weigh the code language detection
+        # are counted on the whole book
+        unified_extraction_pipe.count_book_mentions(raw_text)
+        semantic_normalization_pipe = SemanticNormalizationPipe(
+            name="SemanticNormalization",
+            output_dir=self.output_dir,
+            pdf_name=self.name,
+            dependencies=[unified_extraction_pipe],
+            summary_cache=self.get_summary_cache(),
+            strategy=normalization,
+            backend=self.summarization_backend
+        )
+        semantic_tree_pipe = SemanticTreePipe(
+            name="SemanticTree",
+            output_dir=self.output_dir,
+            pdf_name=self.name,
+            dependencies=[semantic_normalization_pipe, word_frequencies_pipe],
+            embedding_cache=self.get_embedding_cache(),
+            backend=self.embedding_backend
+        )
 
-        # Optionally, you can save or further process the semantic tree as needed
+        pipeline = StreamingPipeline(
+            [block_segmentation_pipe, unified_extraction_pipe, semantic_normalization_pipe, semantic_tree_pipe],
+            queue_size=queue_size
+        )
+        return pipeline.run(self.iter_pages())
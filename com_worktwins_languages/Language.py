@@ -1,16 +1,184 @@
 import ast
 import json
-import pandas as pd
-import re
-from pygments.lexers import guess_lexer, ClassNotFound
+import os
+import pickle
+import threading
+from pygments.lexers import guess_lexer, get_all_lexers, ClassNotFound
 
 
 class Language:
+    """
+    Registry of programming languages, loaded once per process.
+
+    The languages file (JSON or YAML, as in GitHub linguist) is read once and indexed in
+    plain dicts by lowercase name, extension, alias, interpreter and Pygments lexer name,
+    so every query is a hash lookup. The indexes can be saved next to the languages file
+    (save_index) and are then loaded from there instead of being rebuilt.
+    """
+    DEFAULT_PATH = 'com_worktwins_data/languages.json'
+    # Bump when the layout of the indexes changes, to ignore older saved indexes
+    INDEX_VERSION = 1
+
+    _registries = {}
+    _lock = threading.Lock()
+
+    def __init__(self, file_path=DEFAULT_PATH, use_index=True):
+        """
+        Loads and indexes a languages file. Prefer Language.get, which shares the registry.
+
+        Args:
+            file_path (str): JSON or YAML file of language name -> attributes.
+            use_index (bool): Load the saved indexes if they are up to date with the file.
+        """
+        self.file_path = file_path
+        self.index_path = f"{file_path}.index.pickle"
+        indexes = self.load_index() if use_index else None
+        if indexes is None:
+            indexes = self.build_indexes(self.read_languages(file_path))
+
+        self.indexes = indexes
+        self.languages = indexes["languages"]
+        self.by_name = indexes["by_name"]
+        self.by_extension = indexes["by_extension"]
+        self.by_alias = indexes["by_alias"]
+        self.by_interpreter = indexes["by_interpreter"]
+        self.by_lexer = indexes["by_lexer"]
+
+    @classmethod
+    def get(cls, file_path=DEFAULT_PATH):
+        """
+        Returns the registry of a languages file, loading it on first use (or when the file
+        has changed).
+
+        Args:
+            file_path (str): JSON or YAML file of language name -> attributes.
+
+        Returns:
+            Language: The shared registry.
+        """
+        stat = os.stat(file_path)
+        key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+        registry = cls._registries.get(key)
+        if registry is None:
+            with cls._lock:
+                registry = cls._registries.get(key)
+                if registry is None:
+                    registry = cls(file_path)
+                    cls._registries[key] = registry
+        return registry
+
+    @staticmethod
+    def read_languages(file_path):
+        """
+        Reads a languages file. A list of single-language dicts is merged into one dict.
+
+        Returns:
+            dict: Language name -> attributes.
+        """
+        with open(file_path, "r", encoding="utf-8") as f:
+            if file_path.endswith((".yml", ".yaml")):
+                import yaml
+
+                data = yaml.safe_load(f)
+            else:
+                data = json.load(f)
+        if isinstance(data, list):
+            merged = {}
+            for entry in data:
+                merged.update(entry)
+            data = merged
+        return data
+
+    @staticmethod
+    def build_indexes(languages):
+        """
+        Builds the lookup indexes of the languages.
+
+        Args:
+            languages (dict): Language name -> attributes.
+
+        Returns:
+            dict: The languages and their indexes (key -> list of language names, or
+                lowercase name -> language name).
+        """
+        def add(index, key, name):
+            names = index.setdefault(key, [])
+            if name not in names:
+                names.append(name)
+
+        by_name, by_extension, by_alias, by_interpreter = {}, {}, {}, {}
+        for name, attributes in languages.items():
+            attributes = attributes or {}
+            by_name.setdefault(name.lower(), name)
+            for extension in attributes.get("extensions") or []:
+                add(by_extension, extension.lower(), name)
+            for alias in attributes.get("aliases") or []:
+                add(by_alias, alias.lower(), name)
+            for interpreter in attributes.get("interpreters") or []:
+                add(by_interpreter, interpreter.lower(), name)
+
+        # Pygments lexers (listed without importing them) matched by name, else by alias
+        by_lexer = {}
+        for lexer_name, lexer_aliases, _, _ in get_all_lexers():
+            if lexer_name.lower() in by_name:
+                add(by_lexer, lexer_name.lower(), by_name[lexer_name.lower()])
+                continue
+            for alias in lexer_aliases:
+                for name in by_alias.get(alias, []):
+                    add(by_lexer, lexer_name.lower(), name)
+
+        return {
+            "version": Language.INDEX_VERSION,
+            "languages": languages,
+            "by_name": by_name,
+            "by_extension": by_extension,
+            "by_alias": by_alias,
+            "by_interpreter": by_interpreter,
+            "by_lexer": by_lexer,
+        }
+
+    def source_stamp(self):
+        stat = os.stat(self.file_path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def load_index(self):
+        """
+        Loads the saved indexes if they were built from the current languages file.
+
+        Returns:
+            dict: The indexes, or None if missing, outdated or unreadable.
+        """
+        if not os.path.exists(self.index_path):
+            return None
+        try:
+            with open(self.index_path, "rb") as f:
+                saved = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if saved.get("source") != self.source_stamp() or saved["indexes"].get("version") != self.INDEX_VERSION:
+            return None
+        return saved["indexes"]
+
+    def save_index(self):
+        """
+        Saves the indexes next to the languages file, for instant loading by later processes.
+
+        Returns:
+            str: The path of the saved indexes.
+        """
+        tmp_path = f"{self.index_path}.tmp{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"source": self.source_stamp(), "indexes": self.indexes}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.index_path)
+        return self.index_path
+
     @staticmethod
     def load_json_to_dataframe(json_file):
         """
         Load the JSON file into a Pandas DataFrame.
         """
+        import pandas as pd
+
         with open(json_file, 'r', encoding='utf-8') as file:
             try:
                 data = json.load(file)
@@ -24,43 +192,41 @@ class Language:
                 print(f"Error loading JSON file: {e}")
                 return pd.DataFrame()
 
-    @staticmethod
-    def get_language_attributes(df, language_name):
+    def get_language_attributes(self, language_name):
         """
-        Get attributes of a language by its name.
+        Get attributes of a language by its name (case-insensitive).
         """
-        result = df[df['name'].str.lower() == language_name.lower()]
-        if not result.empty:
-            return result.to_dict(orient='records')[0]
-        else:
+        name = self.by_name.get(language_name.lower())
+        if name is None:
             print(f"Language '{language_name}' not found.")
             return None
+        return {"name": name, **(self.languages[name] or {})}
 
-    @staticmethod
-    def find_by_extension(df, extension):
+    def find_by_extension(self, extension):
         """
         Find languages by file extension.
         """
         if not extension.startswith('.'):
             extension = f'.{extension}'
-        result = df[df['extensions'].apply(lambda x: extension in x if isinstance(x, list) else False)]
-        return result['name'].tolist()
+        return list(self.by_extension.get(extension.lower(), []))
 
-    @staticmethod
-    def find_by_alias(df, alias):
+    def find_by_alias(self, alias):
         """
         Find languages by their aliases.
         """
-        result = df[df['aliases'].apply(lambda x: alias.lower() in [a.lower() for a in x] if isinstance(x, list) else False)]
-        return result['name'].tolist()
+        return list(self.by_alias.get(alias.lower(), []))
 
-    @staticmethod
-    def find_by_interpreter(df, interpreter):
+    def find_by_interpreter(self, interpreter):
         """
         Find languages by their interpreters.
         """
-        result = df[df['interpreters'].apply(lambda x: interpreter.lower() in [i.lower() for i in x] if isinstance(x, list) else False)]
-        return result['name'].tolist()
+        return list(self.by_interpreter.get(interpreter.lower(), []))
+
+    def find_by_lexer(self, lexer_name):
+        """
+        Find languages by the name of their Pygments lexer.
+        """
+        return list(self.by_lexer.get(lexer_name.lower(), []))
 
     @staticmethod
     def detect_programming_language(code_block):
@@ -98,9 +264,9 @@ class Language:
             return node
 
     @staticmethod
-    def load_languages(file_path='com_worktwins_data/languages.json'):
+    def load_languages(file_path=DEFAULT_PATH):
         """
-        Load programming languages data from a JSON file.
+        Load programming languages data from a JSON file. The file is read once per process;
+        the returned dict is shared and must not be modified.
         """
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
\ No newline at end of file
+        return Language.get(file_path).languages
@@ -0,0 +1,186 @@
+import re
+from collections import Counter
+from hashlib import sha256
+from pygments.lexers import guess_lexer, find_lexer_class, ClassNotFound
+
+
+class LanguageDetector:
+    """
+    Detects the programming language of the code snippets of a book.
+
+    Detection goes from cheap to expensive and stops at the first confident answer:
+    1. A memo of the snippets already seen, keyed by their hash.
+    2. A classifier restricted to the few dominant languages of the book prior (language
+       mentions in the text plus the languages detected so far). It scores the signatures of each
+       language (leading keywords of its function definition, import and print statements)
+       and the analyse_text heuristic of its Pygments lexer.
+    3. Snippets that look like prose are rejected as "unknown".
+    4. In a book whose text mentions mostly one language, the remaining snippets are taken to
+       be in it.
+    5. The full guess_lexer scan, whose answer is kept only if it is a known language.
+
+    Only the answers of the classifier and of the full scan are added to the prior: an answer
+    of step 4 only repeats the prior, and step 4 only reads the mentions of the text, so that
+    a few early detections cannot decide the language of all the later snippets.
+    """
+    # Fields of the language attributes the signatures are taken from
+    SIGNATURE_FIELDS = ("function_def", "import_statement", "print_statement")
+    SIGNATURE_TOKEN = re.compile(r"^\s*([A-Za-z_]\w*)")
+    # Characters and operators found in most code but hardly ever in prose
+    CODE_MARKERS = re.compile(r"[{};=<>\[\]]|\(\)|->|::")
+    LETTERS = re.compile(r"[A-Za-z]")
+
+    def __init__(self, languages, mentions=None, prior_size=3, min_prior_share=0.1, min_score=0.3,
+                 dominant_share=0.8):
+        """
+        Initializes the LanguageDetector.
+
+        Args:
+            languages (dict): Language name -> attributes, as loaded by Language.load_languages.
+            mentions (dict, optional): Language name -> number of mentions in the book.
+            prior_size (int): Number of most likely languages tried by the first-pass classifier.
+            min_prior_share (float): Languages less frequent than this share of the most frequent
+                one are left to the full scan, so that e.g. a "print" in a Java book is not Python.
+            min_score (float): Minimum first-pass score to accept a language.
+            dominant_share (float): Share of the text mentions above which a language is
+                assumed for the code snippets the first pass could not classify.
+        """
+        self.valid_languages = set(languages)
+        self.prior = Counter()
+        self.mentions = Counter()
+        self.add_mentions(mentions or {})
+        self.prior_size = prior_size
+        self.min_prior_share = min_prior_share
+        self.min_score = min_score
+        self.dominant_share = dominant_share
+        self.memo = {}
+        self.lexers = {}
+
+        self.signatures = {}
+        all_tokens = set()
+        for name, attributes in languages.items():
+            tokens = set()
+            for field in self.SIGNATURE_FIELDS:
+                match = self.SIGNATURE_TOKEN.match((attributes or {}).get(field) or "")
+                if match:
+                    tokens.add(match.group(1))
+            self.signatures[name] = [re.compile(rf"\b{token}\b") for token in sorted(tokens)]
+            all_tokens.update(tokens)
+
+        # Any signature at the start of a line tells code from prose
+        all_tokens = sorted(all_tokens)
+        self.line_signature = re.compile(rf"(?m)^\s*(?:{'|'.join(all_tokens)})\b") if all_tokens else None
+
+    def add_mentions(self, mentions):
+        """
+        Adds language mentions (e.g. counted by a LanguageMentionCounter) to the book prior.
+
+        Args:
+            mentions (dict): Language name -> number of mentions.
+        """
+        mentions = {name: count for name, count in mentions.items() if count > 0}
+        self.prior.update(mentions)
+        self.mentions.update(mentions)
+
+    @staticmethod
+    def key(code):
+        return sha256(code.encode("utf-8")).hexdigest()
+
+    def detect(self, code):
+        """
+        Detects the language of a code snippet, and adds it to the book prior unless it was
+        only assumed from the dominant language.
+
+        Args:
+            code (str): The code snippet.
+
+        Returns:
+            str: The language name, or "unknown".
+        """
+        key = self.key(code)
+        detection = self.memo.get(key)
+        if detection is None:
+            detection = self.classify(code)
+            self.memo[key] = detection
+        language, observed = detection
+        if observed and language != "unknown":
+            self.prior[language] += 1
+        return language
+
+    def classify(self, code):
+        """
+        Returns:
+            tuple: (language name or "unknown", whether the language was observed in the
+                snippet rather than assumed from the dominant language).
+        """
+        language, score = self.best_candidate(code)
+        if score >= self.min_score:
+            return language, True
+        if self.looks_like_prose(code):
+            return "unknown", False
+        dominant = self.dominant_language()
+        if dominant is not None:
+            return dominant, False
+        return self.guess(code), True
+
+    def best_candidate(self, code):
+        """
+        First pass: scores only the most likely languages of the book.
+
+        Returns:
+            tuple: (language name or None, score in [0, 1]).
+        """
+        best, best_score = None, 0.0
+        candidates = self.prior.most_common(self.prior_size)
+        for language, count in candidates:
+            if count < self.min_prior_share * candidates[0][1]:
+                break
+            score = self.score(language, code)
+            if score > best_score:
+                best, best_score = language, score
+        return best, best_score
+
+    def dominant_language(self):
+        """
+        The language whose share of the text mentions is at least dominant_share, if any.
+        """
+        if not self.mentions:
+            return None
+        language, count = self.mentions.most_common(1)[0]
+        return language if count >= self.dominant_share * sum(self.mentions.values()) else None
+
+    def score(self, language, code):
+        """
+        Confidence that a snippet is written in a language: the share of the language
+        signatures found in the snippet, or its Pygments heuristic if higher.
+        """
+        patterns = self.signatures.get(language) or []
+        signature_score = sum(1 for pattern in patterns if pattern.search(code)) / len(patterns) if patterns else 0.0
+
+        if language not in self.lexers:
+            self.lexers[language] = find_lexer_class(language)
+        lexer = self.lexers[language]
+        lexer_score = lexer.analyse_text(code) if lexer is not None else 0.0
+        return max(signature_score, lexer_score)
+
+    def looks_like_prose(self, code):
+        """
+        Prose indented like code (e.g. quotes or copyright pages): mostly letters, no code
+        operators and no line starting with a language keyword.
+        """
+        if self.CODE_MARKERS.search(code):
+            return False
+        if self.line_signature is not None and self.line_signature.search(code):
+            return False
+        visible = len(code) - code.count(" ") - code.count("\n") - code.count("\t")
+        return visible == 0 or len(self.LETTERS.findall(code)) / visible >= 0.75
+
+    def guess(self, code):
+        """
+        Last resort: the full Pygments scan, restricted to the known languages.
+        """
+        try:
+            name = guess_lexer(code).name
+        except ClassNotFound:
+            return "unknown"
+        return name if name in self.valid_languages else "unknown"
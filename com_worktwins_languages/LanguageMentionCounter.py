@@ -0,0 +1,73 @@
+import re
+
+
+class LanguageMentionCounter:
+    """
+    Counts the mentions of every programming language in a text in a single pass.
+
+    The language names and aliases are compiled once into one case-insensitive regex shaped
+    like a trie (common prefixes are factored), so a scan costs one pass over the text
+    instead of one per language. A mention is a name or alias not glued to other word
+    characters; overlapping names count once, for the longest match (e.g. "Objective-C" is
+    not also a mention of "C").
+    """
+    def __init__(self, languages, include_aliases=True):
+        """
+        Initializes the LanguageMentionCounter.
+
+        Args:
+            languages (dict): Language name -> attributes, as loaded by Language.load_languages.
+            include_aliases (bool): Also count the "aliases" of each language as its mentions.
+        """
+        self.languages = list(languages)
+        self.names = {}
+        for name, attributes in languages.items():
+            self.names.setdefault(name.lower(), name)
+        if include_aliases:
+            for name, attributes in languages.items():
+                for alias in (attributes or {}).get("aliases") or []:
+                    self.names.setdefault(alias.lower(), name)
+
+        trie = {}
+        for term in self.names:
+            node = trie
+            for char in term:
+                node = node.setdefault(char, {})
+            node[""] = True
+        self.pattern = re.compile(rf"(?<!\w)({self.trie_regex(trie)})(?!\w)", re.IGNORECASE) if self.names else None
+
+    @classmethod
+    def trie_regex(cls, node):
+        """
+        Regex matching the terms of a trie, longest first.
+
+        Args:
+            node (dict): Trie node: character -> child node, "" -> True at the end of a term.
+
+        Returns:
+            str: The regex, without capturing groups.
+        """
+        branches = [re.escape(char) + cls.trie_regex(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        regex = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # A term ending here is tried after the longer terms sharing its prefix
+        return f"(?:{regex})?" if "" in node else regex
+
+    def count(self, text):
+        """
+        Counts the mentions of each language.
+
+        Args:
+            text (str): The text to scan.
+
+        Returns:
+            dict: Language name -> number of mentions, for every language (0 if never mentioned).
+        """
+        counts = dict.fromkeys(self.languages, 0)
+        if self.pattern is not None:
+            for match in self.pattern.finditer(text):
+                name = self.names.get(match.group(1).lower())
+                if name is not None:  # Case folding outside ASCII may not round-trip
+                    counts[name] += 1
+        return counts
@@ -0,0 +1,41 @@
+# BlockSegmentationPipe.py
+
+from com_worktwins_pipe.Pipe import Pipe
+from com_worktwins_pipe.BlockSegmenter import BlockSegmenter
+
+
+class BlockSegmentationPipe(Pipe):
+    """
+    A Pipe subclass to split the raw text of a book into typed blocks (paragraphs, indented
+    source code and inline code) with their offsets, pages and ids, once for all the
+    paragraph and code pipes downstream.
+    """
+    def run(self, input_data):
+        """
+        Segments the raw text.
+
+        Args:
+            input_data (str or dict): The raw text, or a dict with the "raw_text" and its
+                "page_offsets" ([start, end] of each page, as in PDFBook.page_offsets).
+
+        Returns:
+            dict: JSON with the list of blocks.
+        """
+        page_starts = None
+        if isinstance(input_data, dict):
+            page_starts = [start for start, _ in input_data.get("page_offsets") or []]
+            input_data = input_data["raw_text"]
+        return {"blocks": BlockSegmenter(page_starts).segment(input_data)}
+
+    def stream(self, records):
+        """
+        Streaming mode: consumes the pages of the book and yields their blocks as soon as
+        each page is complete.
+
+        Args:
+            records (iterable): Pages of the book, as yielded by PDFBook.iter_pages.
+
+        Yields:
+            dict: Blocks in text order.
+        """
+        yield from BlockSegmenter().stream(records)
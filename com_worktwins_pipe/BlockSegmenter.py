@@ -0,0 +1,129 @@
+# BlockSegmenter.py
+
+import re
+from bisect import bisect_right
+from collections import Counter
+from hashlib import sha256
+
+
+class BlockSegmenter:
+    """
+    Splits the text of a book into typed blocks, in one scan shared by all the pipes.
+
+    Indented code blocks (lines starting with 4 spaces or a tab) are found first; the text
+    between them is split into paragraphs at blank lines, and the inline code of each
+    paragraph (`...`) is found in the paragraph. Every block has its type ("paragraph",
+    "source_code" or "inline_code"), its text, its [start, end) character offsets in the
+    book, the page it starts on and a stable id: the hash of its text, suffixed with the
+    occurrence number for repeated texts (e.g. "1a2b3c4d", then "1a2b3c4d-1").
+
+    The segmenter keeps the page starts and the occurrence counts between calls, so a book
+    can be segmented chunk by chunk (see stream) with the same offsets and ids as at once.
+    """
+    CODE_BLOCK_PATTERN = re.compile(r'((?:^(?: {4}|\t).+\n?)+)', re.MULTILINE)
+    INLINE_CODE_PATTERN = re.compile(r'`([^`]+)`')
+    PARAGRAPH_SEPARATOR = "\n\n"
+
+    def __init__(self, page_starts=None):
+        """
+        Initializes the BlockSegmenter.
+
+        Args:
+            page_starts (list, optional): Character offset of the start of each page, in order.
+        """
+        self.page_starts = list(page_starts or [])
+        self.occurrences = Counter()
+
+    def page_at(self, offset):
+        """
+        Returns:
+            int: The 1-based page containing a character offset, or None without page starts.
+        """
+        if not self.page_starts:
+            return None
+        return max(1, bisect_right(self.page_starts, offset))
+
+    def block(self, block_type, text, start):
+        digest = sha256(text.encode("utf-8")).hexdigest()[:8]
+        occurrence = self.occurrences[digest]
+        self.occurrences[digest] += 1
+        return {
+            "id": digest if occurrence == 0 else f"{digest}-{occurrence}",
+            "type": block_type,
+            "text": text,
+            "start": start,
+            "end": start + len(text),
+            "page": self.page_at(start),
+        }
+
+    def segment(self, text, offset=0):
+        """
+        Splits a text into blocks.
+
+        Args:
+            text (str): The text, e.g. the whole book.
+            offset (int): Character offset of the text in the book.
+
+        Returns:
+            list: Blocks in text order; inline code blocks follow their paragraph.
+        """
+        blocks = []
+        last_index = 0
+        for match in self.CODE_BLOCK_PATTERN.finditer(text):
+            self.add_paragraphs(blocks, text, last_index, match.start(), offset)
+            code = match.group(0).rstrip("\n")
+            if code:
+                blocks.append(self.block("source_code", code, offset + match.start()))
+            last_index = match.end()
+        self.add_paragraphs(blocks, text, last_index, len(text), offset)
+        return blocks
+
+    def add_paragraphs(self, blocks, text, start, end, offset):
+        """
+        Appends the paragraphs of text[start:end] and their inline code to blocks.
+        """
+        position = start
+        for piece in text[start:end].split(self.PARAGRAPH_SEPARATOR):
+            paragraph = piece.strip()
+            if paragraph:
+                paragraph_start = offset + position + len(piece) - len(piece.lstrip())
+                blocks.append(self.block("paragraph", paragraph, paragraph_start))
+                for match in self.INLINE_CODE_PATTERN.finditer(paragraph):
+                    blocks.append(self.block("inline_code", match.group(1), paragraph_start + match.start(1)))
+            position += len(piece) + len(self.PARAGRAPH_SEPARATOR)
+
+    @classmethod
+    def join(cls, blocks):
+        """
+        The text of the paragraph and source code blocks (inline code is inside the
+        paragraphs), separated by blank lines: the book text without its page layout.
+        """
+        return cls.PARAGRAPH_SEPARATOR.join(block["text"] for block in blocks if block["type"] != "inline_code")
+
+    def stream(self, pages, separator="\n\n"):
+        """
+        Segments a book page by page. Pages are cut at their last blank line, so a block
+        never spans two cuts; a paragraph running over a page break is split there.
+
+        Args:
+            pages (iterable): The text of each page, as yielded by PDFBook.iter_pages (every
+                page but the first starts with the separator).
+            separator (str): The separator the pages are joined with.
+
+        Yields:
+            dict: Blocks in text order, as soon as the text before them is complete.
+        """
+        buffer = ""
+        buffer_offset = 0
+        position = 0
+        for page in pages:
+            # The page itself starts after its separator
+            self.page_starts.append(position + (len(separator) if position else 0))
+            position += len(page)
+            buffer += page
+            cut = buffer.rfind(self.PARAGRAPH_SEPARATOR)
+            if cut == -1:
+                continue
+            yield from self.segment(buffer[:cut], buffer_offset)
+            buffer, buffer_offset = buffer[cut:], buffer_offset + cut
+        yield from self.segment(buffer, buffer_offset)
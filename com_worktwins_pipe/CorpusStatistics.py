@@ -0,0 +1,266 @@
+# CorpusStatistics.py
+
+import os
+import json
+import math
+import pickle
+import threading
+from collections import Counter
+from hashlib import sha256
+from com_worktwins_pipe.JsonlLog import JsonlLog
+
+
+class CorpusStatistics:
+    """
+    Word statistics of a whole library, maintained incrementally one book at a time.
+
+    Each book contributes its word counts. The store keeps mergeable counters of the total
+    occurrences and the document frequency (number of books) of every word. Adding or
+    removing a book adds or subtracts that book's counts only, so an update costs the
+    size of one book's vocabulary, not a rescan of the library. Queries are dict lookups.
+
+    The books are recorded in a JsonlLog (additions with their counts, and removals),
+    replayed into the counters on open and shared with the other processes updating the
+    store. Every snapshot_bytes of log, the counters are pickled with the log offset they
+    cover, so opening the store only replays the entries appended since.
+    """
+    # Bump when the layout of the snapshot changes, to ignore older snapshots
+    SNAPSHOT_VERSION = 1
+
+    def __init__(self, cache_dir, snapshot_bytes=16 * 2 ** 20):
+        """
+        Initializes the CorpusStatistics.
+
+        Args:
+            cache_dir (str): Directory of the store, usually shared by a whole library.
+            snapshot_bytes (int): Log growth after which the counters are snapshotted again.
+        """
+        self.directory = cache_dir
+        self.log = JsonlLog(os.path.join(cache_dir, "books.jsonl"))
+        self.snapshot_path = os.path.join(cache_dir, "snapshot.pickle")
+        self.snapshot_bytes = snapshot_bytes
+
+        self.term_counts = Counter()
+        self.document_frequencies = Counter()
+        self.total_terms = 0
+        # Book -> location of its addition in the log, number of words and digest of the counts
+        self.books = {}
+        self.snapshot_offset = 0
+        self.lock = threading.RLock()
+
+        self.load_snapshot()
+        self.refresh()
+
+    def __len__(self):
+        return len(self.books)
+
+    def __contains__(self, book):
+        return book in self.books
+
+    @staticmethod
+    def digest(counts):
+        return sha256(json.dumps(counts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def load_snapshot(self):
+        """
+        Loads the last snapshot of the counters, if it matches the log.
+        """
+        if not (os.path.exists(self.snapshot_path) and os.path.exists(self.log.path)):
+            return
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                saved = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return
+        if saved.get("version") != self.SNAPSHOT_VERSION or saved["log_offset"] > os.path.getsize(self.log.path):
+            return
+        self.term_counts = saved["term_counts"]
+        self.document_frequencies = saved["document_frequencies"]
+        self.total_terms = saved["total_terms"]
+        self.books = saved["books"]
+        self.log.offset = self.snapshot_offset = saved["log_offset"]
+
+    def save_snapshot(self):
+        """
+        Pickles the counters with the log offset they cover.
+        """
+        with self.lock:
+            saved = {
+                "version": self.SNAPSHOT_VERSION,
+                "log_offset": self.log.offset,
+                "term_counts": self.term_counts,
+                "document_frequencies": self.document_frequencies,
+                "total_terms": self.total_terms,
+                "books": self.books,
+            }
+            tmp_path = f"{self.snapshot_path}.tmp{os.getpid()}"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(saved, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.snapshot_path)
+            self.snapshot_offset = self.log.offset
+
+    def refresh(self):
+        """
+        Applies the log entries appended since the last read (by this or another process).
+        """
+        with self.lock:
+            self.log.refresh(self.apply)
+
+    def apply(self, entry, offset, length):
+        """
+        Merges a log entry into the counters.
+        """
+        book = entry["book"]
+        if book in self.books:
+            self.subtract(book)
+        if entry["op"] == "add":
+            counts = entry["counts"]
+            self.term_counts.update(counts)
+            self.document_frequencies.update(counts.keys())
+            total = sum(counts.values())
+            self.total_terms += total
+            self.books[book] = {"offset": offset, "length": length, "total": total, "digest": entry["digest"]}
+
+    def subtract(self, book):
+        """
+        Removes the counts of a book from the counters, reading them back from the log.
+        """
+        location = self.books.pop(book)
+        with open(self.log.path, "rb") as f:
+            f.seek(location["offset"])
+            counts = json.loads(f.read(location["length"]))["counts"]
+        for word, count in counts.items():
+            remaining = self.term_counts[word] - count
+            if remaining > 0:
+                self.term_counts[word] = remaining
+                self.document_frequencies[word] -= 1
+            else:
+                # Dropped, so the counters only hold words of the current books
+                del self.term_counts[word]
+                del self.document_frequencies[word]
+        self.total_terms -= location["total"]
+
+    def add_book(self, book, counts):
+        """
+        Adds the word counts of a book, replacing its previous counts if it was already added.
+
+        Args:
+            book (str): Identifier of the book, e.g. its PDF name.
+            counts (dict): Word -> number of occurrences in the book.
+
+        Returns:
+            bool: False if the book was already recorded with the same counts.
+        """
+        counts = {word: int(count) for word, count in counts.items() if count > 0}
+        entry = {"op": "add", "book": book, "counts": counts, "digest": self.digest(counts)}
+        return self.append(entry, lambda: self.books.get(book, {}).get("digest") != entry["digest"])
+
+    def remove_book(self, book):
+        """
+        Removes a book from the statistics.
+
+        Args:
+            book (str): Identifier of the book.
+
+        Returns:
+            bool: False if the book was not recorded.
+        """
+        return self.append({"op": "remove", "book": book}, lambda: book in self.books)
+
+    def append(self, entry, is_needed):
+        """
+        Appends an entry to the log and applies it, unless is_needed() is false once the
+        log is up to date.
+        """
+        with self.lock, self.log.appending(self.apply):
+            if not is_needed():
+                return False
+            for appended in self.log.append([entry]):
+                self.apply(*appended)
+            if self.log.offset - self.snapshot_offset >= self.snapshot_bytes:
+                self.save_snapshot()
+            return True
+
+    def revision(self):
+        """
+        Digest of the recorded books and their counts, which changes with any update.
+
+        Returns:
+            str: Hex sha256 digest.
+        """
+        with self.lock:
+            return sha256(json.dumps(sorted(
+                (book, location["digest"]) for book, location in self.books.items()
+            )).encode("utf-8")).hexdigest()
+
+    def document_frequency(self, word):
+        """
+        Number of books in which a word occurs.
+        """
+        return self.document_frequencies.get(word, 0)
+
+    def document_share(self, word):
+        """
+        Share of the books in which a word occurs, 0 for an empty corpus.
+        """
+        return self.document_frequency(word) / len(self.books) if self.books else 0.0
+
+    def corpus_frequency(self, word):
+        """
+        Occurrences of a word relative to all the words of the corpus.
+        """
+        return self.term_counts.get(word, 0) / self.total_terms if self.total_terms else 0.0
+
+    def idf(self, word):
+        """
+        Smoothed inverse document frequency of a word, as in scikit-learn:
+        ln((1 + books) / (1 + document frequency)) + 1.
+        """
+        return math.log((1 + len(self.books)) / (1 + self.document_frequency(word))) + 1
+
+    def filter_common(self, word_freq_dict, max_document_share=0.5, min_books=10):
+        """
+        Drops the words occurring in too many books of the library to discriminate between
+        them (library-wide connector words), once the library is large enough to tell.
+
+        Args:
+            word_freq_dict (dict): Word -> book frequency of a book.
+            max_document_share (float): Maximum share of the books a kept word occurs in.
+            min_books (int): Below this number of books, no word is dropped.
+
+        Returns:
+            dict: The words that are kept, with their book frequencies.
+        """
+        common = set(self.common_words(word_freq_dict, max_document_share, min_books))
+        if not common:
+            return word_freq_dict
+        return {word: frequency for word, frequency in word_freq_dict.items() if word not in common}
+
+    def common_words(self, words, max_document_share=0.5, min_books=10):
+        """
+        The words filter_common drops.
+
+        Args:
+            words (iterable): Words of a book.
+            max_document_share (float): Maximum share of the books a kept word occurs in.
+            min_books (int): Below this number of books, no word is dropped.
+
+        Returns:
+            list: The dropped words, sorted.
+        """
+        with self.lock:
+            if len(self.books) < min_books:
+                return []
+            max_documents = max_document_share * len(self.books)
+            return sorted(word for word in words if self.document_frequencies.get(word, 0) > max_documents)
+
+    def filter_key(self, words, max_document_share=0.5, min_books=10):
+        """
+        What filter_common does to a book, to key its outputs on: unlike revision, it only
+        changes when another book changes the words dropped from this one.
+
+        Returns:
+            str: Hex sha256 digest of the dropped words, or None if no word is dropped.
+        """
+        common = self.common_words(words, max_document_share, min_books)
+        return sha256(json.dumps(common).encode("utf-8")).hexdigest() if common else None
@@ -0,0 +1,180 @@
+# EmbeddingCache.py
+
+import os
+import json
+import threading
+from collections import OrderedDict
+from hashlib import sha256
+import numpy as np
+from com_worktwins_pipe.JsonlLog import JsonlLog
+
+
+class EmbeddingCache:
+    """
+    Persistent cache of text embeddings, keyed by the sha256 of the text, one directory per
+    model and encoding parameters (pooling, maximum length...).
+
+    Vectors are appended as rows of a raw float16/float32 matrix which is read through a
+    memory map, and an index (a JsonlLog shared with the other processes using the cache)
+    maps each text hash to its row. Recently used vectors are kept in an LRU-bounded
+    in-memory hot set.
+    """
+    def __init__(self, cache_dir, model_name, params=None, dtype="float32", hot_size=4096):
+        """
+        Initializes the EmbeddingCache.
+
+        Args:
+            cache_dir (str): Root directory of the cache, usually shared by a whole library.
+            model_name (str): Model the embeddings come from; each model has its own entries.
+            params (dict, optional): Encoding parameters (pooling, max_length...); each set of
+                parameters has its own entries, as they change the vectors.
+            dtype (str): "float32", or "float16" to halve the size of the cache.
+            hot_size (int): Maximum number of vectors kept in memory.
+        """
+        self.model_name = model_name
+        self.params = json.dumps(params or {}, sort_keys=True)
+        self.dtype = np.dtype(dtype)
+        self.hot_size = hot_size
+        directory_name = model_name.replace("/", "__")
+        if params:
+            directory_name += "-" + sha256(self.params.encode("utf-8")).hexdigest()[:12]
+        self.directory = os.path.join(cache_dir, directory_name)
+        self.vectors_path = os.path.join(self.directory, f"vectors.{self.dtype.name}")
+        self.index = JsonlLog(os.path.join(self.directory, "index.jsonl"))
+        self.meta_path = os.path.join(self.directory, "meta.json")
+
+        self.dim = None
+        self.rows = {}
+        self.hot = OrderedDict()
+        self.matrix = None
+        self.lock = threading.Lock()
+
+        self.load_meta()
+
+    @staticmethod
+    def key(text):
+        return sha256(text.encode("utf-8")).hexdigest()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def load_meta(self):
+        if self.dim is None and os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+
+    def refresh(self):
+        """
+        Reads the index entries appended since the last read (by this or another process).
+        """
+        self.load_meta()
+        if self.dim is not None:
+            self.index.refresh(self.apply)
+
+    def apply(self, entry, offset, length):
+        self.rows[entry["key"]] = entry["row"]
+
+    def row_vector(self, row):
+        """
+        Reads a row of the vector matrix, remapping the file when it has grown.
+        """
+        if self.matrix is None or row >= self.matrix.shape[0]:
+            rows = os.path.getsize(self.vectors_path) // (self.dim * self.dtype.itemsize)
+            self.matrix = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dim))
+        return np.asarray(self.matrix[row], dtype=np.float32)
+
+    def remember(self, key, vector):
+        self.hot[key] = vector
+        self.hot.move_to_end(key)
+        while len(self.hot) > self.hot_size:
+            self.hot.popitem(last=False)
+
+    def lookup(self, texts):
+        """
+        Looks up the embeddings of texts.
+
+        Args:
+            texts (list): The texts to look up.
+
+        Returns:
+            dict: Position in texts -> float32 vector, for the texts found in the cache.
+        """
+        found = {}
+        with self.lock:
+            keys = [self.key(text) for text in texts]
+            if any(key not in self.hot and key not in self.rows for key in keys):
+                self.refresh()
+
+            for position, key in enumerate(keys):
+                vector = self.hot.get(key)
+                if vector is None:
+                    row = self.rows.get(key)
+                    if row is None:
+                        continue
+                    vector = self.row_vector(row)
+                self.remember(key, vector)
+                found[position] = vector
+        return found
+
+    def put_many(self, texts, vectors):
+        """
+        Stores the embeddings of texts that are not cached yet.
+
+        Args:
+            texts (list): The embedded texts.
+            vectors (np.ndarray): [len(texts), dim] embeddings.
+
+        Raises:
+            ValueError: If the vectors do not have the dimension of the cached ones.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(texts):
+            return
+
+        with self.lock:
+            if self.dim is None:
+                self.write_meta(vectors.shape[1])
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the cache ({self.dim}).")
+
+            with self.index.appending(self.apply):
+                new = {}
+                for text, vector in zip(texts, vectors):
+                    key = self.key(text)
+                    if key not in self.rows and key not in new:
+                        new[key] = vector
+                if new:
+                    self.append(new)
+
+            for text, vector in zip(texts, vectors):
+                # Rounded like the stored copy, so hot and cold reads agree
+                self.remember(self.key(text), vector.astype(self.dtype).astype(np.float32))
+
+    def append(self, new):
+        """
+        Appends vectors and their index entries; called with the index lock held.
+        """
+        row_bytes = self.dim * self.dtype.itemsize
+        fd = os.open(self.vectors_path, os.O_RDWR | os.O_CREAT)
+        with os.fdopen(fd, "r+b") as vectors_file:
+            # A partial row left by an interrupted append is overwritten
+            first_row = os.fstat(fd).st_size // row_bytes
+            vectors_file.truncate(first_row * row_bytes)
+            vectors_file.seek(first_row * row_bytes)
+            vectors_file.write(np.stack(list(new.values())).astype(self.dtype).tobytes())
+
+        # Vectors are on disk before the index points at them
+        for entry, offset, length in self.index.append([
+            {"key": key, "row": first_row + i} for i, key in enumerate(new)
+        ]):
+            self.apply(entry, offset, length)
+
+    def write_meta(self, dim):
+        os.makedirs(self.directory, exist_ok=True)
+        if not os.path.exists(self.meta_path):
+            tmp_path = f"{self.meta_path}.tmp{os.getpid()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"model": self.model_name, "dtype": self.dtype.name, "dim": dim}, f)
+            os.replace(tmp_path, self.meta_path)
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            self.dim = json.load(f)["dim"]
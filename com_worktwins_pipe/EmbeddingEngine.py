@@ -0,0 +1,193 @@
+# EmbeddingEngine.py
+
+import threading
+import numpy as np
+import torch
+from transformers import AutoTokenizer
+from com_worktwins_pipe.InferenceBackend import TorchBackend, make_batches
+
+
+class EmbeddingEngine:
+    """
+    Batched sentence embeddings with a Hugging Face encoder.
+
+    Texts are tokenized once, sorted by length and packed into dynamic batches bounded by a
+    token budget, so padding stays minimal. Embeddings are the mean of the token states
+    weighted by the attention mask, so padding tokens do not leak into the result.
+
+    With an EmbeddingCache, only texts missing from the cache are embedded (once each), and
+    the model is loaded on first use, so a fully cached run never loads it.
+
+    The model runs on an inference backend (PyTorch by default, or ONNX Runtime); a backend
+    other than PyTorch is checked against the PyTorch embeddings of CHECK_TEXTS when loaded.
+    """
+    DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+    CHECK_TEXTS = [
+        "A commit records a snapshot of the project.",
+        "Branches are movable pointers to commits, and merging joins two lines of history.",
+        "def add(a, b): return a + b",
+        "The index stages changes before they are committed to the repository.",
+    ]
+
+    def __init__(self, model_name=DEFAULT_MODEL, batch_size=64, max_length=128,
+                 max_batch_tokens=8192, num_threads=None, tokenizer=None, model=None, cache=None,
+                 backend=None):
+        """
+        Initializes the EmbeddingEngine.
+
+        Args:
+            model_name (str): Hugging Face model to load.
+            batch_size (int): Maximum number of texts per forward pass.
+            max_length (int): Maximum number of tokens per text (longer texts are truncated).
+            max_batch_tokens (int): Maximum padded tokens (texts x longest text) per forward pass.
+            num_threads (int, optional): torch intra-op threads. Note this setting is process-wide.
+            tokenizer, model (optional): Already loaded tokenizer and model to use instead.
+            cache (EmbeddingCache, optional): Persistent cache of the embeddings.
+            backend (TorchBackend or OnnxBackend, optional): Inference backend. Defaults to PyTorch.
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.max_batch_tokens = max_batch_tokens
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.cache = cache
+        self.backend = backend or TorchBackend()
+        self._tokenizer = tokenizer
+        self._model = model
+        if isinstance(model, torch.nn.Module):
+            model.eval()
+        self._load_lock = threading.Lock()
+
+    def get_params(self):
+        """
+        Encoding parameters, part of the namespace of the cached embeddings.
+        """
+        return {"pooling": "masked_mean", "max_length": self.max_length}
+
+    def load(self):
+        with self._load_lock:
+            if self._tokenizer is None:
+                self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            if self._model is None:
+                model = self.backend.load_encoder(self.model_name)
+                self.backend.validate(self.model_name, lambda: self.reference_cosine(model))
+                self._model = model
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            self.load()
+        return self._tokenizer
+
+    @property
+    def model(self):
+        if self._model is None:
+            self.load()
+        return self._model
+
+    def reference_cosine(self, model):
+        """
+        Lowest cosine similarity between the embeddings of CHECK_TEXTS by a model and by the
+        PyTorch reference model.
+
+        Args:
+            model: The model to check, e.g. loaded by an ONNX backend.
+
+        Returns:
+            float: The lowest cosine similarity.
+        """
+        checked = EmbeddingEngine(self.model_name, max_length=self.max_length, tokenizer=self._tokenizer, model=model)
+        reference = EmbeddingEngine(self.model_name, max_length=self.max_length, tokenizer=self._tokenizer)
+        embeddings = checked.encode_batches(self.CHECK_TEXTS)
+        reference_embeddings = reference.encode_batches(self.CHECK_TEXTS)
+        cosines = (embeddings * reference_embeddings).sum(axis=1) / (
+            np.linalg.norm(embeddings, axis=1) * np.linalg.norm(reference_embeddings, axis=1)
+        )
+        return float(cosines.min())
+
+    @staticmethod
+    def mean_pooling(last_hidden_state, attention_mask):
+        """
+        Mean of the token embeddings, ignoring padding.
+
+        Args:
+            last_hidden_state (torch.Tensor): [batch, tokens, dim] token embeddings.
+            attention_mask (torch.Tensor): [batch, tokens] mask, 1 for real tokens.
+
+        Returns:
+            torch.Tensor: [batch, dim] embeddings.
+        """
+        mask = attention_mask.unsqueeze(-1).to(last_hidden_state.dtype)
+        summed = (last_hidden_state * mask).sum(dim=1)
+        counts = mask.sum(dim=1).clamp(min=1e-9)
+        return summed / counts
+
+    def forward(self, features):
+        """
+        Runs the encoder on padded features and pools the result.
+
+        Args:
+            features (dict): Padded tokenizer output as tensors.
+
+        Returns:
+            np.ndarray: [batch, dim] float32 embeddings.
+        """
+        with torch.inference_mode():
+            outputs = self.model(**features)
+            return self.mean_pooling(outputs.last_hidden_state, features["attention_mask"]).float().numpy()
+
+    def encode(self, texts):
+        """
+        Embeds a list of texts, reusing the cached embeddings.
+
+        Args:
+            texts (list): The texts to embed.
+
+        Returns:
+            np.ndarray: [len(texts), dim] float32 embeddings, in the order of the input.
+        """
+        texts = list(texts)
+        if self.cache is None or not texts:
+            return self.encode_batches(texts)
+
+        found = self.cache.lookup(texts)
+        missing = list(dict.fromkeys(text for i, text in enumerate(texts) if i not in found))
+        if missing:
+            missing_embeddings = self.encode_batches(missing)
+            self.cache.put_many(missing, missing_embeddings)
+            computed = dict(zip(missing, missing_embeddings))
+        else:
+            computed = {}
+
+        vectors = [found[i] if i in found else computed[text] for i, text in enumerate(texts)]
+        return np.stack(vectors).astype(np.float32, copy=False)
+
+    def encode_batches(self, texts):
+        """
+        Embeds a list of texts with the model, in dynamic batches.
+
+        Args:
+            texts (list): The texts to embed.
+
+        Returns:
+            np.ndarray: [len(texts), dim] float32 embeddings, in the order of the input.
+        """
+        if not texts:
+            return np.zeros((0, self.model.config.hidden_size), dtype=np.float32)
+
+        encodings = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        lengths = [len(input_ids) for input_ids in encodings["input_ids"]]
+        embeddings = None
+
+        for batch in make_batches(lengths, self.batch_size, self.max_batch_tokens):
+            features = self.tokenizer.pad(
+                {key: [values[i] for i in batch] for key, values in encodings.items()},
+                return_tensors="pt"
+            )
+            batch_embeddings = self.forward(features)
+            if embeddings is None:
+                embeddings = np.empty((len(texts), batch_embeddings.shape[1]), dtype=np.float32)
+            embeddings[batch] = batch_embeddings
+
+        return embeddings
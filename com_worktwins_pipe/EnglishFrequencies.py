@@ -0,0 +1,204 @@
+# EnglishFrequencies.py
+
+import logging
+import math
+import os
+import threading
+import numpy as np
+
+
+class EnglishFrequencies:
+    """
+    Word frequencies of a language from wordfreq, loaded once per process and looked up in bulk.
+
+    The wordfreq table is stored as a sorted fixed-width byte string array of the words and
+    an int16 array of their frequency buckets (a bucket i holds the words of frequency
+    10 ** (-i / 100)). Both are saved as .npy files in a cache directory and memory-mapped by
+    later processes, so they are shared through the page cache instead of being rebuilt.
+
+    lookup() finds all the words with one binary search (np.searchsorted) and maps their
+    buckets to the frequencies wordfreq.word_frequency returns, rounding included. Words
+    that are not plain lowercase ASCII letters go through word_frequency itself, because
+    wordfreq normalizes them before its lookup.
+    """
+    # Per-user cache, for callers that do not keep the tables next to their data
+    DEFAULT_CACHE_DIR = os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "worktwins", "wordfreq"
+    )
+    # Bump when the layout of the saved arrays changes, to ignore older files
+    FORMAT_VERSION = 1
+
+    _tables = {}
+    _lock = threading.Lock()
+
+    def __init__(self, words, buckets, lang="en"):
+        """
+        Initializes the table. Prefer EnglishFrequencies.get, which shares it.
+
+        Args:
+            words (np.ndarray): Sorted UTF-8 words, fixed-width byte strings ("S" dtype).
+            buckets (np.ndarray): int16 frequency bucket of each word.
+            lang (str): The wordfreq language of the table.
+        """
+        self.words = words
+        self.buckets = buckets
+        self.lang = lang
+        bucket_count = int(buckets.max()) + 1 if len(buckets) else 0
+        self.bucket_frequencies = np.array(
+            [self.rounded_frequency(10 ** (-index / 100)) for index in range(bucket_count)], dtype=np.float64
+        )
+
+    def __len__(self):
+        return len(self.words)
+
+    @classmethod
+    def get(cls, lang="en", cache_dir=DEFAULT_CACHE_DIR):
+        """
+        Returns the frequency table of a language, loading it on first use.
+
+        The table is memory-mapped from cache_dir if it was saved there for the installed
+        wordfreq version; otherwise it is built from wordfreq and saved for later processes.
+
+        Args:
+            lang (str): The wordfreq language.
+            cache_dir (str): Directory of the saved tables, or None to keep the table in memory.
+
+        Returns:
+            EnglishFrequencies: The shared table.
+        """
+        key = (lang, os.path.abspath(cache_dir) if cache_dir else None)
+        table = cls._tables.get(key)
+        if table is None:
+            with cls._lock:
+                table = cls._tables.get(key)
+                if table is None:
+                    table = cls.load_or_build(lang, cache_dir)
+                    cls._tables[key] = table
+        return table
+
+    @classmethod
+    def load_or_build(cls, lang, cache_dir):
+        if cache_dir is None:
+            return cls.from_wordfreq(lang)
+        prefix = cls.cache_prefix(lang, cache_dir)
+        table = cls.load(prefix, lang)
+        if table is None:
+            table = cls.from_wordfreq(lang)
+            try:
+                table.save(prefix)
+            except OSError as e:
+                logging.warning(f"Could not save the {lang} frequency table to {cache_dir}: {e}")
+        return table
+
+    @classmethod
+    def cache_prefix(cls, lang, cache_dir):
+        from importlib.metadata import version
+
+        return os.path.join(cache_dir, f"{lang}-wordfreq{version('wordfreq')}-v{cls.FORMAT_VERSION}")
+
+    @classmethod
+    def from_wordfreq(cls, lang="en"):
+        """
+        Builds the table from the wordfreq frequency list of a language.
+        """
+        from wordfreq import get_frequency_list
+
+        word_buckets = {}
+        for index, bucket in enumerate(get_frequency_list(lang)):
+            for word in bucket:
+                # Like wordfreq.get_frequency_dict, a word listed twice keeps its last bucket
+                word_buckets[word] = index
+
+        words = np.array([word.encode("utf-8") for word in word_buckets], dtype=bytes)
+        buckets = np.fromiter(word_buckets.values(), dtype=np.int16, count=len(word_buckets))
+        order = np.argsort(words, kind="stable")
+        return cls(words[order], buckets[order], lang)
+
+    @classmethod
+    def load(cls, prefix, lang="en"):
+        """
+        Memory-maps a saved table.
+
+        Returns:
+            EnglishFrequencies: The table, or None if it was not saved (completely) there.
+        """
+        words_path, buckets_path = f"{prefix}.words.npy", f"{prefix}.buckets.npy"
+        if not (os.path.exists(words_path) and os.path.exists(buckets_path)):
+            return None
+        try:
+            words = np.load(words_path, mmap_mode="r")
+            buckets = np.load(buckets_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if len(words) != len(buckets):
+            return None
+        return cls(words, buckets, lang)
+
+    def save(self, prefix):
+        """
+        Saves the table as .npy files, to be memory-mapped by later processes.
+
+        Returns:
+            str: The prefix of the saved files.
+        """
+        os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+        # The words are written last: their file marks a complete table
+        for suffix, array in (("buckets", self.buckets), ("words", self.words)):
+            path = f"{prefix}.{suffix}.npy"
+            tmp_path = f"{path}.tmp{os.getpid()}.npy"
+            np.save(tmp_path, np.asarray(array))
+            os.replace(tmp_path, path)
+        return prefix
+
+    @staticmethod
+    def rounded_frequency(frequency):
+        """
+        A single-token frequency as returned by wordfreq.word_frequency (3 significant digits).
+        """
+        frequency = 1.0 / (1.0 / frequency)
+        leading_zeroes = math.floor(-math.log(frequency, 10))
+        return round(frequency, leading_zeroes + 3)
+
+    @staticmethod
+    def is_simple(word):
+        """
+        Whether a word is plain lowercase ASCII letters ([a-z]+), which wordfreq's
+        tokenization leaves as is, so a table lookup is exact.
+        """
+        return word.isascii() and word.isalpha() and word.islower()
+
+    def lookup(self, words):
+        """
+        Frequencies of words, as wordfreq.word_frequency(word, lang) would return them.
+
+        Args:
+            words (list): Words (expected lowercase).
+
+        Returns:
+            np.ndarray: float64 frequencies, 0 for unknown words.
+        """
+        words = list(words)
+        frequencies = np.zeros(len(words), dtype=np.float64)
+
+        simple, complex_words = [], []
+        width = self.words.dtype.itemsize
+        for i, word in enumerate(words):
+            if not self.is_simple(word):
+                complex_words.append(i)
+            elif len(word) <= width:  # Longer words are not in the table
+                simple.append(i)
+
+        if simple and len(self.words):
+            keys = np.array([words[i] for i in simple], dtype=f"S{width}")
+            positions = np.searchsorted(self.words, keys)
+            positions[positions == len(self.words)] = 0
+            found = self.words[positions] == keys
+            indices = np.asarray(simple)[found]
+            frequencies[indices] = self.bucket_frequencies[self.buckets[positions[found]]]
+
+        if complex_words:
+            from wordfreq import word_frequency
+
+            for i in complex_words:
+                frequencies[i] = word_frequency(words[i], self.lang)
+        return frequencies
@@ -0,0 +1,149 @@
+# ExtractiveSummarizer.py
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+
+class ExtractiveSummarizer:
+    """
+    Fast extractive summaries: each paragraph is summarized by its best sentences, in their
+    original order.
+
+    A sentence scores high when it contains book-specific keywords (frequent in the book, rare
+    in English) and when it is central to its paragraph, i.e. close in TF-IDF space to the
+    centroid of the paragraph's sentences. All the sentences of the paragraphs are scored
+    together with sparse matrix operations, so no model is involved.
+    """
+    # Lower bound of the English frequency, for words unknown to wordfreq
+    MIN_ENGLISH_FREQUENCY = 1e-7
+
+    def __init__(self, max_sentences=2, keyword_weight=0.5):
+        """
+        Initializes the ExtractiveSummarizer.
+
+        Args:
+            max_sentences (int): Number of sentences kept per paragraph.
+            keyword_weight (float): Share of the keyword score in the sentence score; the rest
+                is the TF-IDF centrality.
+        """
+        self.max_sentences = max_sentences
+        self.keyword_weight = keyword_weight
+
+    def get_config(self):
+        return {"max_sentences": self.max_sentences, "keyword_weight": self.keyword_weight}
+
+    @classmethod
+    def keyword_weights(cls, word_frequencies):
+        """
+        Book-specific weight of each word: the log of its relative frequency in the book over
+        its frequency in English.
+
+        Args:
+            word_frequencies (list): WordFrequenciesPipe output ("word", "book_frequency",
+                "english_frequency").
+
+        Returns:
+            dict: Word -> weight.
+        """
+        total = sum(item["book_frequency"] for item in word_frequencies)
+        if not total:
+            return {}
+        return {
+            item["word"]: float(np.log1p(
+                item["book_frequency"] / total / max(item["english_frequency"], cls.MIN_ENGLISH_FREQUENCY)
+            ))
+            for item in word_frequencies
+        }
+
+    def summarize(self, paragraphs, keyword_weights):
+        """
+        Summarizes paragraphs by their best sentences.
+
+        Args:
+            paragraphs (list): Paragraph entries with "text" and "sentences" ("text", "keywords").
+            keyword_weights (dict): Word -> weight, see keyword_weights().
+
+        Returns:
+            list: One summary per paragraph. Paragraphs with at most max_sentences sentences
+                are returned as they are.
+        """
+        texts = []
+        keywords = []
+        owners = []
+        for index, paragraph in enumerate(paragraphs):
+            sentences = paragraph.get("sentences") or [{"text": paragraph["text"], "keywords": paragraph.get("keywords", [])}]
+            for sentence in sentences:
+                texts.append(sentence["text"])
+                keywords.append(sentence["keywords"])
+                owners.append(index)
+        if not texts:
+            return [paragraph["text"] for paragraph in paragraphs]
+
+        owners = np.asarray(owners)
+        scores = (
+            self.keyword_weight * self.keyword_scores(keywords, keyword_weights)
+            + (1 - self.keyword_weight) * self.centrality_scores(texts, owners, len(paragraphs))
+        )
+
+        # Rank the sentences inside each paragraph (owners are in increasing order)
+        order = np.lexsort((-scores, owners))
+        ranks = np.arange(len(texts)) - np.searchsorted(owners[order], owners[order], side="left")
+        selected = np.sort(order[ranks < self.max_sentences])
+
+        summaries = [[] for _ in paragraphs]
+        for index in selected:
+            summaries[owners[index]].append(texts[index])
+        counts = np.bincount(owners, minlength=len(paragraphs))
+        return [
+            paragraph["text"] if count <= self.max_sentences else " ".join(summary)
+            for paragraph, count, summary in zip(paragraphs, counts, summaries)
+        ]
+
+    @staticmethod
+    def keyword_scores(keywords, keyword_weights):
+        """
+        Sum of the weights of the distinct keywords of each sentence, scaled to [0, 1].
+
+        Returns:
+            np.ndarray: One score per sentence.
+        """
+        vocabulary = {}
+        rows = []
+        columns = []
+        for row, sentence_keywords in enumerate(keywords):
+            for word in set(sentence_keywords):
+                if word in keyword_weights:
+                    rows.append(row)
+                    columns.append(vocabulary.setdefault(word, len(vocabulary)))
+        if not vocabulary:
+            return np.zeros(len(keywords))
+
+        weights = np.empty(len(vocabulary))
+        for word, column in vocabulary.items():
+            weights[column] = keyword_weights[word]
+        matrix = csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(len(keywords), len(vocabulary)))
+        scores = matrix @ weights
+        top = scores.max()
+        return scores / top if top > 0 else scores
+
+    @staticmethod
+    def centrality_scores(texts, owners, paragraph_count):
+        """
+        Cosine similarity of each sentence to the TF-IDF centroid of its paragraph.
+
+        Returns:
+            np.ndarray: One score per sentence.
+        """
+        try:
+            tfidf = TfidfVectorizer().fit_transform(texts)
+        except ValueError:  # No word at all
+            return np.zeros(len(texts))
+
+        membership = csr_matrix(
+            (np.ones(len(texts)), (owners, np.arange(len(texts)))),
+            shape=(paragraph_count, len(texts))
+        )
+        centroids = normalize(membership @ tfidf)
+        return np.asarray(tfidf.multiply(centroids[owners]).sum(axis=1)).ravel()
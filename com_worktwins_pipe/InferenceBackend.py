@@ -0,0 +1,230 @@
+# InferenceBackend.py
+
+import os
+import json
+import shutil
+
+
+def make_batches(lengths, batch_size, max_batch_tokens):
+    """
+    Packs text indices into batches of similar length: texts are sorted by token length,
+    longest first, so the padding of each batch stays minimal.
+
+    Args:
+        lengths (list): Token length of each text.
+        batch_size (int): Maximum number of texts per batch.
+        max_batch_tokens (int): Maximum padded tokens (texts x longest text) per batch.
+
+    Returns:
+        list: Lists of text indices.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches = []
+    batch = []
+    for index in order:
+        # Sorted longest first, so the first text of a batch sets its padded length
+        longest = lengths[batch[0]] if batch else lengths[index]
+        if batch and (len(batch) >= batch_size or (len(batch) + 1) * longest > max_batch_tokens):
+            batches.append(batch)
+            batch = []
+        batch.append(index)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class TorchBackend:
+    """
+    Default inference backend: the Hugging Face PyTorch models, in eager fp32.
+    """
+    name = "torch"
+
+    def get_config(self):
+        # Empty, so outputs produced before backends existed stay valid
+        return {}
+
+    def cache_name(self, model_name):
+        """
+        Name of the model in the embedding and summary caches.
+        """
+        return model_name
+
+    def load_encoder(self, model_name):
+        """
+        Loads an encoder returning last_hidden_state, ready for inference.
+        """
+        from transformers import AutoModel
+
+        model = AutoModel.from_pretrained(model_name)
+        model.eval()
+        return model
+
+    def load_summarizer(self, model_name):
+        """
+        Loads a summarization pipeline, on the GPU when there is one.
+        """
+        import torch
+        from transformers import pipeline
+
+        device = 0 if torch.cuda.is_available() else -1
+        return pipeline("summarization", model=model_name, device=device)
+
+    def validate(self, model_name, min_cosine):
+        """
+        Checks the backend outputs against the PyTorch reference; nothing to check here.
+        """
+
+
+class OnnxBackend:
+    """
+    ONNX Runtime inference backend, with optional dynamic int8 quantization.
+
+    Models are exported with optimum on first use and the (quantized) graphs are cached on
+    disk, one directory per model and task, so later runs only load them. The first time an
+    encoder is loaded, its embeddings are compared with the PyTorch reference; the result is
+    stored next to the graphs and a backend below the cosine tolerance is refused.
+
+    Requires the optional optimum[onnxruntime] package.
+    """
+    name = "onnx"
+
+    def __init__(self, cache_dir, quantize=True, tolerance=0.99):
+        """
+        Initializes the OnnxBackend.
+
+        Args:
+            cache_dir (str): Directory of the exported graphs.
+            quantize (bool): Quantize the weights to int8 (dynamic quantization).
+            tolerance (float): Minimum cosine similarity to the PyTorch embeddings.
+        """
+        self.cache_dir = cache_dir
+        self.quantize = quantize
+        self.tolerance = tolerance
+
+    @property
+    def variant(self):
+        return "int8" if self.quantize else "fp32"
+
+    def get_config(self):
+        return {"backend": self.name, "precision": self.variant}
+
+    def cache_name(self, model_name):
+        return f"{model_name}@{self.name}-{self.variant}"
+
+    def model_dir(self, model_name, task):
+        return os.path.join(self.cache_dir, model_name.replace("/", "__"), f"{task}-{self.variant}")
+
+    def export(self, model_class, model_name, task):
+        """
+        Exports a model to ONNX, quantizes it if required and caches it.
+
+        Args:
+            model_class: optimum ORTModel class of the task.
+            model_name (str): Hugging Face model to export.
+            task (str): Name of the task, part of the cache directory.
+
+        Returns:
+            str: Directory of the cached graphs.
+        """
+        model_dir = self.model_dir(model_name, task)
+        if os.path.exists(model_dir):
+            return model_dir
+
+        print(f"Exporting {model_name} to ONNX ({self.variant}).")
+        tmp_dir = f"{model_dir}.tmp{os.getpid()}"
+        export_dir = os.path.join(tmp_dir, "export")
+        model_class.from_pretrained(model_name, export=True).save_pretrained(export_dir)
+
+        if self.quantize:
+            from optimum.onnxruntime import ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+            quantized_dir = os.path.join(tmp_dir, "quantized")
+            config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+            for file_name in os.listdir(export_dir):
+                if file_name.endswith(".onnx"):
+                    quantizer = ORTQuantizer.from_pretrained(export_dir, file_name=file_name)
+                    quantizer.quantize(save_dir=quantized_dir, quantization_config=config)
+                    # Keep the exported names, which the ORTModel classes load by default
+                    os.replace(
+                        os.path.join(quantized_dir, file_name.replace(".onnx", "_quantized.onnx")),
+                        os.path.join(quantized_dir, file_name)
+                    )
+            for file_name in os.listdir(export_dir):
+                if not file_name.endswith(".onnx") and not os.path.exists(os.path.join(quantized_dir, file_name)):
+                    shutil.copy(os.path.join(export_dir, file_name), quantized_dir)
+            export_dir = quantized_dir
+
+        try:
+            os.replace(export_dir, model_dir)
+        except OSError:
+            if not os.path.exists(model_dir):  # Else exported concurrently by another process
+                raise
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return model_dir
+
+    def load_encoder(self, model_name):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+
+        return ORTModelForFeatureExtraction.from_pretrained(
+            self.export(ORTModelForFeatureExtraction, model_name, "feature-extraction")
+        )
+
+    def load_summarizer(self, model_name):
+        from transformers import AutoTokenizer
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        from optimum.pipelines import pipeline
+
+        model = ORTModelForSeq2SeqLM.from_pretrained(self.export(ORTModelForSeq2SeqLM, model_name, "summarization"))
+        return pipeline("summarization", model=model, tokenizer=AutoTokenizer.from_pretrained(model_name), accelerator="ort")
+
+    def validate(self, model_name, min_cosine):
+        """
+        Checks the encoder embeddings against the PyTorch reference, once per exported model.
+
+        Args:
+            model_name (str): The encoder model.
+            min_cosine (callable): Computes the lowest cosine similarity between the backend and
+                the PyTorch embeddings of a set of probe texts.
+
+        Raises:
+            ValueError: If the embeddings are not within the cosine tolerance.
+        """
+        check_path = os.path.join(self.model_dir(model_name, "feature-extraction"), "check.json")
+        if os.path.exists(check_path):
+            with open(check_path, "r", encoding="utf-8") as f:
+                cosine = json.load(f)["min_cosine"]
+        else:
+            cosine = float(min_cosine())
+            os.makedirs(os.path.dirname(check_path), exist_ok=True)
+            with open(check_path, "w", encoding="utf-8") as f:
+                json.dump({"min_cosine": cosine}, f)
+
+        if cosine < self.tolerance:
+            raise ValueError(
+                f"ONNX {self.variant} embeddings of {model_name} have a cosine of {cosine:.4f} to the "
+                f"PyTorch reference, below the tolerance of {self.tolerance}."
+            )
+
+
+def create_backend(name, cache_dir=None, **kwargs):
+    """
+    Builds an inference backend from its configuration name.
+
+    Args:
+        name (str): "torch", "onnx" (int8) or "onnx-fp32".
+        cache_dir (str, optional): Directory of the exported graphs of the ONNX backends.
+
+    Returns:
+        TorchBackend or OnnxBackend: The backend.
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    if name in (None, "torch"):
+        return TorchBackend()
+    if name in ("onnx", "onnx-int8", "onnx-fp32"):
+        if cache_dir is None:
+            raise ValueError("The ONNX backend requires a cache directory for the exported graphs.")
+        return OnnxBackend(cache_dir, quantize=name != "onnx-fp32", **kwargs)
+    raise ValueError(f"Unknown inference backend '{name}'.")
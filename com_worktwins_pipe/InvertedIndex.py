@@ -0,0 +1,353 @@
+# InvertedIndex.py
+
+import os
+import re
+import json
+import math
+import shutil
+import numpy as np
+import pandas as pd
+
+from com_worktwins_pipe.PipeStorage import replace_directory, existing_directory
+
+
+class InvertedIndex:
+    """
+    Inverted index of the words of a book's paragraphs and sentences.
+
+    Every word (lowercase, as in r'\\b\\w+\\b') has an integer term id, its rank in the
+    sorted vocabulary. The postings of a term are its sentences and its paragraphs, with
+    the term frequency in each. Each sentence posting also has the positions of the term
+    in the sentence, for phrase queries. All postings are stored as CSR arrays: the
+    postings of term t are entries offsets[t]:offsets[t + 1]. Ids and positions are
+    delta-encoded (the first entry of a list is absolute, the others are gaps) in the
+    smallest integer type that fits, and decoded with a cumulative sum.
+
+    The index answers boolean (and/or), phrase and BM25 queries without reading the text.
+    That makes it a cheap first-stage retriever ahead of the vector index. It is persisted
+    as a directory of .npy arrays, memory-mapped when loaded, like VectorIndex.
+    """
+    TOKEN_PATTERN = re.compile(r"\b\w+\b")
+    # Bump when the layout of the saved arrays changes, to ignore older indexes
+    FORMAT_VERSION = 1
+
+    def __init__(self, terms, arrays, paragraph_ids, sentence_ids, k1=1.2, b=0.75):
+        """
+        Initializes the InvertedIndex. Use InvertedIndex.build or InvertedIndex.load.
+
+        Args:
+            terms (np.ndarray): Sorted vocabulary; the index of a term is its term id.
+            arrays (dict): Name -> array of the postings (see build).
+            paragraph_ids (list): Id of each paragraph.
+            sentence_ids (list): Id of each sentence.
+            k1 (float): BM25 term frequency saturation.
+            b (float): BM25 length normalization.
+        """
+        self.terms = terms
+        self.arrays = arrays
+        self.ids = {"paragraph": list(paragraph_ids), "sentence": list(sentence_ids)}
+        self.k1 = k1
+        self.b = b
+
+    def __len__(self):
+        return len(self.terms)
+
+    @classmethod
+    def tokenize(cls, text):
+        return cls.TOKEN_PATTERN.findall(text.lower())
+
+    @staticmethod
+    def delta_encode(values, offsets):
+        """
+        Gaps between consecutive values, restarting from the absolute value at each offset,
+        in the smallest unsigned type that fits.
+        """
+        gaps = values.copy()
+        gaps[1:] -= values[:-1]
+        starts = offsets[:-1][offsets[:-1] < len(values)]
+        gaps[starts] = values[starts]
+        return gaps.astype(np.min_scalar_type(int(gaps.max())) if len(gaps) else np.uint8)
+
+    @staticmethod
+    def decode_segments(gaps, offsets):
+        """
+        Decodes consecutive delta-encoded lists.
+
+        Args:
+            gaps (np.ndarray): The encoded lists, from offsets[0] to offsets[-1].
+            offsets (np.ndarray): Bounds of the lists.
+
+        Returns:
+            np.ndarray: int64 values.
+        """
+        values = np.cumsum(gaps, dtype=np.int64)
+        starts = offsets[:-1] - offsets[0]
+        bases = values[starts] - gaps[starts]
+        return values - np.repeat(bases, np.diff(offsets))
+
+    @classmethod
+    def build(cls, paragraphs, k1=1.2, b=0.75):
+        """
+        Indexes paragraphs and their sentences.
+
+        Args:
+            paragraphs (list): Paragraph entries with "id", "text" and "sentences" (each with
+                "id" and "text"), as in the ParagraphsAndCodeUnified report. A paragraph
+                without sentences is indexed as one sentence.
+            k1 (float): BM25 term frequency saturation.
+            b (float): BM25 length normalization.
+
+        Returns:
+            InvertedIndex: The index.
+        """
+        paragraph_ids, sentence_ids, sentence_paragraph, sentence_lengths = [], [], [], []
+        tokens, token_sentence, token_position = [], [], []
+        for paragraph_index, paragraph in enumerate(paragraphs):
+            paragraph_ids.append(paragraph["id"])
+            for sentence in paragraph.get("sentences") or [paragraph]:
+                words = cls.tokenize(sentence["text"])
+                token_sentence.extend([len(sentence_ids)] * len(words))
+                token_position.extend(range(len(words)))
+                tokens.extend(words)
+                sentence_ids.append(sentence["id"])
+                sentence_paragraph.append(paragraph_index)
+                sentence_lengths.append(len(words))
+
+        # Term ids are ranks in the sorted vocabulary, so a term is found by binary search
+        codes, uniques = pd.factorize(np.array(tokens, dtype=object))
+        order = np.argsort(np.asarray(uniques, dtype=str), kind="stable")
+        terms = np.asarray(uniques, dtype=str)[order]
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(len(order))
+        token_term = ranks[codes]
+
+        token_sentence = np.asarray(token_sentence, dtype=np.int64)
+        token_position = np.asarray(token_position, dtype=np.int64)
+        sentence_paragraph = np.asarray(sentence_paragraph, dtype=np.int32)
+        sentence_lengths = np.asarray(sentence_lengths, dtype=np.int32)
+
+        # Tokens sorted by term, sentence and position: runs of (term, sentence) are postings
+        order = np.lexsort((token_position, token_sentence, token_term))
+        token_term, token_sentence, token_position = token_term[order], token_sentence[order], token_position[order]
+        is_new = np.ones(len(order), dtype=bool)
+        is_new[1:] = (token_term[1:] != token_term[:-1]) | (token_sentence[1:] != token_sentence[:-1])
+        position_offsets = np.append(np.flatnonzero(is_new), len(order))
+        sentence_term = token_term[position_offsets[:-1]]
+        sentences = token_sentence[position_offsets[:-1]]
+        sentence_frequencies = np.diff(position_offsets)
+        sentence_offsets = np.searchsorted(sentence_term, np.arange(len(terms) + 1))
+
+        # Sentences of a term are in order, so runs of (term, paragraph) are paragraph postings
+        sentence_paragraphs = sentence_paragraph[sentences]
+        is_new = np.ones(len(sentences), dtype=bool)
+        is_new[1:] = (sentence_term[1:] != sentence_term[:-1]) | (sentence_paragraphs[1:] != sentence_paragraphs[:-1])
+        starts = np.flatnonzero(is_new)
+        paragraph_term = sentence_term[starts]
+        paragraph_frequencies = np.add.reduceat(sentence_frequencies, starts) if len(starts) else sentence_frequencies
+        paragraph_offsets = np.searchsorted(paragraph_term, np.arange(len(terms) + 1))
+
+        arrays = {
+            "sentence_offsets": sentence_offsets,
+            "sentence_gaps": cls.delta_encode(sentences, sentence_offsets),
+            "sentence_frequencies": sentence_frequencies.astype(np.uint16),
+            "sentence_lengths": sentence_lengths,
+            "paragraph_offsets": paragraph_offsets,
+            "paragraph_gaps": cls.delta_encode(sentence_paragraphs[starts].astype(np.int64), paragraph_offsets),
+            "paragraph_frequencies": paragraph_frequencies.astype(np.uint32),
+            "paragraph_lengths": np.bincount(
+                sentence_paragraph, weights=sentence_lengths, minlength=len(paragraph_ids)
+            ).astype(np.int32),
+            "position_offsets": position_offsets,
+            "position_gaps": cls.delta_encode(token_position, position_offsets),
+            "sentence_paragraph": sentence_paragraph,
+        }
+        return cls(terms, arrays, paragraph_ids, sentence_ids, k1=k1, b=b)
+
+    def term_id(self, term):
+        """
+        Returns:
+            int: The id of a term, or None if it is not in the index.
+        """
+        index = int(np.searchsorted(self.terms, term))
+        if index < len(self.terms) and self.terms[index] == term:
+            return index
+        return None
+
+    def postings(self, term_id, level="paragraph"):
+        """
+        Decodes the postings of a term.
+
+        Args:
+            term_id (int): The term id.
+            level (str): "paragraph" or "sentence".
+
+        Returns:
+            tuple: (sorted int64 paragraph or sentence indices, term frequency in each).
+        """
+        start, end = self.arrays[f"{level}_offsets"][term_id:term_id + 2]
+        indices = np.cumsum(self.arrays[f"{level}_gaps"][start:end], dtype=np.int64)
+        return indices, np.asarray(self.arrays[f"{level}_frequencies"][start:end])
+
+    def term_ids(self, words):
+        """
+        Term ids of the distinct words of a query, None for the words not in the index.
+        """
+        return [self.term_id(word) for word in dict.fromkeys(words)]
+
+    def boolean(self, query, mode="and", level="paragraph"):
+        """
+        Paragraphs or sentences containing all ("and") or any ("or") of the words of a query.
+
+        Args:
+            query (str): The query; tokenized like the indexed text.
+            mode (str): "and" or "or".
+            level (str): "paragraph" or "sentence".
+
+        Returns:
+            list: Ids of the matching paragraphs or sentences, in text order.
+        """
+        term_ids = self.term_ids(self.tokenize(query))
+        if not term_ids or (mode == "and" and None in term_ids):
+            return []
+        postings = [self.postings(term_id, level)[0] for term_id in term_ids if term_id is not None]
+        if not postings:
+            return []
+        # Intersections start from the rarest term
+        postings.sort(key=len)
+        matches = postings[0]
+        for indices in postings[1:]:
+            matches = np.intersect1d(matches, indices, assume_unique=True) if mode == "and" else np.union1d(matches, indices)
+        return [self.ids[level][index] for index in matches]
+
+    def phrase(self, query, level="sentence"):
+        """
+        Sentences (or their paragraphs) containing the words of a query consecutively.
+
+        Args:
+            query (str): The phrase; tokenized like the indexed text.
+            level (str): "sentence" or "paragraph".
+
+        Returns:
+            list: Ids of the matching sentences or paragraphs, in text order.
+        """
+        words = self.tokenize(query)
+        if not words or not len(self.terms):
+            return []
+        # A match is keyed by its sentence and the position of its first word
+        width = int(np.max(self.arrays["sentence_lengths"])) + 1
+        matches = None
+        for offset, word in enumerate(words):
+            term_id = self.term_id(word)
+            if term_id is None:
+                return []
+            sentences, _ = self.postings(term_id, "sentence")
+            start, end = self.arrays["sentence_offsets"][term_id:term_id + 2]
+            position_offsets = np.asarray(self.arrays["position_offsets"][start:end + 1])
+            positions = self.decode_segments(
+                self.arrays["position_gaps"][position_offsets[0]:position_offsets[-1]], position_offsets
+            )
+            keys = np.repeat(sentences, np.diff(position_offsets)) * width + positions - offset
+            keys = keys[positions >= offset]
+            matches = keys if matches is None else np.intersect1d(matches, keys, assume_unique=True)
+
+        indices = np.unique(matches // width)
+        if level == "paragraph":
+            indices = np.unique(self.arrays["sentence_paragraph"][indices])
+        return [self.ids[level][index] for index in indices]
+
+    def bm25(self, query, k=10, level="paragraph"):
+        """
+        Ranks paragraphs or sentences by their BM25 score for a query.
+
+        Args:
+            query (str): The query; tokenized like the indexed text.
+            k (int): Maximum number of hits.
+            level (str): "paragraph" or "sentence".
+
+        Returns:
+            list: (id, score) tuples, best first; only documents with a query word.
+        """
+        lengths = np.asarray(self.arrays[f"{level}_lengths"], dtype=np.float64)
+        if not len(lengths):
+            return []
+        count, average_length = len(lengths), max(lengths.mean(), 1.0)
+        scores = np.zeros(count, dtype=np.float64)
+        for term_id in self.term_ids(self.tokenize(query)):
+            if term_id is None:
+                continue
+            indices, frequencies = self.postings(term_id, level)
+            idf = math.log(1 + (count - len(indices) + 0.5) / (len(indices) + 0.5))
+            norms = frequencies + self.k1 * (1 - self.b + self.b * lengths[indices] / average_length)
+            scores[indices] += idf * frequencies * (self.k1 + 1) / norms
+
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(self.ids[level][index], float(scores[index])) for index in hits]
+
+    def save(self, directory, source_hash=None):
+        """
+        Persists the index: the arrays as .npy, the ids as JSON. As for VectorIndex, the files
+        are written to a temporary directory swapped in for the previous index.
+
+        Args:
+            directory (str): Directory of the index.
+            source_hash (str, optional): Hash of the data the index was built from.
+        """
+        tmp_directory = f"{directory.rstrip(os.sep)}.tmp{os.getpid()}"
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        os.makedirs(tmp_directory)
+        np.save(os.path.join(tmp_directory, "terms.npy"), self.terms)
+        for name, array in self.arrays.items():
+            np.save(os.path.join(tmp_directory, f"{name}.npy"), np.asarray(array))
+        with open(os.path.join(tmp_directory, "ids.json"), "w", encoding="utf-8") as f:
+            json.dump({"paragraph_ids": self.ids["paragraph"], "sentence_ids": self.ids["sentence"]}, f)
+        with open(os.path.join(tmp_directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": self.FORMAT_VERSION,
+                "arrays": sorted(self.arrays),
+                "k1": self.k1,
+                "b": self.b,
+                "source_hash": source_hash,
+            }, f)
+        replace_directory(tmp_directory, directory)
+
+    @staticmethod
+    def source_hash(directory):
+        """
+        Returns:
+            str: Hash of the data a persisted index was built from, or None if there is no
+            (current) index.
+        """
+        meta_path = os.path.join(existing_directory(directory), "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return meta.get("source_hash") if meta.get("version") == InvertedIndex.FORMAT_VERSION else None
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """
+        Loads a persisted index.
+
+        Args:
+            directory (str): Directory of the index.
+            mmap (bool): Memory-map the arrays instead of reading them.
+
+        Returns:
+            InvertedIndex: The loaded index.
+        """
+        directory = existing_directory(directory)
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(directory, "ids.json"), "r", encoding="utf-8") as f:
+            ids = json.load(f)
+        mmap_mode = "r" if mmap else None
+        terms = np.load(os.path.join(directory, "terms.npy"), mmap_mode=mmap_mode)
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in meta["arrays"]
+        }
+        return cls(terms, arrays, ids["paragraph_ids"], ids["sentence_ids"], k1=meta["k1"], b=meta["b"])
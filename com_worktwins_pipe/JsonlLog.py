@@ -0,0 +1,110 @@
+# JsonlLog.py
+
+import os
+import json
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; appends are then only serialized per process
+    fcntl = None
+
+
+class JsonlLog:
+    """
+    Append-only JSONL file that several processes can share.
+
+    Appends are serialized with a file lock, and the entries appended by other processes
+    are picked up by reading the file from the offset read so far. A line cut short by an
+    interrupted append is skipped, and terminated by the next append.
+
+    Not thread-safe: its owner serializes the calls of its threads.
+    """
+    def __init__(self, path, offset=0):
+        """
+        Initializes the JsonlLog.
+
+        Args:
+            path (str): Path of the JSONL file.
+            offset (int, optional): Byte offset up to which the file was already read.
+        """
+        self.path = path
+        self.offset = offset
+        self.partial = False
+        self.file = None
+
+    def refresh(self, apply):
+        """
+        Reads the entries appended since the last read (by this or another process).
+
+        Args:
+            apply (callable): Called with each entry, its byte offset and its length in bytes.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            tail = f.read()
+        # Only complete lines; an append in progress is read on the next refresh
+        complete = tail[:tail.rfind(b"\n") + 1]
+        offset = self.offset
+        for line in complete.splitlines(keepends=True):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                entry = None  # Line cut short by an interrupted append
+            if entry is not None:
+                apply(entry, offset, len(line))
+            offset += len(line)
+        self.offset += len(complete)
+        self.partial = len(tail) > len(complete)
+
+    @contextmanager
+    def appending(self, apply):
+        """
+        Holds the file lock for appending, after reading the entries appended by others.
+
+        Args:
+            apply (callable): Called with each new entry, as in refresh.
+
+        Yields:
+            JsonlLog: This log.
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "ab") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                self.refresh(apply)
+                self.file = f
+                yield self
+            finally:
+                self.file = None
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def append(self, entries):
+        """
+        Appends entries to the log; only called inside appending.
+
+        Args:
+            entries (list): JSON-compatible entries.
+
+        Returns:
+            list: (entry, offset, length) of each appended line, as passed to apply.
+        """
+        lines = [(json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8") for entry in entries]
+        if self.partial:
+            # Terminates the line left by an interrupted append, which is then skipped
+            self.file.write(b"\n")
+            self.partial = False
+        offset = self.file.seek(0, os.SEEK_END)
+        self.file.write(b"".join(lines))
+        self.file.flush()
+
+        appended = []
+        for entry, line in zip(entries, lines):
+            appended.append((entry, offset, len(line)))
+            offset += len(line)
+        self.offset = offset
+        return appended
@@ -1,111 +1,260 @@
 # ParagraphsAndCodeUnifiedPipe.py
 
-import re
 import hashlib
-from hashlib import sha256
 from collections import defaultdict
 from alive_progress import alive_bar
-from pygments.lexers import guess_lexer, ClassNotFound
-import spacy  # For NLP sentence tokenization
 
 from com_worktwins_pipe.Pipe import Pipe
+from com_worktwins_pipe.BlockSegmenter import BlockSegmenter
 from com_worktwins_pipe.WordFrequenciesPipe import WordFrequenciesPipe
+from com_worktwins_pipe.SentenceKeywordExtractor import SentenceKeywordExtractor
 from com_worktwins_languages.Language import Language  # Adjust the import path as necessary
-
-# Load spaCy model
-nlp = spacy.load("en_core_web_sm")
+from com_worktwins_languages.LanguageDetector import LanguageDetector
+from com_worktwins_languages.LanguageMentionCounter import LanguageMentionCounter
 
 class ParagraphsAndCodeUnifiedPipe(Pipe):
     """
     A unified Pipe subclass to extract and interleave paragraphs and source code snippets,
     linking code snippets to the preceding paragraph.
     """
+    # Number of streamed blocks enriched together
+    STREAM_CHUNK_SIZE = 256
+
+    def __init__(self, name, output_dir, pdf_name, dependencies=None, storage=None, metrics=None,
+                 batch_size=64, n_process=1, corpus_statistics=None, max_document_share=0.5, min_corpus_books=10):
+        """
+        Initializes the ParagraphsAndCodeUnifiedPipe.
+
+        Args:
+            name (str): The name of the pipe (e.g., 'ParagraphsAndCodeUnified').
+            output_dir (str): The directory where output files will be saved.
+            pdf_name (str): The base name of the PDF being processed.
+            dependencies (list, optional): List of dependent Pipe instances.
+            storage (PipeStorage, optional): Storage backend of the output. Defaults to JSON.
+            metrics (PipeMetrics, optional): Collects timings of the pipe for the run report.
+            batch_size (int, optional): Number of paragraphs per spaCy batch.
+            n_process (int, optional): Number of processes used by spaCy.
+            corpus_statistics (CorpusStatistics, optional): Library statistics; words occurring in
+                more than max_document_share of its books are not keywords.
+            max_document_share (float, optional): Maximum share of the library's books a keyword occurs in.
+            min_corpus_books (int, optional): Library size from which common words are dropped.
+        """
+        super().__init__(name, output_dir, pdf_name, dependencies, storage, metrics)
+        self.keyword_extractor = SentenceKeywordExtractor(batch_size=batch_size, n_process=n_process)
+        self.corpus_statistics = corpus_statistics
+        self.max_document_share = max_document_share
+        self.min_corpus_books = min_corpus_books
+        self.language_detector = None
+        self.mention_counter = None
+        self.book_mentions = None  # Mentions of the whole book, counted before it is streamed
+
+    def get_config(self):
+        if self.corpus_statistics is None:
+            return {}
+        # The keywords depend on the library only through the words it drops from this book,
+        # so other books re-key the output only when they change those words
+        self.corpus_statistics.refresh()
+        words = [item["word"] for item in self.dependency_output(self.dependencies[0])]
+        return {
+            "max_document_share": self.max_document_share,
+            "min_corpus_books": self.min_corpus_books,
+            "corpus_filter": self.corpus_statistics.filter_key(
+                words, self.max_document_share, self.min_corpus_books
+            ),
+        }
+
     def run(self, input_data):
         """
-        Processes raw text to extract paragraphs and code snippets, interleaving them
-        in the output with appropriate links.
+        Processes the blocks of a book to enrich paragraphs and code snippets, interleaving
+        them in the output with appropriate links.
 
         Args:
-            input_data (str): The raw text extracted from a document.
+            input_data (dict or str): The output of BlockSegmentationPipe ({"blocks": [...]}),
+                or raw text, which is then segmented here.
 
         Returns:
             dict: JSON containing a unified list of paragraphs and code snippets.
         """
-        raw_text = input_data
+        blocks = self.load_blocks(input_data)
+        word_freq_dict, valid_languages = self.load_context()
+
+        self.language_detector.add_mentions(self.count_mentions(blocks))
+
+        unified_report = []
+        last_paragraph = {"id": None, "keywords": []}
+
+        with alive_bar(len(blocks), title="Processing blocks") as bar:
+            for entry in self.process_blocks(blocks, word_freq_dict, valid_languages, last_paragraph):
+                unified_report.append(entry)
+                bar()
+
+        # Additionally, handle inline code snippets
+        for block in blocks:
+            if block["type"] == "inline_code":
+                unified_report.append(self.inline_code_snippet(block, last_paragraph["id"]))
+
+        return {"unified_report": unified_report}
+
+    def stream(self, records):
+        """
+        Streaming mode: consumes the blocks of a book (as streamed by BlockSegmentationPipe)
+        and yields paragraphs and code snippets chunk by chunk. Inline code snippets are
+        yielded at the end, linked to the last paragraph, as in batch mode.
+
+        Args:
+            records (iterable): Blocks of the book, in text order.
+
+        Yields:
+            dict: Enriched paragraphs and code snippets.
+        """
+        word_freq_dict, valid_languages = self.load_context()
+        if self.book_mentions is not None:
+            self.language_detector.add_mentions(self.book_mentions)
+        last_paragraph = {"id": None, "keywords": []}
+        inline_codes = []
+        chunk = []
+
+        for block in records:
+            chunk.append(block)
+            if len(chunk) >= self.STREAM_CHUNK_SIZE:
+                yield from self.process_chunk(chunk, word_freq_dict, valid_languages, last_paragraph, inline_codes)
+                chunk = []
+        yield from self.process_chunk(chunk, word_freq_dict, valid_languages, last_paragraph, inline_codes)
+
+        for block in inline_codes:
+            yield self.inline_code_snippet(block, last_paragraph["id"])
+
+    def process_chunk(self, blocks, word_freq_dict, valid_languages, last_paragraph, inline_codes):
+        """
+        Enriches a chunk of streamed blocks; its inline code is collected in inline_codes.
+        Without the mentions of the whole book, those of the chunk are added to the prior of
+        the detector first.
+        """
+        inline_codes.extend(block for block in blocks if block["type"] == "inline_code")
+        if self.book_mentions is None:
+            self.language_detector.add_mentions(self.count_mentions(blocks))
+        yield from self.process_blocks(blocks, word_freq_dict, valid_languages, last_paragraph)
+
+    @staticmethod
+    def load_blocks(input_data):
+        """
+        Returns:
+            list: The blocks of the input, segmenting it if it is raw text.
+        """
+        if isinstance(input_data, str):
+            return BlockSegmenter().segment(input_data)
+        return input_data["blocks"]
+
+    def count_mentions(self, blocks):
+        """
+        Counts the language mentions in the paragraphs and code of blocks, in one scan.
+        """
+        return self.mention_counter.count(BlockSegmenter.join(blocks))
+
+    def count_book_mentions(self, text):
+        """
+        Counts the language mentions of the whole book before it is streamed, so that every
+        chunk is detected against the same prior as in batch mode.
+
+        Args:
+            text (str): The text of the book.
+        """
+        self.book_mentions = LanguageMentionCounter(Language.load_languages()).count(text)
+
+    def load_context(self):
+        """
+        Loads the book word frequencies and the known programming languages.
 
+        Returns:
+            tuple: (dict of word -> book frequency, set of valid language names).
+        """
         # Access word frequencies from dependencies
         # Assuming the first dependency is WordFrequenciesPipe
         if not self.dependencies:
             raise ValueError("ParagraphsAndCodeUnifiedPipe requires WordFrequenciesPipe as a dependency.")
-        
-        word_frequencies = self.dependencies[0].load_output()
+
+        word_frequencies = self.dependency_output(self.dependencies[0])
         word_freq_dict = {item["word"]: item["book_frequency"] for item in word_frequencies}
+        if self.corpus_statistics is not None:
+            self.corpus_statistics.refresh()
+            word_freq_dict = self.corpus_statistics.filter_common(
+                word_freq_dict, self.max_document_share, self.min_corpus_books
+            )
 
         # Load programming languages
         language_list = Language.load_languages()
         valid_languages = set(language_list.keys())
+        # One detector per book, so its prior is built from the mentions and snippets of this book
+        self.language_detector = LanguageDetector(language_list)
+        self.mention_counter = LanguageMentionCounter(language_list)
 
-        # Regex to detect multi-line code blocks (at least 2 lines of indented code)
-        code_block_pattern = re.compile(r'((?:^(?: {4}|\t).+\n?)+)', re.MULTILINE)
-
-        # Split the text into blocks (paragraphs or code snippets)
-        blocks = []
-        last_index = 0
-        for match in code_block_pattern.finditer(raw_text):
-            start, end = match.span()
-            # Text before the code block
-            if start > last_index:
-                paragraph_text = raw_text[last_index:start].strip()
-                if paragraph_text:
-                    blocks.append({"type": "paragraph", "text": paragraph_text})
-            # The code block
-            code_text = match.group(0).strip('\n')
-            if code_text:
-                blocks.append({"type": "source_code", "text": code_text})
-            last_index = end
-        # Remaining text after the last code block
-        if last_index < len(raw_text):
-            remaining_text = raw_text[last_index:].strip()
-            if remaining_text:
-                blocks.append({"type": "paragraph", "text": remaining_text})
+        return word_freq_dict, valid_languages
 
-        unified_report = []
-        last_paragraph_id = None
-        last_paragraph_keywords = []
+    def process_blocks(self, blocks, word_freq_dict, valid_languages, last_paragraph):
+        """
+        Enriches blocks, linking each code snippet to the preceding paragraph. Entries keep
+        the id, the offsets and the page of their block, so repeated texts get distinct ids.
 
-        with alive_bar(len(blocks), title="Processing blocks") as bar:
-            for block in blocks:
-                if block["type"] == "paragraph":
-                    paragraph = self.process_paragraph(block["text"], word_freq_dict)
-                    unified_report.append(paragraph)
-                    last_paragraph_id = paragraph["id"]
-                    last_paragraph_keywords = paragraph["keywords"]
-                elif block["type"] == "source_code":
-                    code_snippet = self.process_code_snippet(
-                        block["text"], 
-                        valid_languages, 
-                        last_paragraph_id,
-                        last_paragraph_keywords
-                    )
-                    unified_report.append(code_snippet)
-                bar()
+        Args:
+            blocks (list): Blocks returned by BlockSegmenter; inline code blocks are skipped.
+            word_freq_dict (dict): Dictionary of word frequencies.
+            valid_languages (set): Set of valid programming languages.
+            last_paragraph (dict): "id" and "keywords" of the last paragraph seen; updated
+                in place so that the link survives across calls in streaming mode.
 
-        # Additionally, handle inline code snippets (e.g., surrounded by backticks)
-        inline_code_pattern = re.compile(r'`([^`]+)`')
-        inline_codes = inline_code_pattern.findall(raw_text)
-        for code in inline_codes:
-            code_id = hashlib.md5(code.encode("utf-8")).hexdigest()[:8]
-            code_snippet = {
-                "id": code_id,
-                "type": "source_code",
-                "text": code,
-                "programming_language": "unknown",  # Optionally infer language
-                "weight": 0.0,
-                "linked_paragraph_id": last_paragraph_id
-            }
-            unified_report.append(code_snippet)
+        Yields:
+            dict: Enriched paragraph or code snippet.
+        """
+        # Paragraphs are parsed in batches, lazily and in block order
+        paragraph_blocks = [block for block in blocks if block["type"] == "paragraph"]
+        paragraphs = self.keyword_extractor.enrich(
+            (block["text"] for block in paragraph_blocks),
+            word_freq_dict,
+            (block["id"] for block in paragraph_blocks)
+        )
+        for block in blocks:
+            if block["type"] == "paragraph":
+                paragraph = self.locate(next(paragraphs), block)
+                last_paragraph["id"] = paragraph["id"]
+                last_paragraph["keywords"] = paragraph["keywords"]
+                yield paragraph
+            elif block["type"] == "source_code":
+                yield self.locate(self.process_code_snippet(
+                    block["text"],
+                    valid_languages,
+                    last_paragraph["id"],
+                    last_paragraph["keywords"],
+                    code_id=block["id"]
+                ), block)
 
-        return {"unified_report": unified_report}
+    @staticmethod
+    def locate(entry, block):
+        """
+        Adds the [start, end) offsets and the page of its block to an entry.
+        """
+        entry.update({"start": block["start"], "end": block["end"], "page": block["page"]})
+        return entry
+
+    @classmethod
+    def inline_code_snippet(cls, block, linked_paragraph_id):
+        """
+        Builds the entry of an inline code snippet.
+
+        Args:
+            block (dict): The inline code block.
+            linked_paragraph_id (str): ID of the paragraph to link this snippet to.
+
+        Returns:
+            dict: Code snippet data.
+        """
+        return cls.locate({
+            "id": block["id"],
+            "type": "source_code",
+            "text": block["text"],
+            "programming_language": "unknown",  # Optionally infer language
+            "weight": 0.0,
+            "linked_paragraph_id": linked_paragraph_id
+        }, block)
 
     def process_paragraph(self, paragraph_text, word_freq_dict):
         """
@@ -118,38 +267,10 @@ class ParagraphsAndCodeUnifiedPipe(Pipe):
         Returns:
             dict: Enriched paragraph data.
         """
-        paragraph_id = sha256(paragraph_text.encode()).hexdigest()[:8]
-
-        # Tokenize paragraph into sentences
-        doc = nlp(paragraph_text)
-        sentences = []
-        paragraph_keywords = set()
-
-        for sent in doc.sents:
-            sentence_text = sent.text.strip()
-            words = [token.text.lower() for token in nlp(sentence_text) if token.is_alpha and not token.is_stop]
-            keywords = [word for word in words if word in word_freq_dict]
-
-            sentence_hash = f"{paragraph_id}_{sha256(sentence_text.encode()).hexdigest()[:8]}"
-            sentences.append({
-                "id": sentence_hash,
-                "type": "sentence",
-                "text": sentence_text,
-                "keywords": keywords,
-                "weight": 0.0,
-            })
-            paragraph_keywords.update(keywords)
-
-        return {
-            "id": paragraph_id,
-            "type": "paragraph",
-            "text": paragraph_text,
-            "keywords": sorted(paragraph_keywords),
-            "weight": 0.0,
-            "sentences": sentences,
-        }
+        return next(self.keyword_extractor.enrich([paragraph_text], word_freq_dict))
 
-    def process_code_snippet(self, code_text, valid_languages, linked_paragraph_id, linked_paragraph_keywords):
+    def process_code_snippet(self, code_text, valid_languages, linked_paragraph_id, linked_paragraph_keywords,
+                             code_id=None):
         """
         Processes a code snippet: detects programming language and enriches with metadata.
 
@@ -158,16 +279,15 @@ class ParagraphsAndCodeUnifiedPipe(Pipe):
             valid_languages (set): Set of valid programming languages.
             linked_paragraph_id (str): ID of the paragraph to link this code snippet to.
             linked_paragraph_keywords (list): Keywords from the linked paragraph.
+            code_id (str, optional): ID of the snippet (e.g. its block id). Defaults to the hash of its text.
 
         Returns:
             dict: Enriched code snippet data.
         """
         # Attempt to guess the language
-        try:
-            lexer = guess_lexer(code_text)
-            lang = lexer.name if lexer.name in valid_languages else "unknown"
-        except ClassNotFound:
-            lang = "unknown"
+        if self.language_detector is None:
+            self.language_detector = LanguageDetector({language: {} for language in valid_languages})
+        lang = self.language_detector.detect(code_text)
 
         if lang == "unknown" and linked_paragraph_keywords:
             # Infer language from linked paragraph keywords
@@ -186,7 +306,7 @@ class ParagraphsAndCodeUnifiedPipe(Pipe):
                     break
 
         # Generate hash
-        code_id = hashlib.md5(code_text.encode("utf-8")).hexdigest()[:8]
+        code_id = code_id or hashlib.md5(code_text.encode("utf-8")).hexdigest()[:8]
 
         return {
             "id": code_id,
@@ -1,117 +1,131 @@
 import os
-import re
-from hashlib import sha256
 from alive_progress import alive_bar
 from com_worktwins_pipe.Pipe import Pipe  # Import the base Pipe class
-import spacy  # For NLP sentence tokenization
-from com_worktwins_pipe.WordFrequenciesPipe import WordFrequenciesPipe
-
-# Load spaCy model
-nlp = spacy.load("en_core_web_sm")
+from com_worktwins_pipe.BlockSegmenter import BlockSegmenter
+from com_worktwins_pipe.SentenceKeywordExtractor import SentenceKeywordExtractor
 
 class ParagraphsPipe(Pipe):
     """
     A Pipe subclass to split raw text into paragraphs, filter out source code blocks,
     and enrich paragraphs with sentences, keywords, and metadata.
     """
-    def run(self, input_data):
+    def __init__(self, name, output_dir, pdf_name, dependencies=None, storage=None, metrics=None,
+                 batch_size=64, n_process=1, corpus_statistics=None, max_document_share=0.5, min_corpus_books=10):
         """
-        Splits raw text into paragraphs, excludes paragraphs containing source code,
-        and enriches them with metadata.
+        Initializes the ParagraphsPipe.
 
         Args:
-            input_data (dict): Input JSON containing "raw_text" and "book_frequencies".
+            name (str): The name of the pipe (e.g., 'Paragraphs').
+            output_dir (str): The directory where output files will be saved.
+            pdf_name (str): The base name of the PDF being processed.
+            dependencies (list, optional): The WordFrequenciesPipe and the BlockSegmentationPipe
+                of the book, in this order.
+            storage (PipeStorage, optional): Storage backend of the output. Defaults to JSON.
+            metrics (PipeMetrics, optional): Collects timings of the pipe for the run report.
+            batch_size (int, optional): Number of paragraphs per spaCy batch.
+            n_process (int, optional): Number of processes used by spaCy.
+            corpus_statistics (CorpusStatistics, optional): Library statistics; words occurring in
+                more than max_document_share of its books are not keywords.
+            max_document_share (float, optional): Maximum share of the library's books a keyword occurs in.
+            min_corpus_books (int, optional): Library size from which common words are dropped.
+        """
+        super().__init__(name, output_dir, pdf_name, dependencies, storage, metrics)
+        self.keyword_extractor = SentenceKeywordExtractor(batch_size=batch_size, n_process=n_process)
+        self.corpus_statistics = corpus_statistics
+        self.max_document_share = max_document_share
+        self.min_corpus_books = min_corpus_books
+
+    def get_config(self):
+        if self.corpus_statistics is None:
+            return {}
+        # As in ParagraphsAndCodeUnifiedPipe, keyed on the words the library drops from this book
+        self.corpus_statistics.refresh()
+        words = [item["word"] for item in self.dependency_output(self.dependencies[0])]
+        return {
+            "max_document_share": self.max_document_share,
+            "min_corpus_books": self.min_corpus_books,
+            "corpus_filter": self.corpus_statistics.filter_key(
+                words, self.max_document_share, self.min_corpus_books
+            ),
+        }
+
+    def run(self, input_data=None):
+        """
+        Enriches the paragraphs of the book, read from the shared block segmentation (source
+        code blocks are left out), with sentences, keywords, and metadata.
+
+        Args:
+            input_data: Unused; the word frequencies and the blocks are the outputs of the
+                dependencies.
 
         Returns:
             dict: JSON with a list of enriched paragraphs.
         """
-        raw_text = input_data
+        if len(self.dependencies) < 2:
+            raise ValueError("ParagraphsPipe requires WordFrequenciesPipe and BlockSegmentationPipe as dependencies.")
+        wordfreq = self.dependency_output(self.dependencies[0])
+        blocks = self.dependency_output(self.dependencies[1])["blocks"]
 
-        # Split raw text into paragraphs
-        paragraphs = self.split_into_paragraphs(raw_text)
-        wordfreq = WordFrequenciesPipe(name=self.name,output_dir=self.output_dir).execute(input_data=raw_text)
+        paragraphs = self.split_into_paragraphs(None, blocks)
 
         # Enrich paragraphs with keywords, sentences, and metadata
-        enriched_paragraphs = self.process_paragraphs(paragraphs, wordfreq)
+        enriched_paragraphs = self.process_paragraphs(
+            paragraphs, wordfreq, self.keyword_extractor,
+            self.corpus_statistics, self.max_document_share, self.min_corpus_books
+        )
 
         return {"enriched_paragraphs": enriched_paragraphs}
 
     @staticmethod
-    def split_into_paragraphs(raw_text):
+    def split_into_paragraphs(raw_text, blocks=None):
         """
-        Split raw text into paragraphs based on double newline separation and exclude paragraphs containing source code.
+        Split raw text into paragraphs based on double newline separation, leaving out source code.
+        Indented code lines are blocks of their own, so the prose around them in the same
+        paragraph is kept, without the code.
 
         Args:
             raw_text (str): The raw text extracted from a document.
+            blocks (list, optional): The blocks of raw_text, if already segmented by BlockSegmenter.
 
         Returns:
-            list: A list of dictionaries, each representing a paragraph with an ID and text.
+            list: A list of dictionaries, each representing a paragraph with the ID of its block and its text.
         """
-        paragraphs = []
-        code_block_pattern = re.compile(r'((?:^(?: {4}|\t).+\n)+)', re.MULTILINE)  # Detect multi-line code blocks
-
-        for para in raw_text.split("\n\n"):
-            para = para.strip()
-            if para:
-                # Check if the paragraph contains code using the regex
-                if code_block_pattern.search(para):
-                    continue  # Skip paragraphs containing source code
-
-                # Add the paragraph if it's not code
-                paragraph_id = sha256(para.encode()).hexdigest()[:8]
-                paragraphs.append({"id": paragraph_id, "text": para})
+        if blocks is None:
+            blocks = BlockSegmenter().segment(raw_text)
 
-        return paragraphs
+        return [{"id": block["id"], "text": block["text"]} for block in blocks if block["type"] == "paragraph"]
 
     @staticmethod
-    def process_paragraphs(paragraphs, wordfreq):
+    def process_paragraphs(paragraphs, wordfreq, keyword_extractor=None, corpus_statistics=None,
+                           max_document_share=0.5, min_corpus_books=10):
         """
         Process paragraphs into sentences and generate enriched data.
 
         Args:
             paragraphs (list): List of dictionaries containing paragraph IDs and text.
             wordfreq (list): List of dictionaries with word frequencies, each containing "word", "book_frequency", and "english_frequency".
+            keyword_extractor (SentenceKeywordExtractor, optional): Batched spaCy extractor to use.
+            corpus_statistics (CorpusStatistics, optional): Library statistics; words occurring in
+                more than max_document_share of its books are not keywords.
+            max_document_share (float, optional): Maximum share of the library's books a keyword occurs in.
+            min_corpus_books (int, optional): Library size from which common words are dropped.
 
         Returns:
             list: Enriched paragraphs with sentences, keywords, and metadata.
         """
         # Convert wordfreq JSON array into a dictionary for fast lookups
         word_freq_dict = {item["word"]: item["book_frequency"] for item in wordfreq}
+        if corpus_statistics is not None:
+            corpus_statistics.refresh()
+            word_freq_dict = corpus_statistics.filter_common(word_freq_dict, max_document_share, min_corpus_books)
+        keyword_extractor = keyword_extractor or SentenceKeywordExtractor()
 
         enriched_paragraphs = []
         with alive_bar(len(paragraphs), title="Processing paragraphs") as bar:
-            for para in paragraphs:
-                paragraph_id = para["id"]
-                paragraph_text = para["text"]
-
-                # Tokenize paragraph into sentences
-                doc = nlp(paragraph_text)
-                sentences = []
-                paragraph_keywords = set()
-
-                for sent in doc.sents:
-                    sentence_text = sent.text.strip()
-                    words = [token.text.lower() for token in nlp(sentence_text) if token.is_alpha and not token.is_stop]
-                    keywords = [word for word in words if word in word_freq_dict]
-
-                    sentence_hash = f"{paragraph_id}_{sha256(sentence_text.encode()).hexdigest()[:8]}"
-                    sentences.append({
-                        "id": sentence_hash,
-                        "type": "sentence",
-                        "text": sentence_text,
-                        "keywords": keywords,
-                        "weight": 0.0,
-                    })
-                    paragraph_keywords.update(keywords)
-
-                enriched_paragraphs.append({
-                    "id": paragraph_id,
-                    "type": "paragraph",
-                    "text": paragraph_text,
-                    "keywords": sorted(paragraph_keywords),
-                    "weight": 0.0,
-                    "sentences": sentences,
-                })
+            for enriched_paragraph in keyword_extractor.enrich(
+                (para["text"] for para in paragraphs), word_freq_dict, (para["id"] for para in paragraphs)
+            ):
+                enriched_paragraphs.append(enriched_paragraph)
                 bar()
 
         return enriched_paragraphs
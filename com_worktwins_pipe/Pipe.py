@@ -1,13 +1,19 @@
 # Pipe.py
 
 import os
-import json
+import inspect
+from contextlib import nullcontext
+from com_worktwins_pipe.PipeCache import PipeCache
+from com_worktwins_pipe.PipeStorage import JSONStorage
 
 class Pipe:
     """
     Base class for processing steps (pipes) in the pipeline.
     """
-    def __init__(self, name, output_dir, pdf_name, dependencies=None):
+    # Bump in a subclass to invalidate its cached outputs when its logic changes
+    version = "1"
+
+    def __init__(self, name, output_dir, pdf_name, dependencies=None, storage=None, metrics=None):
         """
         Initializes the Pipe.
 
@@ -16,39 +22,248 @@ class Pipe:
             output_dir (str): The directory where output files will be saved.
             pdf_name (str): The base name of the PDF being processed.
             dependencies (list, optional): List of dependent Pipe instances.
+            storage (PipeStorage, optional): Storage backend of the output. Defaults to JSON.
+            metrics (PipeMetrics, optional): Collects timings of the pipe for the run report.
         """
         self.name = name
         self.output_dir = output_dir
         self.pdf_name = pdf_name
         self.dependencies = dependencies or []  # List of dependent pipes
-        self.output_file = os.path.join(
-            output_dir, f"{self.pdf_name}-{self.name}.json"
-        )
+        self.storage = storage or JSONStorage()
+        self.output_file = self.storage.path(output_dir, self.pdf_name, self.name)
+        self.cache = PipeCache(output_dir, pdf_name)
+        self.context = None  # PipelineContext of the current run, if any
+        self.metrics = metrics
 
-    def execute(self, input_data=None):
+    def execute(self, input_data=None, context=None):
         """
         Executes the pipe, ensuring dependencies are resolved first.
 
         Args:
             input_data: The input data for the pipe.
+            context (PipelineContext, optional): Keeps outputs in memory for downstream pipes.
 
         Returns:
             dict: The output data from the pipe.
         """
-        # Execute dependencies first
         for dependency in self.dependencies:
-            dependency.execute()
+            dependency.resolve(context)
+
+        return self.execute_node(input_data, context)
+
+    def resolve(self, context=None):
+        """
+        Brings the output of the pipe up to date when it is used as a dependency, without an
+        input of its own: its dependencies are resolved first, then a recorded output is
+        reused if its key still matches, else the pipe runs again on the input it was
+        recorded with when that input was empty.
+
+        Args:
+            context (PipelineContext, optional): Keeps outputs in memory for downstream pipes.
 
-        # Run the current pipe
-        if not os.path.exists(self.output_file):  # Skip if already executed
-            print(f"Executing pipe: {self.name}")
+        Raises:
+            ValueError: If the output is stale and the pipe needs an input to run again.
+        """
+        if context is not None and context.has(self.name):
+            return
+        for dependency in self.dependencies:
+            dependency.resolve(context)
+
+        entry = self.cache.get(self.name)
+        if entry and entry.get("input_hash") is not None:
+            if self.cache.is_fresh(self.name, self.combine_key(entry["input_hash"]), self.output_file):
+                return
+            if entry["input_hash"] != PipeCache.hash_data(None):
+                raise ValueError(
+                    f"The output of pipe {self.name} is stale and the pipe needs its input; "
+                    f"execute it first or run the pipeline with PipelineRunner."
+                )
+        elif entry:
+            raise ValueError(f"The output of pipe {self.name} has no recorded input; execute it first.")
+        self.execute_node(context=context)
+
+    def execute_node(self, input_data=None, context=None):
+        """
+        Executes only this pipe, assuming its dependencies have already been resolved.
+        Used by PipelineRunner, which schedules the dependencies itself.
+
+        Args:
+            input_data: The input data for the pipe.
+            context (PipelineContext, optional): When given, the output is handed over in
+                memory and saved in the background instead of being read back from disk.
+
+        Returns:
+            dict: The output data from the pipe.
+        """
+        self.context = context
+        if context is not None and context.has(self.name):
+            return context.get(self.name)
+
+        with self.measure("cache_check"):
+            input_hash = PipeCache.hash_data(input_data)
+            cache_key = self.combine_key(input_hash)
+            is_fresh = self.cache.is_fresh(self.name, cache_key, self.output_file)
+        if self.metrics is not None:
+            self.metrics.record_cache(self.name, is_fresh)
+
+        if is_fresh:
+            print(f"Skipping pipe {self.name}; output is up to date.")
+            with self.measure("load"):
+                output_data = self.load_output()
+            if context is not None:
+                context.put(self.name, output_data, self.cache.get(self.name)["output_hash"])
+            return output_data
+
+        print(f"Executing pipe: {self.name}")
+        with self.measure("run") as record:
             output_data = self.run(input_data)
+            record["items"] = self.count_items(output_data)
+        output_hash = PipeCache.hash_data(output_data)
+        if context is not None:
+            context.put(self.name, output_data, output_hash)
+            context.persist(self, output_data, cache_key, output_hash, input_hash)
+            return output_data
+
+        with self.measure("save"):
             self.save_output(output_data)
-        else:
-            print(f"Skipping pipe {self.name}; output already exists.")
+            self.cache.record(self.name, cache_key, output_hash, self.output_file, input_hash)
 
         # Load and return the output data
-        return self.load_output()
+        with self.measure("load"):
+            return self.load_output()
+
+    def measure(self, phase, detail=None):
+        """
+        Measures a phase of the pipe with its metrics collector, if any.
+
+        Args:
+            phase (str): What is measured, e.g. "run", "load" or "save".
+            detail (str, optional): Extra information, e.g. a dependency name.
+
+        Returns:
+            A context manager yielding the record being filled.
+        """
+        if self.metrics is None:
+            return nullcontext({})
+        return self.metrics.measure(self.name, phase, detail)
+
+    @staticmethod
+    def count_items(output_data):
+        """
+        Number of items in an output, for throughput reporting: the length of the output
+        if it is a list, else the length of its first list or dict value.
+
+        Args:
+            output_data: The output data of the pipe.
+
+        Returns:
+            int: The number of items, or None if unknown.
+        """
+        if isinstance(output_data, list):
+            return len(output_data)
+        if isinstance(output_data, dict):
+            for value in output_data.values():
+                if isinstance(value, (list, dict)):
+                    return len(value)
+        return None
+
+    def dependency_output(self, dependency):
+        """
+        Returns the output of a dependency, from memory when the pipeline context holds it.
+
+        Args:
+            dependency (Pipe): One of the dependencies of this pipe.
+
+        Returns:
+            dict: The output data of the dependency.
+        """
+        if self.context is not None and self.context.has(dependency.name):
+            return self.context.get(dependency.name)
+        with self.measure("dependency_load", dependency.name):
+            return dependency.load_output()
+
+    def get_config(self):
+        """
+        Parameters that influence the output of the pipe (model names, thresholds...).
+        Child classes override this so that changing a parameter invalidates the cache.
+
+        Returns:
+            dict: JSON-compatible configuration.
+        """
+        return {}
+
+    def fingerprint(self):
+        """
+        Fingerprint of the pipe implementation: class, version, configuration and source code.
+
+        Returns:
+            str: Hex sha256 digest.
+        """
+        try:
+            source = inspect.getsource(type(self))
+        except (OSError, TypeError):
+            source = None
+        return PipeCache.hash_data({
+            "class": type(self).__name__,
+            "version": self.version,
+            "config": self.get_config(),
+            "source": source,
+        })
+
+    def output_hash(self):
+        """
+        Hash of the last recorded output of the pipe.
+
+        Returns:
+            str: Hex sha256 digest, or None if the pipe has no recorded output.
+        """
+        if self.context is not None and self.name in self.context.output_hashes:
+            return self.context.output_hashes[self.name]
+        entry = self.cache.get(self.name)
+        return entry["output_hash"] if entry else None
+
+    def cache_key(self, input_data):
+        """
+        Cache key of the output for the given input: a hash of the input data, the
+        dependency output hashes and the pipe fingerprint. A change anywhere upstream
+        changes the key of every downstream pipe whose input actually changed.
+
+        Args:
+            input_data: The input data for the pipe.
+
+        Returns:
+            str: Hex sha256 digest.
+        """
+        return self.combine_key(PipeCache.hash_data(input_data))
+
+    def combine_key(self, input_hash):
+        """
+        Cache key of the output for an already hashed input.
+
+        Args:
+            input_hash (str): Hash of the input data.
+
+        Returns:
+            str: Hex sha256 digest.
+        """
+        return PipeCache.combine(
+            input_hash,
+            *[dependency.output_hash() for dependency in self.dependencies],
+            self.fingerprint(),
+        )
+
+    def is_stale(self, input_data=None):
+        """
+        Checks whether the saved output is missing or was produced from different inputs,
+        dependencies or pipe code.
+
+        Args:
+            input_data: The input data for the pipe.
+
+        Returns:
+            bool: True if the pipe would run again.
+        """
+        return not self.cache.is_fresh(self.name, self.cache_key(input_data), self.output_file)
 
     def run(self, input_data):
         """
@@ -62,26 +277,53 @@ class Pipe:
         """
         raise NotImplementedError("The run method must be implemented by child classes.")
 
+    def stream(self, records):
+        """
+        Streaming counterpart of run: consumes an iterator of records (pages, blocks,
+        paragraphs...) and yields output records as soon as they are ready.
+        Child classes that support the streaming mode override this.
+
+        Args:
+            records (iterable): The input records.
+
+        Raises:
+            NotImplementedError: If the pipe does not support streaming.
+        """
+        raise NotImplementedError(f"The pipe {self.name} does not support streaming.")
+
     def save_output(self, data):
         """
-        Saves the output data to a JSON file.
+        Saves the output data with the storage backend of the pipe.
 
         Args:
             data (dict): The data to save.
         """
         os.makedirs(self.output_dir, exist_ok=True)
-        with open(self.output_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
+        self.storage.save(data, self.output_file)
 
     def load_output(self):
         """
-        Loads the output data from the JSON file.
+        Loads the output data with the storage backend of the pipe.
 
         Returns:
             dict: The loaded data.
         """
-        with open(self.output_file, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return self.storage.load(self.output_file)
+
+    def export_json(self, output_path=None):
+        """
+        Exports the saved output as an indented JSON file, whatever the storage backend.
+
+        Args:
+            output_path (str, optional): Destination path. Defaults to {pdf_name}-{name}.json.
+
+        Returns:
+            str: The path of the exported file.
+        """
+        json_storage = JSONStorage()
+        output_path = output_path or json_storage.path(self.output_dir, self.pdf_name, self.name)
+        json_storage.save(self.load_output(), output_path)
+        return output_path
 
     def save_to_txt(self, data, output_path):
         """
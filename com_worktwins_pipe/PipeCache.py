@@ -0,0 +1,128 @@
+# PipeCache.py
+
+import os
+import json
+import threading
+from hashlib import sha256
+
+
+def hash_default(obj):
+    """
+    json.dumps fallback used for hashing: arrays are reduced to a digest of their raw bytes
+    (str() would truncate large numpy arrays).
+    """
+    if hasattr(obj, "tobytes") and hasattr(obj, "dtype"):
+        return f"{obj.dtype}{tuple(obj.shape)}:{sha256(obj.tobytes()).hexdigest()}"
+    return str(obj)
+
+
+class PipeCache:
+    """
+    Content-addressed manifest of the pipe outputs of one book.
+
+    Each entry records the cache key a pipe output was produced with (a hash of the input
+    data, the dependency output hashes and the pipe fingerprint) together with the hash of
+    the output itself, so that downstream pipes can chain their keys on it.
+    """
+    _locks = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, output_dir, pdf_name):
+        """
+        Initializes the PipeCache.
+
+        Args:
+            output_dir (str): The directory where the pipe outputs are saved.
+            pdf_name (str): The base name of the PDF being processed.
+        """
+        self.output_dir = output_dir
+        self.manifest_file = os.path.join(output_dir, f"{pdf_name}-manifest.json")
+        with PipeCache._locks_guard:
+            self.lock = PipeCache._locks.setdefault(self.manifest_file, threading.Lock())
+
+    @staticmethod
+    def hash_data(data):
+        """
+        Hashes any JSON-compatible data (or raw text) deterministically.
+
+        Args:
+            data: The data to hash.
+
+        Returns:
+            str: Hex sha256 digest.
+        """
+        if isinstance(data, bytes):
+            return sha256(data).hexdigest()
+        if isinstance(data, str):
+            return sha256(data.encode("utf-8")).hexdigest()
+        encoded = json.dumps(data, sort_keys=True, ensure_ascii=False, default=hash_default)
+        return sha256(encoded.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def combine(*parts):
+        """
+        Combines several hashes (or None for missing parts) into a single key.
+
+        Returns:
+            str: Hex sha256 digest.
+        """
+        return sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+    def load_manifest(self):
+        """
+        Loads the manifest from disk.
+
+        Returns:
+            dict: Pipe name -> manifest entry.
+        """
+        if not os.path.exists(self.manifest_file):
+            return {}
+        try:
+            with open(self.manifest_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            print(f"Ignoring corrupt manifest {self.manifest_file}.")
+            return {}
+
+    def get(self, pipe_name):
+        """
+        Returns the manifest entry of a pipe, or None if it was never recorded.
+        """
+        with self.lock:
+            return self.load_manifest().get(pipe_name)
+
+    def record(self, pipe_name, cache_key, output_hash, output_file, input_hash=None):
+        """
+        Records a freshly saved pipe output in the manifest.
+
+        Args:
+            pipe_name (str): The name of the pipe.
+            cache_key (str): The key the output was produced with.
+            output_hash (str): Hash of the output data.
+            output_file (str): Path of the saved output.
+            input_hash (str, optional): Hash of the input data the output was produced from,
+                so that the key can be checked again when the pipe is reused as a dependency.
+        """
+        with self.lock:
+            manifest = self.load_manifest()
+            manifest[pipe_name] = {
+                "cache_key": cache_key,
+                "input_hash": input_hash,
+                "output_hash": output_hash,
+                "output_file": os.path.basename(output_file),
+            }
+            os.makedirs(self.output_dir, exist_ok=True)
+            tmp_file = f"{self.manifest_file}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=4)
+            os.replace(tmp_file, self.manifest_file)
+
+    def is_fresh(self, pipe_name, cache_key, output_file):
+        """
+        Checks whether a cached output was produced with the given key and still exists.
+
+        Returns:
+            bool: True if the output can be reused.
+        """
+        entry = self.get(pipe_name)
+        return bool(entry) and entry["cache_key"] == cache_key and os.path.exists(output_file)
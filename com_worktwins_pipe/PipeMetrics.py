@@ -0,0 +1,183 @@
+# PipeMetrics.py
+
+import os
+import csv
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+
+class PipeMetrics:
+    """
+    Collects per-stage instrumentation for a pipeline run: wall time, CPU time, peak RSS,
+    items processed, throughput and cache hits/misses, and writes them as a run report.
+    Optionally captures a cProfile or pyinstrument profile of each stage run.
+    """
+    CSV_FIELDS = [
+        "book", "stage", "phase", "detail", "cache", "started_at", "wall_time", "cpu_time",
+        "process_cpu_time", "peak_rss_mb", "items", "throughput",
+    ]
+
+    def __init__(self, book=None, profile=None, profile_dir=None):
+        """
+        Initializes the PipeMetrics.
+
+        Args:
+            book (str, optional): Name of the book the run processes.
+            profile (str, optional): None, "cprofile" or "pyinstrument" (if installed).
+            profile_dir (str, optional): Directory where the profiles are written.
+        """
+        if profile not in (None, "cprofile", "pyinstrument"):
+            raise ValueError(f"Unknown profiler '{profile}'. Use 'cprofile' or 'pyinstrument'.")
+        self.book = book
+        self.profile = profile
+        self.profile_dir = profile_dir or "."
+        self.records = []
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def peak_rss_mb():
+        """
+        Peak resident set size of the process, in megabytes (None where unsupported).
+        """
+        if resource is None:
+            return None
+        # ru_maxrss is in kilobytes on Linux
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    def add(self, record):
+        with self.lock:
+            self.records.append(record)
+
+    def record_cache(self, stage, hit):
+        """
+        Records a cache hit or miss for a stage.
+
+        Args:
+            stage (str): The name of the pipe.
+            hit (bool): Whether the cached output was reused.
+        """
+        self.add({
+            "book": self.book,
+            "stage": stage,
+            "phase": "cache",
+            "cache": "hit" if hit else "miss",
+            "started_at": time.time(),
+        })
+
+    @contextmanager
+    def measure(self, stage, phase, detail=None):
+        """
+        Measures a block of work. The caller may set record["items"] inside the block to
+        get the throughput computed.
+
+        Args:
+            stage (str): The name of the pipe (or step) being measured.
+            phase (str): What is measured, e.g. "run", "load", "save" or "dependency_load".
+            detail (str, optional): Extra information, e.g. the dependency name.
+
+        Yields:
+            dict: The record being filled.
+        """
+        record = {"book": self.book, "stage": stage, "phase": phase, "detail": detail, "started_at": time.time()}
+        profiler = self.start_profiler() if phase == "run" else None
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        process_cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_time"] = time.perf_counter() - wall_start
+            record["cpu_time"] = time.thread_time() - cpu_start
+            record["process_cpu_time"] = time.process_time() - process_cpu_start
+            record["peak_rss_mb"] = self.peak_rss_mb()
+            items = record.get("items")
+            if items is not None and record["wall_time"] > 0:
+                record["throughput"] = items / record["wall_time"]
+            if profiler is not None:
+                self.stop_profiler(profiler, stage)
+            self.add(record)
+
+    def start_profiler(self):
+        if self.profile == "cprofile":
+            import cProfile
+
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as e:
+                # Only one cProfile can be active at a time on recent Python versions
+                print(f"Profiling skipped: {e}")
+                return None
+            return profiler
+        if self.profile == "pyinstrument":
+            from pyinstrument import Profiler
+
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+        return None
+
+    def stop_profiler(self, profiler, stage):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        base_path = os.path.join(self.profile_dir, f"{self.book}-{stage}")
+        if self.profile == "cprofile":
+            profiler.disable()
+            profiler.dump_stats(f"{base_path}.prof")
+        else:
+            profiler.stop()
+            with open(f"{base_path}.html", "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+
+    def summary(self):
+        """
+        Aggregates the records per stage.
+
+        Returns:
+            dict: Stage name -> totals of wall time, CPU time, items, cache hits and misses.
+        """
+        stages = {}
+        with self.lock:
+            records = list(self.records)
+        for record in records:
+            stage = stages.setdefault(record["stage"], {
+                "wall_time": 0.0, "cpu_time": 0.0, "items": None,
+                "cache_hits": 0, "cache_misses": 0, "phases": {},
+            })
+            if record["phase"] == "cache":
+                stage["cache_hits" if record["cache"] == "hit" else "cache_misses"] += 1
+                continue
+            stage["wall_time"] += record["wall_time"]
+            stage["cpu_time"] += record["cpu_time"]
+            stage["phases"][record["phase"]] = stage["phases"].get(record["phase"], 0.0) + record["wall_time"]
+            if record["phase"] == "run" and record.get("items") is not None:
+                stage["items"] = (stage["items"] or 0) + record["items"]
+        return stages
+
+    def write_json(self, path):
+        """
+        Writes the run report (records and per-stage summary) as JSON.
+        """
+        with self.lock:
+            records = list(self.records)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"book": self.book, "stages": self.summary(), "records": records}, f, indent=4)
+        return path
+
+    def write_csv(self, path):
+        """
+        Writes the raw records of the run report as CSV.
+        """
+        with self.lock:
+            records = list(self.records)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=self.CSV_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(records)
+        return path
@@ -0,0 +1,209 @@
+# PipeStorage.py
+
+import os
+import json
+import shutil
+
+
+def to_json_compatible(obj):
+    """
+    json.dump fallback for array types (numpy arrays, memmaps, torch tensors).
+
+    Args:
+        obj: The object json could not serialize.
+
+    Returns:
+        list: The array as nested lists.
+    """
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def replace_directory(tmp_path, path):
+    """
+    Swaps a completely written directory in for path.
+
+    The previous directory is first renamed aside (to "<path>.old") and only deleted once
+    the new one is in place, so there is always a complete directory at path or, if the
+    process stops between the two renames, at "<path>.old" (see existing_directory).
+    Readers that memory-mapped the previous files keep their mappings.
+
+    Args:
+        tmp_path (str): The new directory, on the same filesystem as path.
+        path (str): The directory to replace.
+    """
+    old_path = f"{path}.old"
+    if os.path.exists(path):
+        shutil.rmtree(old_path, ignore_errors=True)
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def existing_directory(path):
+    """
+    Returns:
+        str: path, or the previous directory left aside by an interrupted replace_directory.
+    """
+    old_path = f"{path}.old"
+    if not os.path.exists(path) and os.path.exists(old_path):
+        return old_path
+    return path
+
+
+class PipeStorage:
+    """
+    Base class for the storage backends of pipe outputs.
+    """
+    extension = ""
+
+    def path(self, output_dir, pdf_name, name):
+        """
+        Path of the output of a pipe in this storage format.
+
+        Args:
+            output_dir (str): The directory where output files are saved.
+            pdf_name (str): The base name of the PDF being processed.
+            name (str): The name of the pipe.
+
+        Returns:
+            str: The output path.
+        """
+        return os.path.join(output_dir, f"{pdf_name}-{name}{self.extension}")
+
+    def save(self, data, path):
+        raise NotImplementedError("The save method must be implemented by child classes.")
+
+    def load(self, path):
+        raise NotImplementedError("The load method must be implemented by child classes.")
+
+
+class JSONStorage(PipeStorage):
+    """
+    Indented JSON files. The default backend, and the export format of the other backends.
+    """
+    extension = ".json"
+
+    def __init__(self, indent=4):
+        self.indent = indent
+
+    def save(self, data, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=self.indent, default=to_json_compatible)
+
+    def load(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+class NumpyStorage(PipeStorage):
+    """
+    A directory holding a compact JSON skeleton plus .npy arrays loaded as memory maps.
+
+    Every value stored under one of `array_fields` (e.g. the "embedding" of each semantic
+    tree node) is stacked into a single `<field>.npy` matrix and replaced in the skeleton by
+    its row number. Any other numpy array is saved as its own .npy file. On load, the rows
+    are restored as views into the memory-mapped matrix, so nothing is copied into lists.
+    """
+    extension = ".arrays"
+
+    def __init__(self, array_fields=("embedding",), dtype="float32", mmap=True):
+        """
+        Initializes the NumpyStorage.
+
+        Args:
+            array_fields (tuple): Keys whose vector values are stacked into one matrix each.
+            dtype (str): Dtype of the stacked matrices.
+            mmap (bool): Memory-map the arrays on load instead of reading them into memory.
+        """
+        self.array_fields = tuple(array_fields)
+        self.dtype = dtype
+        self.mmap = mmap
+
+    def save(self, data, path):
+        import numpy as np
+
+        rows = {field: [] for field in self.array_fields}
+        arrays = {}
+
+        def strip(obj, key_path):
+            if isinstance(obj, dict):
+                stripped = {}
+                for key, value in obj.items():
+                    if key in rows and value is not None and not isinstance(value, (dict, str)):
+                        rows[key].append(np.asarray(value, dtype=self.dtype).ravel())
+                        stripped[key] = {"__row__": len(rows[key]) - 1}
+                    elif isinstance(value, np.ndarray):
+                        array_name = "-".join(key_path + [str(key)])
+                        arrays[array_name] = value
+                        stripped[key] = {"__array__": array_name}
+                    else:
+                        stripped[key] = strip(value, key_path + [str(key)])
+                return stripped
+            if isinstance(obj, list):
+                return [strip(item, key_path) for item in obj]
+            return obj
+
+        skeleton = strip(data, [])
+
+        # Write into a temporary directory and swap it in, so readers never see half an output
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for field, field_rows in rows.items():
+            if field_rows:
+                if len({row.shape for row in field_rows}) > 1:
+                    raise ValueError(f"Values of '{field}' have different lengths and cannot be stacked.")
+                np.save(os.path.join(tmp_path, f"{field}.npy"), np.stack(field_rows))
+        for array_name, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"{array_name}.npy"), array)
+        with open(os.path.join(tmp_path, "data.json"), "w", encoding="utf-8") as f:
+            json.dump(skeleton, f, separators=(",", ":"), default=to_json_compatible)
+
+        replace_directory(tmp_path, path)
+
+    def load(self, path):
+        import numpy as np
+
+        mmap_mode = "r" if self.mmap else None
+        path = existing_directory(path)
+        loaded = {}
+
+        def array(name):
+            if name not in loaded:
+                loaded[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            return loaded[name]
+
+        def restore(obj, key=None):
+            if isinstance(obj, dict):
+                if key in self.array_fields and set(obj) == {"__row__"}:
+                    return array(key)[obj["__row__"]]
+                if set(obj) == {"__array__"}:
+                    return array(obj["__array__"])
+                return {k: restore(v, k) for k, v in obj.items()}
+            if isinstance(obj, list):
+                return [restore(item) for item in obj]
+            return obj
+
+        with open(os.path.join(path, "data.json"), "r", encoding="utf-8") as f:
+            return restore(json.load(f))
+
+
+class ParquetStorage(PipeStorage):
+    """
+    Parquet files for tabular outputs (a list of flat records, e.g. word frequencies).
+    Requires pyarrow.
+    """
+    extension = ".parquet"
+
+    def save(self, data, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        pq.write_table(pa.Table.from_pylist(data), path)
+
+    def load(self, path):
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path, memory_map=True).to_pylist()
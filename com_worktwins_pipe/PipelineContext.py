@@ -0,0 +1,116 @@
+# PipelineContext.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class PipelineContext:
+    """
+    Shared state of one pipeline run.
+
+    Pipe outputs are handed to downstream pipes in memory instead of being read back from
+    disk, persisted by a background writer, and released as soon as every consumer is done.
+    Consumers must treat the outputs as read-only, since they may still be serialized.
+    """
+    def __init__(self, persist_workers=1):
+        """
+        Initializes the PipelineContext.
+
+        Args:
+            persist_workers (int, optional): Number of background threads saving outputs.
+        """
+        self.results = {}
+        self.output_hashes = {}
+        self.consumers = {}
+        self.lock = threading.Lock()
+        self.writer = ThreadPoolExecutor(max_workers=persist_workers)
+        self.pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def set_consumers(self, name, count):
+        """
+        Sets how many consumers still need the output of a pipe.
+
+        Args:
+            name (str): The name of the pipe.
+            count (int): Number of consumers (downstream pipes, plus the caller for targets).
+        """
+        with self.lock:
+            self.consumers[name] = count
+
+    def has(self, name):
+        with self.lock:
+            return name in self.results
+
+    def get(self, name):
+        with self.lock:
+            return self.results[name]
+
+    def put(self, name, data, output_hash=None):
+        """
+        Keeps the output of a pipe in memory.
+
+        Args:
+            name (str): The name of the pipe.
+            data: The output data.
+            output_hash (str, optional): Hash of the output, used by downstream cache keys.
+        """
+        with self.lock:
+            self.results[name] = data
+            if output_hash is not None:
+                self.output_hashes[name] = output_hash
+
+    def release(self, name):
+        """
+        Signals that one consumer is done with the output of a pipe. The output is dropped
+        from memory once no consumer needs it anymore.
+
+        Args:
+            name (str): The name of the pipe.
+        """
+        with self.lock:
+            remaining = self.consumers.get(name, 0) - 1
+            self.consumers[name] = remaining
+            if remaining <= 0:
+                self.results.pop(name, None)
+
+    def persist(self, pipe, data, cache_key, output_hash, input_hash=None):
+        """
+        Saves the output of a pipe in the background and records it in the cache manifest
+        once written.
+
+        Args:
+            pipe (Pipe): The pipe that produced the data.
+            data: The output data.
+            cache_key (str): The key the output was produced with.
+            output_hash (str): Hash of the output data.
+            input_hash (str, optional): Hash of the input data the output was produced from.
+        """
+        def save():
+            with pipe.measure("save"):
+                pipe.save_output(data)
+                pipe.cache.record(pipe.name, cache_key, output_hash, pipe.output_file, input_hash)
+
+        future = self.writer.submit(save)
+        with self.lock:
+            self.pending.append(future)
+
+    def close(self):
+        """
+        Waits for the pending background saves and stops the writer.
+
+        Raises:
+            Exception: The first error raised by a background save.
+        """
+        with self.lock:
+            pending = list(self.pending)
+            self.pending.clear()
+        wait(pending)
+        self.writer.shutdown(wait=True)
+        for future in pending:
+            future.result()
@@ -0,0 +1,161 @@
+# PipelineRunner.py
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from com_worktwins_pipe.PipelineContext import PipelineContext
+
+
+def _execute_pipe(pipe, input_data, context):
+    """
+    Executes a single pipe node. Kept at module level so it can be pickled
+    when the runner is used with a ProcessPoolExecutor.
+    """
+    return pipe.execute_node(input_data, context)
+
+
+class PipelineRunner:
+    """
+    Runs pipes as a DAG built from their dependency lists.
+
+    Every pipe reachable from the given pipes is executed exactly once, and pipes
+    whose dependencies are already resolved run concurrently in an executor pool.
+    """
+    def __init__(self, pipes, max_workers=None, executor_class=ThreadPoolExecutor):
+        """
+        Initializes the PipelineRunner.
+
+        Args:
+            pipes (list): Target Pipe instances. Their dependencies are collected recursively.
+            max_workers (int, optional): Maximum number of pipes executed at the same time.
+            executor_class (type, optional): Executor used to run the pipes. ThreadPoolExecutor
+                suits the model-heavy pipes (torch releases the GIL); a ProcessPoolExecutor
+                can be used when every pipe is picklable.
+        """
+        self.targets = [pipe.name for pipe in pipes]
+        self.pipes, self.graph = self.build_graph(pipes)
+        self.max_workers = max_workers
+        self.executor_class = executor_class
+
+    @staticmethod
+    def build_graph(pipes):
+        """
+        Collects all pipes reachable through the dependency lists and validates the DAG.
+
+        Args:
+            pipes (list): Target Pipe instances.
+
+        Returns:
+            tuple: (dict of pipe name -> Pipe, dict of pipe name -> list of dependency names).
+
+        Raises:
+            ValueError: If two different pipes share a name or the dependencies contain a cycle.
+        """
+        nodes = {}
+        graph = {}
+        stack = list(pipes)
+        while stack:
+            pipe = stack.pop()
+            if pipe.name in nodes:
+                if nodes[pipe.name] is not pipe:
+                    raise ValueError(f"Two different pipes are named '{pipe.name}'.")
+                continue
+            nodes[pipe.name] = pipe
+            graph[pipe.name] = [dependency.name for dependency in pipe.dependencies]
+            stack.extend(pipe.dependencies)
+
+        # Kahn's algorithm, only to reject cycles before anything is scheduled
+        remaining = {name: len(set(dependencies)) for name, dependencies in graph.items()}
+        dependents = PipelineRunner.dependents(graph)
+        ready = [name for name, count in remaining.items() if count == 0]
+        visited = 0
+        while ready:
+            name = ready.pop()
+            visited += 1
+            for dependent in dependents[name]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        if visited != len(graph):
+            cyclic = sorted(name for name, count in remaining.items() if count > 0)
+            raise ValueError(f"Pipe dependencies contain a cycle: {cyclic}")
+
+        return nodes, graph
+
+    @staticmethod
+    def dependents(graph):
+        """
+        Inverts the dependency graph.
+
+        Args:
+            graph (dict): Pipe name -> list of dependency names.
+
+        Returns:
+            dict: Pipe name -> set of names of the pipes that depend on it.
+        """
+        inverted = {name: set() for name in graph}
+        for name, dependencies in graph.items():
+            for dependency in dependencies:
+                inverted[dependency].add(name)
+        return inverted
+
+    def run(self, inputs=None, context=None):
+        """
+        Executes the whole DAG.
+
+        Outputs are handed to downstream pipes in memory through a PipelineContext and saved
+        in the background; intermediate outputs are released once all their dependents ran.
+
+        Args:
+            inputs (dict, optional): Pipe name -> input data. A value may also be a callable
+                receiving the dict of dependency outputs of that pipe (keyed by pipe name),
+                so that a pipe can be fed from the outputs of its dependencies.
+            context (PipelineContext, optional): Context to run in. By default a new one is
+                created and closed (waiting for the background saves) before returning.
+
+        Returns:
+            dict: Target pipe name -> output data.
+        """
+        inputs = inputs or {}
+        owns_context = context is None
+        context = context or PipelineContext()
+        # Pipes in another process cannot share the context; they persist synchronously
+        worker_context = context if issubclass(self.executor_class, ThreadPoolExecutor) else None
+
+        dependents = self.dependents(self.graph)
+        for name in self.graph:
+            context.set_consumers(name, len(dependents[name]) + self.targets.count(name))
+        waiting = {name: set(dependencies) for name, dependencies in self.graph.items()}
+        futures = {}
+
+        try:
+            with self.executor_class(max_workers=self.max_workers) as executor:
+                def submit(name):
+                    input_data = inputs.get(name)
+                    if callable(input_data):
+                        input_data = input_data({
+                            dependency: context.get(dependency) for dependency in self.graph[name]
+                        })
+                    futures[executor.submit(_execute_pipe, self.pipes[name], input_data, worker_context)] = name
+
+                for name in [name for name, dependencies in waiting.items() if not dependencies]:
+                    del waiting[name]
+                    submit(name)
+
+                while futures:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = futures.pop(future)
+                        output_data = future.result()
+                        if not context.has(name):
+                            context.put(name, output_data)
+                        for dependency in set(self.graph[name]):
+                            context.release(dependency)
+                        for dependent in dependents[name]:
+                            waiting[dependent].discard(name)
+                            if not waiting[dependent]:
+                                del waiting[dependent]
+                                submit(dependent)
+
+            return {name: context.get(name) for name in self.targets}
+        finally:
+            if owns_context:
+                context.close()
@@ -3,13 +3,20 @@
 import hashlib
 import json
 import os
-import torch
-from transformers import pipeline
 from alive_progress import alive_bar
 from com_worktwins_pipe.Pipe import Pipe  # Import the updated base Pipe class
+from com_worktwins_pipe.SummarizationEngine import SummarizationEngine
+from com_worktwins_pipe.ExtractiveSummarizer import ExtractiveSummarizer
+from com_worktwins_pipe.WordFrequenciesPipe import WordFrequenciesPipe
 
 class SemanticNormalizationPipe(Pipe):
-    def __init__(self, name, output_dir, pdf_name, dependencies=None):
+    # Number of entries summarized together (deduplicated, sorted and packed by the engine)
+    STREAM_CHUNK_SIZE = 256
+    # "abstractive" summarizes with BART, "fast" keeps the best sentences of each paragraph
+    STRATEGIES = ("abstractive", "fast")
+
+    def __init__(self, name, output_dir, pdf_name, dependencies=None, storage=None, metrics=None,
+                 batch_size=8, summary_cache=None, strategy="abstractive", backend=None):
         """
         Initializes the SemanticNormalizationPipe.
 
@@ -18,10 +25,45 @@ class SemanticNormalizationPipe(Pipe):
             output_dir (str): The directory where output files will be saved.
             pdf_name (str): The base name of the PDF being processed.
             dependencies (list, optional): List of dependent Pipe instances.
+            storage (PipeStorage, optional): Storage backend of the output. Defaults to JSON.
+            metrics (PipeMetrics, optional): Collects timings of the pipe for the run report.
+            batch_size (int, optional): Maximum number of paragraphs per generation call.
+            summary_cache (SummaryCache, optional): Persistent cache of the summaries.
+            strategy (str, optional): "abstractive" or "fast". The fast strategy needs no model;
+                it weights keywords with the output of a WordFrequenciesPipe found among the
+                dependencies (or theirs).
+            backend (TorchBackend or OnnxBackend, optional): Inference backend of the abstractive
+                strategy. Defaults to PyTorch.
+
+        Raises:
+            ValueError: If the strategy is unknown.
         """
-        super().__init__(name, output_dir, pdf_name, dependencies)
-        device = 0 if torch.cuda.is_available() else -1
-        self.bart_model = pipeline("summarization", model="facebook/bart-large-cnn", device=device)
+        super().__init__(name, output_dir, pdf_name, dependencies, storage, metrics)
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown normalization strategy '{strategy}'; expected one of {self.STRATEGIES}.")
+        self.strategy = strategy
+        self.model_name = SummarizationEngine.DEFAULT_MODEL
+        self.max_length = 130
+        self.min_length = 30
+        # Paragraphs already summarized (in this or another book) are read from the cache
+        self.summarization_engine = SummarizationEngine(
+            self.model_name, max_length=self.max_length, min_length=self.min_length,
+            batch_size=batch_size, cache=summary_cache, backend=backend
+        )
+        self.extractive_summarizer = ExtractiveSummarizer()
+        self.keyword_weights = None
+
+    def get_config(self):
+        if self.strategy == "fast":
+            return {"strategy": self.strategy, **self.extractive_summarizer.get_config()}
+        return {
+            "strategy": self.strategy,
+            "model": self.model_name,
+            "max_length": self.max_length,
+            "min_length": self.min_length,
+            "short_texts": "kept",
+            **self.summarization_engine.backend.get_config(),
+        }
 
     def run(self, input_data):
         """
@@ -37,41 +79,123 @@ class SemanticNormalizationPipe(Pipe):
         if not unified_report:
             raise ValueError("Input data must contain 'unified_report'.")
 
+        if self.strategy == "fast":
+            # Scored over the whole book at once, so TF-IDF sees every sentence
+            return {"normalized_paragraphs": self.normalize_entries(unified_report)}
+
         normalized_paragraphs = []
         with alive_bar(len(unified_report), title="Normalizing Semantics") as bar:
-            for entry in unified_report:
-                if entry["type"] == "paragraph":
-                    normalized_entry = self.normalize_paragraph(entry)
-                elif entry["type"] == "source_code":
-                    normalized_entry = self.handle_source_code(entry)
-                else:
-                    # For unknown types, pass them through without changes
-                    normalized_entry = entry
-                normalized_paragraphs.append(normalized_entry)
-                bar()
+            for start in range(0, len(unified_report), self.STREAM_CHUNK_SIZE):
+                chunk = unified_report[start:start + self.STREAM_CHUNK_SIZE]
+                normalized_paragraphs.extend(self.normalize_entries(chunk))
+                bar(len(chunk))
 
         return {"normalized_paragraphs": normalized_paragraphs}
 
-    def normalize_paragraph(self, paragraph):
+    def stream(self, records):
+        """
+        Streaming mode: normalizes the entries of the unified report chunk by chunk. With
+        the fast strategy, TF-IDF statistics are those of the chunk.
+
+        Args:
+            records (iterable): Unified report entries.
+
+        Yields:
+            dict: Normalized entries.
+        """
+        chunk = []
+        for entry in records:
+            chunk.append(entry)
+            if len(chunk) >= self.STREAM_CHUNK_SIZE:
+                yield from self.normalize_entries(chunk)
+                chunk = []
+        yield from self.normalize_entries(chunk)
+
+    def normalize_entries(self, entries):
+        """
+        Normalizes unified report entries, summarizing all their paragraphs in batches.
+
+        Args:
+            entries (list): Paragraph or source code entries.
+
+        Returns:
+            list: The normalized entries, in the order of the input.
+        """
+        paragraphs = [entry for entry in entries if entry["type"] == "paragraph"]
+        summaries = iter(self.summarize_paragraphs(paragraphs))
+        return [
+            self.normalize_paragraph(entry, next(summaries)) if entry["type"] == "paragraph"
+            else self.normalize_entry(entry)
+            for entry in entries
+        ]
+
+    def summarize_paragraphs(self, paragraphs):
+        """
+        Summarizes paragraph entries with the selected strategy.
+
+        Args:
+            paragraphs (list): Paragraph entries.
+
+        Returns:
+            list: One summary per paragraph.
+        """
+        if self.strategy == "fast":
+            return self.extractive_summarizer.summarize(paragraphs, self.load_keyword_weights())
+        return self.summarization_engine.summarize([paragraph["text"] for paragraph in paragraphs])
+
+    def load_keyword_weights(self):
+        """
+        Book-specific keyword weights, from the first WordFrequenciesPipe among the
+        dependencies or their own dependencies.
+
+        Returns:
+            dict: Word -> weight; empty if there is no such pipe.
+        """
+        if self.keyword_weights is None:
+            candidates = self.dependencies + [
+                nested for dependency in self.dependencies for nested in dependency.dependencies
+            ]
+            word_frequencies_pipe = next(
+                (pipe for pipe in candidates if isinstance(pipe, WordFrequenciesPipe)), None
+            )
+            if word_frequencies_pipe is None:
+                self.keyword_weights = {}
+            else:
+                word_frequencies = self.dependency_output(word_frequencies_pipe)
+                self.keyword_weights = ExtractiveSummarizer.keyword_weights(word_frequencies)
+        return self.keyword_weights
+
+    def normalize_entry(self, entry):
+        """
+        Normalizes a single unified report entry according to its type.
+
+        Args:
+            entry (dict): Paragraph or source code entry.
+
+        Returns:
+            dict: The normalized entry.
+        """
+        if entry["type"] == "paragraph":
+            return self.normalize_paragraph(entry)
+        elif entry["type"] == "source_code":
+            return self.handle_source_code(entry)
+        # For unknown types, pass them through without changes
+        return entry
+
+    def normalize_paragraph(self, paragraph, semantics=None):
         """
         Normalize a paragraph entry by summarizing its text.
 
         Args:
             paragraph (dict): Paragraph data.
+            semantics (str, optional): Summary already computed in a batch.
 
         Returns:
             dict: Normalized paragraph with a "semantics" field.
         """
-        try:
-            semantics = self.bart_model(
-                paragraph["text"],
-                max_length=130,
-                min_length=30,
-                do_sample=False
-            )[0]["summary_text"]
-        except Exception as e:
-            print(f"Error normalizing paragraph {paragraph['id']}: {e}")
-            semantics = paragraph["text"]  # Fallback to original text
+        if semantics is None:
+            # Falls back to the original text on failure
+            semantics = self.summarize_paragraphs([paragraph])[0]
 
         return {
             "id": paragraph["id"],
@@ -81,6 +205,8 @@ class SemanticNormalizationPipe(Pipe):
             "keywords": paragraph["keywords"],
             "weight": paragraph["weight"],
             "sentences": paragraph.get("sentences", []),
+            # Position of the paragraph in the book, when the unified report has it
+            **{key: paragraph[key] for key in ("start", "end", "page") if key in paragraph},
         }
 
     def handle_source_code(self, code_snippet):
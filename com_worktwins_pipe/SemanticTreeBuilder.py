@@ -0,0 +1,139 @@
+# SemanticTreeBuilder.py
+
+from hashlib import sha256
+import numpy as np
+from alive_progress import alive_bar
+from com_worktwins_pipe.VectorIndex import VectorIndex
+
+
+class SemanticTreeBuilder:
+    """
+    Builds a multi-level semantic tree from paragraph embeddings.
+
+    Paragraphs are inserted in order. A paragraph becomes a child of the most similar root
+    when their cosine similarity exceeds the first threshold, and then descends into the most
+    similar child as long as the similarity exceeds the threshold of the next level;
+    otherwise it becomes a new root. Embeddings are normalized into one matrix, and the
+    similarities to the roots are computed a block of paragraphs at a time with one matrix
+    product (plus the similarities inside the block, for the roots the block itself creates).
+    """
+    def __init__(self, thresholds=(0.7, 0.8), block_size=256):
+        """
+        Initializes the SemanticTreeBuilder.
+
+        Args:
+            thresholds (tuple): Minimum similarity to join a node, per tree level (roots first).
+            block_size (int): Number of paragraphs compared to the roots with one matrix product.
+        """
+        self.thresholds = tuple(thresholds)
+        self.block_size = block_size
+
+    @staticmethod
+    def make_node(paragraph):
+        semantics = paragraph.get("semantics") or paragraph.get("text", "")
+        return {
+            # The paragraph id when it has one, the hash of its semantics otherwise
+            "id": paragraph.get("id") or sha256(semantics.encode()).hexdigest()[:8],
+            "semantics": semantics,
+            "keywords": paragraph.get("keywords", []),
+            "text": paragraph.get("text", ""),
+            "children": {},
+        }
+
+    def build(self, paragraphs, embeddings):
+        """
+        Builds the tree.
+
+        Args:
+            paragraphs (list): Paragraphs with "semantics" (or "text"), "keywords" and "text".
+            embeddings (np.ndarray): [len(paragraphs), dim] embeddings of the paragraphs.
+
+        Returns:
+            dict: Root node id -> node, each node holding its "children" the same way.
+        """
+        vectors = VectorIndex.normalize(embeddings) if len(paragraphs) else np.zeros((0, 0), np.float32)
+        tree = {}
+        roots = np.empty_like(vectors)
+        root_nodes = []
+        # Paragraph rows of the children of each node, in the order of its "children" dict
+        child_rows = {}
+
+        with alive_bar(len(paragraphs), title="Building Semantic Tree") as bar:
+            for start in range(0, len(paragraphs), self.block_size):
+                block = vectors[start:start + self.block_size]
+                known_roots = len(root_nodes)
+                if known_roots:
+                    root_similarities = block @ roots[:known_roots].T
+                    best_roots = root_similarities.argmax(axis=1)
+                    best_scores = root_similarities[np.arange(len(block)), best_roots]
+                block_similarities = block @ block.T
+                block_roots = []
+
+                for offset in range(len(block)):
+                    row = start + offset
+                    parent, highest = None, 0.0
+                    if known_roots and best_scores[offset] > highest:
+                        parent, highest = best_roots[offset], best_scores[offset]
+                    if block_roots:
+                        # Roots created earlier in this block are not in the matrix product
+                        candidates = block_similarities[offset, [root_offset for root_offset, _ in block_roots]]
+                        best = candidates.argmax()
+                        if candidates[best] > highest:
+                            parent, highest = block_roots[best][1], candidates[best]
+
+                    node = self.make_node(paragraphs[row])
+                    if parent is not None and highest > self.thresholds[0]:
+                        self.insert_child(root_nodes[parent], node, row, vectors, child_rows)
+                    else:
+                        if node["id"] not in tree:
+                            block_roots.append((offset, len(root_nodes)))
+                            roots[len(root_nodes)] = vectors[row]
+                            root_nodes.append(node)
+                            tree[node["id"]] = node
+                        else:
+                            # Same id: the root takes the new paragraph and keeps its children
+                            self.merge_node(tree[node["id"]], node)
+                    bar()
+
+        return tree
+
+    def insert_child(self, parent, node, row, vectors, child_rows):
+        """
+        Descends from a root into the most similar children while they pass the threshold of
+        their level, and adds the node as a child of the last one.
+        """
+        for threshold in self.thresholds[1:]:
+            rows = child_rows.get(id(parent))
+            if not rows:
+                break
+            similarities = vectors[rows] @ vectors[row]
+            best = similarities.argmax()
+            if similarities[best] <= threshold:
+                break
+            parent = list(parent["children"].values())[best]
+
+        rows = child_rows.setdefault(id(parent), [])
+        if node["id"] in parent["children"]:
+            rows[list(parent["children"]).index(node["id"])] = row
+            self.merge_node(parent["children"][node["id"]], node)
+        else:
+            rows.append(row)
+            parent["children"][node["id"]] = node
+
+    @staticmethod
+    def merge_node(existing, node):
+        """
+        Replaces the paragraph of a node by the one of a new node with the same id, keeping
+        the existing children (and their rows in child_rows, keyed by the node object).
+        """
+        existing.update({key: value for key, value in node.items() if key != "children"})
+
+    @staticmethod
+    def paths(tree, prefix=""):
+        """
+        Yields the id and the path ("root/child/...") of every node of a tree.
+        """
+        for node_id, node in tree.items():
+            path = f"{prefix}/{node_id}" if prefix else node_id
+            yield node_id, path
+            yield from SemanticTreeBuilder.paths(node["children"], path)
@@ -1,9 +1,10 @@
 import os
-from hashlib import sha256
-from alive_progress import alive_bar
 import torch
+import numpy as np
 from com_worktwins_pipe.Pipe import Pipe  # Import the base Pipe class
-from transformers import AutoTokenizer, AutoModel
+from com_worktwins_pipe.PipeStorage import NumpyStorage
+from com_worktwins_pipe.EmbeddingEngine import EmbeddingEngine
+from com_worktwins_pipe.SemanticTreeBuilder import SemanticTreeBuilder
 import sys
 import logging
 
@@ -17,11 +18,19 @@ class SemanticTreePipe(Pipe):
     """
 
 
-    def __init__(self, name, output_dir, pdf_name, dependencies=None):
-        super().__init__(name, output_dir, pdf_name, dependencies)
-        self.model_name = "sentence-transformers/all-MiniLM-L6-v2"
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        self.model = AutoModel.from_pretrained(self.model_name)
+    # Number of streamed paragraphs embedded together (sorted and packed by the engine)
+    STREAM_CHUNK_SIZE = 1024
+
+    def __init__(self, name, output_dir, pdf_name, dependencies=None, storage=None, metrics=None,
+                 batch_size=64, num_threads=None, embedding_cache=None, tree_thresholds=(0.7, 0.8), backend=None):
+        # Embeddings are stacked into a memory-mapped matrix instead of JSON lists by default
+        super().__init__(name, output_dir, pdf_name, dependencies, storage or NumpyStorage(array_fields=("embedding",)), metrics)
+        self.model_name = EmbeddingEngine.DEFAULT_MODEL
+        # Paragraphs already embedded (in this or another book) are read from the cache
+        self.embedding_engine = EmbeddingEngine(
+            self.model_name, batch_size=batch_size, num_threads=num_threads, cache=embedding_cache, backend=backend
+        )
+        self.tree_builder = SemanticTreeBuilder(thresholds=tree_thresholds)
         self.pdf_name = pdf_name
 
         # Configure logging
@@ -32,17 +41,19 @@ class SemanticTreePipe(Pipe):
         handler.setFormatter(formatter)
         self.logger.addHandler(handler)
     
+    def get_config(self):
+        return {
+            "model": self.model_name,
+            **self.embedding_engine.get_params(),
+            **self.embedding_engine.backend.get_config(),
+        }
+
     def embed_text(self, text):
         """
         Generate embeddings for a given text using Hugging Face transformers.
         """
-        inputs = self.tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=128)
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            # Mean pooling
-            embeddings = outputs.last_hidden_state.mean(dim=1)
-        return embeddings
-        
+        return torch.from_numpy(self.embedding_engine.encode([text]))
+
 
     def calculate_cosine_similarity(self,embedding1, embedding2):
         """
@@ -72,25 +83,64 @@ class SemanticTreePipe(Pipe):
             self.logger.error("No 'normalized_paragraphs' found in input data.")
             raise ValueError("Input data must contain 'normalized_paragraphs'.")
 
-        semantic_tree = {}
-        for para in normalized_paragraphs:
+        nodes = list(self.stream(normalized_paragraphs))
+        semantic_tree = {node["id"]: node for node in nodes}
+
+        # The hierarchy is built on the embeddings just computed, so the text is encoded once;
+        # each node records its path in it, which the vector index returns with its hits
+        paragraphs = [para for para in normalized_paragraphs if para.get("text", "")]
+        embeddings = np.stack([node["embedding"] for node in nodes]) if nodes else np.zeros((0, 0), np.float32)
+        hierarchy = self.tree_builder.build(paragraphs, embeddings)
+        for node_id, path in self.tree_builder.paths(hierarchy):
+            semantic_tree[node_id]["path"] = path
+
+        self.logger.info("Semantic tree generation completed.")
+        return {"semantic_tree": semantic_tree, "hierarchy": hierarchy}
+
+    def stream(self, records):
+        """
+        Streaming mode: embeds normalized paragraphs one by one. The hierarchy (and the path
+        of each node in it) is only built by run, once all the paragraphs are embedded.
+
+        Args:
+            records (iterable): Normalized paragraphs.
+
+        Yields:
+            dict: Semantic tree nodes with "id", "text", "page" and "embedding".
+        """
+        chunk = []
+        for para in records:
             para_text = para.get("text", "")
             if not para_text:
                 self.logger.warning(f"Empty text for paragraph ID {para.get('id')}. Skipping.")
                 continue
 
-            # Generate embedding
-            embedding = self.embed_text(para_text)
-            para_id = para["id"]
+            chunk.append(para)
+            if len(chunk) >= self.STREAM_CHUNK_SIZE:
+                yield from self.embed_chunk(chunk)
+                chunk = []
+        yield from self.embed_chunk(chunk)
 
-            semantic_tree[para_id] = {
-                "id": para_id,
-                "text": para_text,
-                "embedding": embedding.tolist()  # Store embedding as list
-            }
+    def embed_chunk(self, paragraphs):
+        """
+        Embeds a chunk of paragraphs in batches.
 
-        self.logger.info("Semantic tree generation completed.")
-        return {"semantic_tree": semantic_tree}
+        Args:
+            paragraphs (list): Normalized paragraphs with non-empty text.
+
+        Yields:
+            dict: Semantic tree nodes with "id", "text", "page" and "embedding".
+        """
+        if not paragraphs:
+            return
+        embeddings = self.embedding_engine.encode([para["text"] for para in paragraphs])
+        for para, embedding in zip(paragraphs, embeddings):
+            yield {
+                "id": para["id"],
+                "text": para["text"],
+                "page": para.get("page"),
+                "embedding": embedding  # Stored as a row of the embedding matrix
+            }
 
 
 
@@ -104,58 +154,6 @@ class SemanticTreePipe(Pipe):
         Returns:
             dict: A semantic tree structure with hierarchical relationships between paragraphs.
         """
-        # Extract semantics and compute embeddings
-        paragraph_embeddings = []
-        for para in normalized_paragraphs:
-            embedding = self.embedding_model.encode(para['semantics'], convert_to_tensor=True)
-            paragraph_embeddings.append({
-                "id": para["id"],
-                "semantics": para["semantics"],
-                "embedding": embedding,
-                "keywords": para["keywords"],
-                "text": para["text"],
-            })
-
-        # Create the semantic tree
-        semantic_tree = {}
-        with alive_bar(len(paragraph_embeddings), title="Building Semantic Tree") as bar:
-            for para in paragraph_embeddings:
-                para_id = para["id"]
-                semantics = para["semantics"]
-                embedding = para["embedding"]
-
-                # Find the most similar existing node in the tree
-                parent_id = None
-                highest_similarity = 0.0
-                for node_id, node in semantic_tree.items():
-                    similarity = self.calculate_cosine_similarity(embedding, node["embedding"])
-                    if similarity > highest_similarity:
-                        highest_similarity = similarity
-                        parent_id = node_id
-
-                # Add as a child if a similar parent is found
-                if parent_id and highest_similarity > 0.7:  # Similarity threshold
-                    current_node = semantic_tree[parent_id]["children"]
-                else:
-                    current_node = semantic_tree
-
-                # Create a new node
-                node_id = sha256(semantics.encode()).hexdigest()[:8]
-                current_node[node_id] = {
-                    "id": node_id,
-                    "semantics": semantics,
-                    "keywords": para["keywords"],
-                    "text": para["text"],
-                    "children": {},
-                    "embedding": embedding,  # Store embedding for further similarity checks
-                }
-                bar()
-
-        # Remove embeddings before saving (to reduce size)
-        def clean_tree(tree):
-            for key, value in tree.items():
-                value.pop("embedding", None)
-                clean_tree(value["children"])
-
-        clean_tree(semantic_tree)
-        return semantic_tree
\ No newline at end of file
+        paragraphs = [para for para in normalized_paragraphs if para.get("semantics") or para.get("text")]
+        embeddings = self.embedding_engine.encode([para.get("semantics") or para["text"] for para in paragraphs])
+        return self.tree_builder.build(paragraphs, embeddings)
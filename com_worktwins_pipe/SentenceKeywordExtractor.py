@@ -0,0 +1,103 @@
+# SentenceKeywordExtractor.py
+
+from hashlib import sha256
+from com_worktwins_pipe.SpacyModelRegistry import SpacyModelRegistry
+
+
+class SentenceKeywordExtractor:
+    """
+    Splits paragraphs into sentences and extracts their keywords with batched spaCy processing.
+
+    Paragraphs go through nlp.pipe in batches (optionally over several processes), with the
+    components the extraction does not need disabled. Keywords are read from the tokens of
+    each sentence span, so the text is parsed only once.
+    """
+    # Sentence boundaries come from the parser; entities and lemmas are never used
+    DISABLED_COMPONENTS = ("ner", "lemmatizer")
+
+    def __init__(self, model="en_core_web_sm", batch_size=64, n_process=1, disable=DISABLED_COMPONENTS):
+        """
+        Initializes the SentenceKeywordExtractor.
+
+        Args:
+            model (str): Name of the spaCy pipeline.
+            batch_size (int): Number of paragraphs per nlp.pipe batch.
+            n_process (int): Number of processes used by nlp.pipe.
+            disable (tuple): Pipeline components to disable.
+        """
+        self.model = model
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.disable = tuple(disable)
+        self._nlp = None
+
+    @property
+    def nlp(self):
+        # Loaded on first use, once per process
+        if self._nlp is None:
+            self._nlp = SpacyModelRegistry.get(self.model, disable=self.disable)
+        return self._nlp
+
+    def enrich(self, paragraph_texts, word_freq_dict, paragraph_ids=None):
+        """
+        Enriches paragraphs with their sentences and keywords.
+
+        Args:
+            paragraph_texts (iterable): The text of each paragraph.
+            word_freq_dict (dict): Book word frequencies; only words present here are keywords.
+            paragraph_ids (iterable, optional): The id of each paragraph (e.g. its block id).
+                Defaults to the hash of its text.
+
+        Yields:
+            dict: Enriched paragraph, in the order of the input.
+        """
+        docs = self.nlp.pipe(paragraph_texts, batch_size=self.batch_size, n_process=self.n_process)
+        if paragraph_ids is None:
+            for doc in docs:
+                yield self.enrich_doc(doc, word_freq_dict)
+        else:
+            for doc, paragraph_id in zip(docs, paragraph_ids):
+                yield self.enrich_doc(doc, word_freq_dict, paragraph_id)
+
+    @staticmethod
+    def enrich_doc(doc, word_freq_dict, paragraph_id=None):
+        """
+        Builds the enriched paragraph of a parsed document.
+
+        Args:
+            doc (spacy.tokens.Doc): The parsed paragraph.
+            word_freq_dict (dict): Book word frequencies.
+            paragraph_id (str, optional): Id of the paragraph, the prefix of its sentence ids.
+                Defaults to the hash of its text.
+
+        Returns:
+            dict: Enriched paragraph data.
+        """
+        paragraph_text = doc.text
+        paragraph_id = paragraph_id or sha256(paragraph_text.encode()).hexdigest()[:8]
+        sentences = []
+        paragraph_keywords = set()
+
+        for sent in doc.sents:
+            sentence_text = sent.text.strip()
+            words = [token.text.lower() for token in sent if token.is_alpha and not token.is_stop]
+            keywords = [word for word in words if word in word_freq_dict]
+
+            sentence_hash = f"{paragraph_id}_{sha256(sentence_text.encode()).hexdigest()[:8]}"
+            sentences.append({
+                "id": sentence_hash,
+                "type": "sentence",
+                "text": sentence_text,
+                "keywords": keywords,
+                "weight": 0.0,
+            })
+            paragraph_keywords.update(keywords)
+
+        return {
+            "id": paragraph_id,
+            "type": "paragraph",
+            "text": paragraph_text,
+            "keywords": sorted(paragraph_keywords),
+            "weight": 0.0,
+            "sentences": sentences,
+        }
@@ -1,72 +1,72 @@
-import re
-import hashlib
 from collections import defaultdict
-from pygments.lexers import guess_lexer, ClassNotFound
 from com_worktwins_languages.Language import Language
+from com_worktwins_languages.LanguageDetector import LanguageDetector
+from com_worktwins_languages.LanguageMentionCounter import LanguageMentionCounter
 from com_worktwins_pipe.Pipe import Pipe  # Import the base Pipe class
+from com_worktwins_pipe.BlockSegmenter import BlockSegmenter
 
 class SourceCodeExtractorPipe(Pipe):
     """
     A Pipe subclass to extract source code snippets from text and determine their programming languages.
     """
-    def run(self, input_data):
+    def run(self, input_data=None):
         """
-        Extracts source code snippets from raw text.
+        Extracts the source code snippets of the book from the shared block segmentation.
 
         Args:
-            input_data (dict): Input JSON containing "raw_text".
+            input_data: Unused; the blocks are the output of the BlockSegmentationPipe dependency.
 
         Returns:
             dict: JSON containing a list of extracted code snippets with metadata.
         """
+        if not self.dependencies:
+            raise ValueError("SourceCodeExtractorPipe requires BlockSegmentationPipe as a dependency.")
+        blocks = self.dependency_output(self.dependencies[0])["blocks"]
 
-        code_snippets = self.extract_code_snippets_v2(input_data)
+        code_snippets = self.extract_code_snippets_v2(BlockSegmenter.join(blocks), blocks)
         return {"code_snippets": code_snippets}
 
     @staticmethod
-    def extract_code_snippets_v2(text):
+    def extract_code_snippets_v2(text, blocks=None):
         """
         Enhanced extraction of code snippets with dynamic fallback based on book context.
 
         Args:
             text (str): The raw text extracted from a document.
+            blocks (list, optional): The blocks of text, if already segmented by BlockSegmenter.
 
         Returns:
             list: A list of dictionaries, each representing a code snippet with metadata.
         """
         # Load the list of programming languages
         language_list = Language.load_languages()
-        valid_languages = set(language_list.keys())  # Get all language names
 
-        # Count standalone occurrences of programming languages in the text
-        def count_standalone_occurrences(word, text):
-            pattern = rf'\b{re.escape(word)}\b'
-            return len(re.findall(pattern, text, re.IGNORECASE))
-
-        language_occurrences = defaultdict(int)
-        for language in valid_languages:
-            count = count_standalone_occurrences(language, text)
-            if count > 0:
-                language_occurrences[language] += count
+        # Count standalone occurrences of programming languages in the text, in one pass
+        language_occurrences = {
+            language: count
+            for language, count in LanguageMentionCounter(language_list).count(text).items()
+            if count > 0
+        }
 
         # Determine the most frequent language in the book
         most_frequent_language = max(language_occurrences, key=language_occurrences.get, default="unknown")
+        # The mentions are the prior of the detector; repeated snippets are detected once
+        language_detector = LanguageDetector(language_list, mentions=language_occurrences)
 
-        # Regex to detect multi-line code blocks (at least 2 lines of indented code)
-        code_block_pattern = re.compile(r'((?:^(?: {4}|\t).+\n)+)', re.MULTILINE)
+        # Indented code blocks, from the shared segmentation
+        if blocks is None:
+            blocks = BlockSegmenter().segment(text)
         snippet_list = []
         language_frequencies = defaultdict(int)
 
         # Process snippets and detect languages
-        for match in code_block_pattern.finditer(text):
-            code = match.group(0).strip()
+        for block in blocks:
+            if block["type"] != "source_code":
+                continue
+            code = block["text"].strip()
 
             # Attempt to guess the language
-            try:
-                lexer = guess_lexer(code)
-                lang = lexer.name if lexer.name in valid_languages else "unknown"
-            except ClassNotFound:
-                lang = "unknown"
+            lang = language_detector.detect(code)
 
             # Update language frequencies
             if lang != "unknown":
@@ -74,13 +74,16 @@ class SourceCodeExtractorPipe(Pipe):
             else:
                 lang = most_frequent_language  # Default to the most frequent language in the book
 
-            # Generate hash and add snippet
+            # The block id is the hash of the snippet, suffixed for repeated snippets
             snippet_list.append({
-                "id": hashlib.md5(code.encode("utf-8")).hexdigest(),
+                "id": block["id"],
                 "type": "source_code",
                 "text": code,
                 "programming_language": lang,
-                "weight": 0.0
+                "weight": 0.0,
+                "start": block["start"],
+                "end": block["end"],
+                "page": block["page"],
             })
 
         return snippet_list
@@ -0,0 +1,69 @@
+# SpacyModelRegistry.py
+
+import threading
+
+
+class SpacyModelRegistry:
+    """
+    Process-wide registry of spaCy pipelines.
+
+    Each pipeline (model name plus disabled/excluded components) is loaded once, on first
+    use, and shared by every module of the process. Models live in a class-level dict, so
+    worker processes forked after preload() inherit them through copy-on-write instead of
+    loading their own copy.
+    """
+    DEFAULT_MODEL = "en_core_web_sm"
+
+    _models = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, name=DEFAULT_MODEL, disable=(), exclude=()):
+        """
+        Returns a spaCy pipeline, loading it on first use.
+
+        Args:
+            name (str): Name of the spaCy pipeline.
+            disable (iterable): Components loaded but disabled.
+            exclude (iterable): Components not loaded at all.
+
+        Returns:
+            spacy.Language: The shared pipeline.
+        """
+        key = (name, tuple(sorted(disable)), tuple(sorted(exclude)))
+        model = cls._models.get(key)
+        if model is None:
+            with cls._lock:
+                model = cls._models.get(key)
+                if model is None:
+                    import spacy
+
+                    model = spacy.load(name, disable=list(disable), exclude=list(exclude))
+                    cls._models[key] = model
+        return model
+
+    @classmethod
+    def preload(cls, name=DEFAULT_MODEL, disable=(), exclude=()):
+        """
+        Loads a pipeline ahead of time, e.g. in the parent process before forking a pool.
+
+        Returns:
+            spacy.Language: The shared pipeline.
+        """
+        return cls.get(name, disable, exclude)
+
+    @classmethod
+    def register(cls, model, name=DEFAULT_MODEL, disable=(), exclude=()):
+        """
+        Registers an already built pipeline under a name and configuration.
+        """
+        with cls._lock:
+            cls._models[(name, tuple(sorted(disable)), tuple(sorted(exclude)))] = model
+
+    @classmethod
+    def clear(cls):
+        """
+        Drops every loaded pipeline.
+        """
+        with cls._lock:
+            cls._models.clear()
@@ -0,0 +1,120 @@
+# StreamingPipeline.py
+
+import os
+import json
+import queue
+import threading
+from com_worktwins_pipe.PipeStorage import to_json_compatible
+
+_END = object()  # Marks the end of a stream in a queue
+
+
+class StreamingPipeline:
+    """
+    Chains pipes in streaming mode.
+
+    Each stage runs Pipe.stream in its own thread and hands its records to the next stage
+    through a bounded queue, so downstream work starts on the first records and memory is
+    bounded by the queue sizes rather than by the size of the book. The records of every
+    stage are written incrementally to {pdf_name}-{name}.jsonl.
+    """
+    def __init__(self, stages, queue_size=64):
+        """
+        Initializes the StreamingPipeline.
+
+        Args:
+            stages (list): Pipe instances, in order. Each must implement stream().
+            queue_size (int, optional): Maximum number of records buffered between two stages.
+        """
+        self.stages = stages
+        self.queue_size = queue_size
+
+    @staticmethod
+    def output_path(pipe):
+        return os.path.join(pipe.output_dir, f"{pipe.pdf_name}-{pipe.name}.jsonl")
+
+    @staticmethod
+    def drain(records_queue, stop):
+        """
+        Iterates over a queue until the end marker, or until another stage failed.
+        """
+        while not stop.is_set():
+            try:
+                record = records_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if record is _END:
+                return
+            yield record
+
+    def run(self, records):
+        """
+        Streams the records through all stages.
+
+        Args:
+            records (iterable): The input records of the first stage.
+
+        Returns:
+            dict: Stage name -> {"path": JSONL output path, "records": number of records written}.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        report = {}
+        errors = []
+        stop = threading.Event()
+
+        def forward(records_queue, record):
+            # Bounded put that gives up once another stage has failed
+            while not stop.is_set():
+                try:
+                    records_queue.put(record, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def feed():
+            try:
+                for record in records:
+                    if stop.is_set():
+                        break
+                    forward(queues[0], record)
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                forward(queues[0], _END)
+
+        def run_stage(index, pipe):
+            output_queue = queues[index + 1] if index + 1 < len(queues) else None
+            path = self.output_path(pipe)
+            count = 0
+            try:
+                os.makedirs(pipe.output_dir, exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    for record in pipe.stream(self.drain(queues[index], stop)):
+                        f.write(json.dumps(record, default=to_json_compatible) + "\n")
+                        count += 1
+                        if output_queue is not None:
+                            forward(output_queue, record)
+                        if stop.is_set():
+                            break
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                report[pipe.name] = {"path": path, "records": count}
+                if output_queue is not None:
+                    forward(output_queue, _END)
+
+        threads = [threading.Thread(target=feed, daemon=True)]
+        threads += [
+            threading.Thread(target=run_stage, args=(index, pipe), daemon=True)
+            for index, pipe in enumerate(self.stages)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+        return report
@@ -0,0 +1,142 @@
+# SummarizationEngine.py
+
+import threading
+from com_worktwins_pipe.InferenceBackend import TorchBackend, make_batches
+
+
+class SummarizationEngine:
+    """
+    Batched abstractive summaries with a Hugging Face summarization pipeline.
+
+    Identical texts are summarized once, texts already shorter than min_length tokens are
+    returned as they are, and the others are generated in length-bucketed batches.
+
+    Summaries found in the optional SummaryCache are returned without building the
+    summarization pipeline. It runs on an inference backend, PyTorch by default or ONNX Runtime.
+    """
+    DEFAULT_MODEL = "facebook/bart-large-cnn"
+
+    def __init__(self, model_name=DEFAULT_MODEL, max_length=130, min_length=30, batch_size=8,
+                 max_input_length=1024, max_batch_tokens=8192, summarizer=None, cache=None, backend=None):
+        """
+        Initializes the SummarizationEngine.
+
+        Args:
+            model_name (str): Hugging Face model to load.
+            max_length (int): Maximum number of tokens of a summary.
+            min_length (int): Minimum number of tokens of a summary; shorter texts are kept as they are.
+            batch_size (int): Maximum number of texts per generation call.
+            max_input_length (int): Maximum number of tokens per text (longer texts are truncated).
+            max_batch_tokens (int): Maximum padded input tokens (texts x longest text) per call.
+            summarizer (optional): Already loaded summarization pipeline to use instead.
+            cache (SummaryCache, optional): Persistent cache of the summaries.
+            backend (TorchBackend or OnnxBackend, optional): Inference backend. Defaults to PyTorch.
+        """
+        self.model_name = model_name
+        self.max_length = max_length
+        self.min_length = min_length
+        self.batch_size = batch_size
+        self.max_input_length = max_input_length
+        self.max_batch_tokens = max_batch_tokens
+        self.cache = cache
+        self.backend = backend or TorchBackend()
+        self._summarizer = summarizer
+        self._load_lock = threading.Lock()
+
+    def get_params(self):
+        """
+        Generation parameters, part of the cache keys of the summaries.
+        """
+        return {"max_length": self.max_length, "min_length": self.min_length, "max_input_length": self.max_input_length}
+
+    def load(self):
+        with self._load_lock:
+            if self._summarizer is None:
+                # The backend imports torch/transformers, which a fully cached run does not pay for
+                self._summarizer = self.backend.load_summarizer(self.model_name)
+
+    @property
+    def summarizer(self):
+        if self._summarizer is None:
+            self.load()
+        return self._summarizer
+
+    def summarize(self, texts):
+        """
+        Summarizes a list of texts, reusing the cached summaries.
+
+        Args:
+            texts (list): The texts to summarize.
+
+        Returns:
+            list: One summary per text, in the order of the input. A text whose summarization
+                fails is returned as it is.
+        """
+        texts = list(texts)
+        found = self.cache.lookup(texts) if self.cache is not None and texts else {}
+        missing = list(dict.fromkeys(text for i, text in enumerate(texts) if i not in found))
+        computed = self.summarize_batches(missing)
+        return [found[i] if i in found else computed[text] for i, text in enumerate(texts)]
+
+    def summarize_batches(self, texts):
+        """
+        Summarizes distinct texts with the model, in batches of similar length.
+
+        Args:
+            texts (list): Distinct texts to summarize.
+
+        Returns:
+            dict: Text -> summary.
+        """
+        if not texts:
+            return {}
+
+        tokenizer = self.summarizer.tokenizer
+        lengths = [
+            len(input_ids)
+            for input_ids in tokenizer(texts, truncation=True, max_length=self.max_input_length)["input_ids"]
+        ]
+        # Short enough already: the model could only pad them out to min_length
+        summaries = {text: text for text, length in zip(texts, lengths) if length < self.min_length}
+        pending = [i for i, length in enumerate(lengths) if length >= self.min_length]
+
+        for batch in make_batches([lengths[i] for i in pending], self.batch_size, self.max_batch_tokens):
+            batch_texts = [texts[pending[i]] for i in batch]
+            batch_summaries = self.generate(batch_texts)
+            summarized = [
+                (text, summary) for text, summary in zip(batch_texts, batch_summaries) if summary is not None
+            ]
+            if self.cache is not None and summarized:
+                self.cache.put_many(*zip(*summarized))
+            for text, summary in zip(batch_texts, batch_summaries):
+                summaries[text] = summary if summary is not None else text
+        return summaries
+
+    def generate(self, texts):
+        """
+        Runs the model on a batch of texts. If the batch fails, the texts are retried one by
+        one so that a single bad text does not lose the whole batch.
+
+        Args:
+            texts (list): The texts of the batch.
+
+        Returns:
+            list: The summaries, None for the texts that could not be summarized.
+        """
+        try:
+            return [output["summary_text"] for output in self.call_model(texts)]
+        except Exception as e:
+            if len(texts) == 1:
+                print(f"Error summarizing text: {e}")
+                return [None]
+        return [self.generate([text])[0] for text in texts]
+
+    def call_model(self, texts):
+        return self.summarizer(
+            texts,
+            max_length=self.max_length,
+            min_length=self.min_length,
+            do_sample=False,
+            truncation=True,
+            batch_size=len(texts),
+        )
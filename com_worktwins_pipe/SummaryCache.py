@@ -0,0 +1,89 @@
+# SummaryCache.py
+
+import os
+import json
+import threading
+from hashlib import sha256
+from com_worktwins_pipe.JsonlLog import JsonlLog
+
+
+class SummaryCache:
+    """
+    Persistent cache of summaries, keyed by the sha256 of the text and of the generation
+    parameters, one directory per model.
+
+    Summaries are appended to a JsonlLog, shared with the other processes using the cache,
+    and all kept in memory (they are short).
+    """
+    def __init__(self, cache_dir, model_name, params=None):
+        """
+        Initializes the SummaryCache.
+
+        Args:
+            cache_dir (str): Root directory of the cache, usually shared by a whole library.
+            model_name (str): Model the summaries come from; each model has its own entries.
+            params (dict, optional): Generation parameters (max_length, min_length...), part of the key.
+        """
+        self.model_name = model_name
+        self.params = json.dumps(params or {}, sort_keys=True)
+        self.directory = os.path.join(cache_dir, model_name.replace("/", "__"))
+        self.log = JsonlLog(os.path.join(self.directory, "summaries.jsonl"))
+
+        self.summaries = {}
+        self.lock = threading.Lock()
+
+    def key(self, text):
+        return sha256(f"{self.params}\n{text}".encode("utf-8")).hexdigest()
+
+    def __len__(self):
+        return len(self.summaries)
+
+    def refresh(self):
+        """
+        Reads the entries appended since the last read (by this or another process).
+        """
+        self.log.refresh(self.apply)
+
+    def apply(self, entry, offset, length):
+        self.summaries[entry["key"]] = entry["summary"]
+
+    def lookup(self, texts):
+        """
+        Looks up the summaries of texts.
+
+        Args:
+            texts (list): The texts to look up.
+
+        Returns:
+            dict: Position in texts -> summary, for the texts found in the cache.
+        """
+        with self.lock:
+            keys = [self.key(text) for text in texts]
+            if any(key not in self.summaries for key in keys):
+                self.refresh()
+            return {
+                position: self.summaries[key]
+                for position, key in enumerate(keys)
+                if key in self.summaries
+            }
+
+    def put_many(self, texts, summaries):
+        """
+        Stores the summaries of texts that are not cached yet.
+
+        Args:
+            texts (list): The summarized texts.
+            summaries (list): Their summaries.
+        """
+        if not len(texts):
+            return
+
+        with self.lock, self.log.appending(self.apply):
+            new = {}
+            for text, summary in zip(texts, summaries):
+                key = self.key(text)
+                if key not in self.summaries and key not in new:
+                    new[key] = summary
+            if new:
+                self.log.append([{"key": key, "summary": summary} for key, summary in new.items()])
+                self.summaries.update(new)
@@ -0,0 +1,192 @@
+# VectorIndex.py
+
+import os
+import json
+import shutil
+import numpy as np
+
+from com_worktwins_pipe.PipeStorage import replace_directory, existing_directory
+
+
+class VectorIndex:
+    """
+    Cosine-similarity index over a set of embeddings.
+
+    Embeddings are L2-normalized once and kept in one contiguous float32 matrix, so a query
+    is a single matrix product followed by an argpartition top-k. With faiss installed, an
+    approximate "hnsw" (or exact "flat") faiss index can be used instead for large corpora.
+    The index is persisted as a directory and its matrix is memory-mapped when loaded.
+    """
+    BACKENDS = ("exact", "flat", "hnsw")
+
+    def __init__(self, ids, vectors, metadata=None, backend="exact", hnsw_m=32, normalized=False):
+        """
+        Initializes the VectorIndex.
+
+        Args:
+            ids (list): Identifier of each vector.
+            vectors (np.ndarray): [len(ids), dim] embeddings.
+            metadata (list, optional): Data returned along with each search hit (one item per id).
+            backend (str): "exact" (NumPy), or the faiss "flat" or "hnsw" index.
+            hnsw_m (int): Number of neighbors per node of the HNSW graph.
+            normalized (bool): Whether the vectors are already L2-normalized.
+
+        Raises:
+            ValueError: On an unknown backend or if ids and vectors do not line up.
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown vector index backend {backend!r}, expected one of {self.BACKENDS}.")
+        if len(ids) != len(vectors):
+            raise ValueError(f"{len(ids)} ids for {len(vectors)} vectors.")
+
+        self.ids = list(ids)
+        self.metadata = list(metadata) if metadata is not None else [None] * len(self.ids)
+        self.backend = backend
+        self.hnsw_m = hnsw_m
+        self.vectors = vectors if normalized else self.normalize(vectors)
+        self.faiss_index = None
+
+    @staticmethod
+    def normalize(vectors):
+        """
+        L2-normalizes the rows of a matrix into a contiguous float32 array.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get_faiss_index(self):
+        """
+        Builds the faiss index on first use; inner products of normalized vectors are cosines.
+        """
+        if self.faiss_index is None:
+            import faiss
+
+            dim = self.vectors.shape[1]
+            if self.backend == "hnsw":
+                self.faiss_index = faiss.IndexHNSWFlat(dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            else:
+                self.faiss_index = faiss.IndexFlatIP(dim)
+            self.faiss_index.add(np.ascontiguousarray(self.vectors))
+        return self.faiss_index
+
+    def search(self, queries, k=5, rows=None):
+        """
+        Finds the nearest vectors of each query.
+
+        Args:
+            queries (np.ndarray): [q, dim] (or [dim]) query embeddings.
+            k (int): Number of neighbors per query.
+            rows (np.ndarray, optional): Only search these rows (e.g. the candidates of a
+                first-stage retriever); they are scored exactly, whatever the backend.
+
+        Returns:
+            tuple: ([q, k] cosine similarities, [q, k] row indices), best first. Rows are
+            padded with -1 indices when the index holds fewer than k vectors.
+        """
+        queries = self.normalize(queries)
+        k = min(k, len(self.ids) if rows is None else len(rows))
+        if k == 0:
+            return np.zeros((len(queries), 0), np.float32), np.zeros((len(queries), 0), np.int64)
+
+        if rows is None and self.backend != "exact":
+            return self.get_faiss_index().search(queries, k)
+
+        if rows is None:
+            scores = queries @ self.vectors.T
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+            scores = queries @ self.vectors[rows].T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        return np.take_along_axis(top_scores, order, axis=1), top if rows is None else rows[top]
+
+    def query(self, queries, k=5, threshold=None, ids=None):
+        """
+        Finds the vectors closest to any of the queries, scoring each by its best query.
+
+        Args:
+            queries (np.ndarray): [q, dim] query embeddings.
+            k (int): Maximum number of hits.
+            threshold (float, optional): Minimum cosine similarity of a hit.
+            ids (iterable, optional): Only consider the vectors with these ids.
+
+        Returns:
+            list: (id, score, metadata) tuples, best first.
+        """
+        rows = None
+        if ids is not None:
+            ids = set(ids)
+            rows = [row for row, vector_id in enumerate(self.ids) if vector_id in ids]
+        scores, indices = self.search(queries, k, rows=rows)
+        best = {}
+        for row_scores, row_indices in zip(scores, indices):
+            for score, index in zip(row_scores, row_indices):
+                if index >= 0 and (threshold is None or score >= threshold):
+                    best[index] = max(best.get(index, score), score)
+
+        hits = sorted(best.items(), key=lambda item: -item[1])[:k]
+        return [(self.ids[index], float(score), self.metadata[index]) for index, score in hits]
+
+    def save(self, directory, source_hash=None):
+        """
+        Persists the index: the normalized matrix as .npy, ids and metadata as JSON. The files
+        are written to a temporary directory swapped in for the previous index, which is
+        never overwritten in place (readers may have memory-mapped it).
+
+        Args:
+            directory (str): Directory of the index.
+            source_hash (str, optional): Hash of the data the index was built from.
+        """
+        tmp_directory = f"{directory.rstrip(os.sep)}.tmp{os.getpid()}"
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        os.makedirs(tmp_directory)
+        np.save(os.path.join(tmp_directory, "vectors.npy"), self.vectors)
+        with open(os.path.join(tmp_directory, "ids.json"), "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "metadata": self.metadata}, f)
+        with open(os.path.join(tmp_directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"backend": self.backend, "hnsw_m": self.hnsw_m, "source_hash": source_hash}, f)
+        replace_directory(tmp_directory, directory)
+
+    @staticmethod
+    def source_hash(directory):
+        """
+        Returns:
+            str: Hash of the data a persisted index was built from, or None if there is no index.
+        """
+        meta_path = os.path.join(existing_directory(directory), "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("source_hash")
+
+    @classmethod
+    def load(cls, directory, backend=None, mmap=True):
+        """
+        Loads a persisted index.
+
+        Args:
+            directory (str): Directory of the index.
+            backend (str, optional): Overrides the backend the index was saved with.
+            mmap (bool): Memory-map the matrix instead of reading it.
+
+        Returns:
+            VectorIndex: The loaded index.
+        """
+        directory = existing_directory(directory)
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(directory, "ids.json"), "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r" if mmap else None)
+        return cls(
+            entries["ids"], vectors, entries["metadata"],
+            backend=backend or meta["backend"], hnsw_m=meta["hnsw_m"], normalized=True
+        )
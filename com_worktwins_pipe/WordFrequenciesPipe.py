@@ -2,15 +2,42 @@
 
 import json
 import logging
+import os
 from com_worktwins_pipe.Pipe import Pipe  # Import the base Pipe class
+from com_worktwins_pipe.EnglishFrequencies import EnglishFrequencies
+from com_worktwins_pipe.WordFrequencyEngine import WordFrequencyEngine
 from collections import defaultdict
 from alive_progress import alive_bar
-import re
 
 class WordFrequenciesPipe(Pipe):
     """
     A Pipe subclass to generate word frequencies and related data from raw text.
     """
+    def __init__(self, name, output_dir, pdf_name, dependencies=None, storage=None, metrics=None,
+                 corpus_statistics=None, wordfreq_cache_dir=EnglishFrequencies.DEFAULT_CACHE_DIR):
+        """
+        Initializes the WordFrequenciesPipe.
+
+        Args:
+            name (str): The name of the pipe (e.g., 'WordFrequencies').
+            output_dir (str): The directory where output files will be saved.
+            pdf_name (str): The base name of the PDF being processed.
+            dependencies (list, optional): List of dependent Pipe instances.
+            storage (PipeStorage, optional): Storage backend of the output. Defaults to JSON.
+            metrics (PipeMetrics, optional): Collects timings of the pipe for the run report.
+            corpus_statistics (CorpusStatistics, optional): Library statistics the word counts
+                of the book are added to, under its pdf_name.
+            wordfreq_cache_dir (str, optional): Directory of the saved English frequency tables.
+        """
+        super().__init__(name, output_dir, pdf_name, dependencies, storage, metrics)
+        self.corpus_statistics = corpus_statistics
+        self.wordfreq_cache_dir = wordfreq_cache_dir
+
+    def get_config(self):
+        # A new corpus store re-runs the pipe once, so that the book gets recorded in it
+        if self.corpus_statistics is None:
+            return {}
+        return {"corpus_statistics": os.path.abspath(self.corpus_statistics.directory)}
 
     def run(self, input_data):
         """
@@ -22,58 +49,44 @@ class WordFrequenciesPipe(Pipe):
         Returns:
             list: JSON-compatible list of words with frequencies.
         """
-        word_frequencies = WordFrequenciesPipe.generate_frequencies(raw_text=input_data)
+        word_counts = WordFrequencyEngine().count(input_data)
+        if self.corpus_statistics is not None:
+            self.corpus_statistics.add_book(self.pdf_name, dict(zip(word_counts.words, word_counts.counts.tolist())))
+
+        word_frequencies = WordFrequenciesPipe.generate_frequencies(
+            raw_text=input_data, word_counts=word_counts, wordfreq_cache_dir=self.wordfreq_cache_dir
+        )
 
         return word_frequencies
 
     @staticmethod
-    def generate_frequencies(raw_text):
+    def generate_frequencies(raw_text, word_counts=None, wordfreq_cache_dir=EnglishFrequencies.DEFAULT_CACHE_DIR):
         """
         Generate word frequencies and related data directly from raw text.
 
         Args:
             raw_text (str): Raw text extracted from a document.
+            word_counts (WordCounts, optional): The counts of raw_text, if already computed.
+            wordfreq_cache_dir (str, optional): Directory of the saved English frequency tables.
 
         Returns:
             list: Combined frequencies sorted by book_frequency descending and english_frequency ascending.
         """
         try:
-            from collections import defaultdict
             import pandas as pd
-            from wordfreq import word_frequency
-            from alive_progress import alive_bar
 
             ENGLISH_TOP_PERCENTILE = 0.9  # Top 10% of English frequency
             BOOK_TOP_PERCENTILE = 0.9  # Top 10% of book frequency
 
-            word_counts = defaultdict(int)
-            word_paragraph_map = defaultdict(set)
-
-            # Split text into paragraphs (based on double newlines)
-            paragraphs = raw_text.split("\n\n")
-
-            # Count word occurrences and map them to paragraphs
-            with alive_bar(len(paragraphs), title="Processing paragraphs") as bar:
-                for idx, para in enumerate(paragraphs):
-                    para = para.strip()
-                    if not para:
-                        continue
-
-                    # Use regex to find words, ignoring punctuation
-                    words = re.findall(r'\b\w+\b', para.lower())
-                    for word in words:
-                        word_counts[word] += 1
-                        word_paragraph_map[word].add(idx)
-                    bar()
+            # Count word occurrences and map them to paragraphs (split on double newlines) in one pass
+            if word_counts is None:
+                word_counts = WordFrequencyEngine().count(raw_text)
 
             # Create a DataFrame for book word frequencies
-            book_freq_df = pd.DataFrame(
-                [(word, count, list(word_paragraph_map[word])) for word, count in word_counts.items()],
-                columns=["word", "book_frequency", "paragraphs"],
-            )
+            book_freq_df = pd.DataFrame({"word": word_counts.words, "book_frequency": word_counts.counts})
 
-            # Add English language frequencies using wordfreq
-            book_freq_df["english_frequency"] = book_freq_df["word"].apply(lambda word: word_frequency(word, "en"))
+            # Add English language frequencies, looked up in bulk in the shared wordfreq table
+            book_freq_df["english_frequency"] = EnglishFrequencies.get(cache_dir=wordfreq_cache_dir).lookup(word_counts.words)
 
             # Exclude connector words based on thresholds
             english_top_threshold = book_freq_df["english_frequency"].quantile(ENGLISH_TOP_PERCENTILE)
@@ -0,0 +1,75 @@
+# WordFrequencyEngine.py
+
+import re
+import numpy as np
+import pandas as pd
+
+
+class WordCounts:
+    """
+    Word counts of a book: the distinct words in order of first occurrence, their number
+    of occurrences, and their paragraph postings stored as CSR integer arrays (the sorted
+    paragraphs of word i are paragraphs[offsets[i]:offsets[i + 1]]).
+    """
+    def __init__(self, words, counts, offsets, paragraphs):
+        self.words = words
+        self.counts = counts
+        self.offsets = offsets
+        self.paragraphs = paragraphs
+        self.ids = None
+
+    def __len__(self):
+        return len(self.words)
+
+    def postings(self, word):
+        """
+        Paragraph indices (in raw_text.split("\\n\\n")) where a word occurs.
+
+        Returns:
+            np.ndarray: Sorted int32 paragraph indices, empty if the word is not in the book.
+        """
+        if self.ids is None:
+            self.ids = {w: i for i, w in enumerate(self.words)}
+        index = self.ids.get(word)
+        if index is None:
+            return np.zeros(0, dtype=np.int32)
+        return self.paragraphs[self.offsets[index]:self.offsets[index + 1]]
+
+
+class WordFrequencyEngine:
+    """
+    Vectorized word counting for WordFrequenciesPipe.
+
+    The whole book is lowercased and tokenized by a single regex that also matches the
+    paragraph separators, so one scan gives every word with its paragraph. Words are
+    interned into integer ids with a hash factorization, counted with bincount, and the
+    distinct (word, paragraph) pairs are sorted once into CSR postings.
+    """
+    PARAGRAPH_SEPARATOR = "\n\n"
+    # Words as in r'\b\w+\b', or a paragraph separator (matched like str.split would)
+    TOKEN_PATTERN = re.compile(r"\b\w+\b|\n\n")
+
+    def count(self, raw_text):
+        """
+        Counts the words of a text and their paragraphs.
+
+        Args:
+            raw_text (str): The text; paragraphs are separated by blank lines.
+
+        Returns:
+            WordCounts: The counts, words in order of first occurrence.
+        """
+        tokens = np.array(self.TOKEN_PATTERN.findall(raw_text.lower()), dtype=object)
+        is_separator = tokens == self.PARAGRAPH_SEPARATOR
+        paragraph_of = np.cumsum(is_separator)[~is_separator]
+        paragraph_count = int(is_separator.sum()) + 1
+
+        codes, words = pd.factorize(tokens[~is_separator])
+        counts = np.bincount(codes, minlength=len(words))
+
+        # Distinct (word, paragraph) pairs, sorted by word then paragraph
+        pairs = np.unique(codes.astype(np.int64) * paragraph_count + paragraph_of)
+        offsets = np.searchsorted(pairs // paragraph_count, np.arange(len(words) + 1))
+        paragraphs = (pairs % paragraph_count).astype(np.int32)
+
+        return WordCounts(list(words), counts, offsets, paragraphs)
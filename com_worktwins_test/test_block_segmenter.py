@@ -0,0 +1,43 @@
+import re
+
+from com_worktwins_pipe.BlockSegmenter import BlockSegmenter
+
+PAGES = [
+    "A class has `fields` and methods.\n\nIt is declared with the class keyword:\n",
+    "\n\n    class Point:\n        x = 0\n\nThe same text.\n\nThe same text.",
+    "\n\nLast page, with `x` as inline code.",
+]
+TEXT = "".join(PAGES)
+PAGE_STARTS = [0, len(PAGES[0]) + 2, len(PAGES[0]) + len(PAGES[1]) + 2]
+
+
+def test_blocks_have_types_offsets_and_pages():
+    blocks = BlockSegmenter(PAGE_STARTS).segment(TEXT)
+
+    assert [block["type"] for block in blocks] == [
+        "paragraph", "inline_code", "paragraph", "source_code", "paragraph", "paragraph", "paragraph", "inline_code"
+    ]
+    for block in blocks:
+        assert TEXT[block["start"]:block["end"]] == block["text"]
+    assert blocks[3]["text"] == "    class Point:\n        x = 0"
+    assert [block["page"] for block in blocks] == [1, 1, 1, 2, 2, 2, 3, 3]
+
+
+def test_repeated_texts_get_distinct_ids():
+    blocks = BlockSegmenter().segment(TEXT)
+
+    assert len({block["id"] for block in blocks}) == len(blocks)
+    first, second = blocks[4]["id"], blocks[5]["id"]
+    assert second == f"{first}-1"
+    assert BlockSegmenter().segment(TEXT)[4]["id"] == first
+
+
+def test_stream_matches_segment():
+    assert list(BlockSegmenter().stream(PAGES)) == BlockSegmenter(PAGE_STARTS).segment(TEXT)
+
+
+def test_paragraphs_of_text_without_code_are_its_blank_line_split():
+    text = "First paragraph.\n\n  Second one,\non two lines.  \n\n\n\nThird."
+    paragraphs = [block["text"] for block in BlockSegmenter().segment(text) if block["type"] == "paragraph"]
+
+    assert paragraphs == [p.strip() for p in re.split(r"\n\n", text) if p.strip()]
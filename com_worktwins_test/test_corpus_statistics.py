@@ -0,0 +1,83 @@
+import math
+
+from com_worktwins_pipe.CorpusStatistics import CorpusStatistics
+
+
+def test_books_are_merged_and_removed_incrementally(tmp_path):
+    corpus = CorpusStatistics(str(tmp_path))
+    assert corpus.add_book("java", {"class": 3, "the": 10})
+    assert corpus.add_book("python", {"def": 2, "the": 8})
+
+    assert len(corpus) == 2
+    assert corpus.document_frequency("the") == 2 and corpus.document_frequency("class") == 1
+    assert corpus.corpus_frequency("the") == 18 / 23
+    assert corpus.idf("class") == math.log(3 / 2) + 1
+
+    assert corpus.remove_book("java")
+    assert corpus.document_frequency("class") == 0 and "class" not in corpus.term_counts
+    assert corpus.term_counts["the"] == 8 and corpus.total_terms == 10
+    assert not corpus.remove_book("java")
+
+
+def test_readding_a_book_replaces_its_counts(tmp_path):
+    corpus = CorpusStatistics(str(tmp_path))
+    corpus.add_book("java", {"class": 3})
+    revision = corpus.revision()
+
+    assert not corpus.add_book("java", {"class": 3})
+    assert corpus.revision() == revision
+
+    corpus.add_book("java", {"interface": 1})
+    assert corpus.document_frequency("class") == 0 and corpus.document_frequency("interface") == 1
+    assert corpus.revision() != revision
+
+
+def test_updates_are_shared_through_the_log(tmp_path):
+    reader = CorpusStatistics(str(tmp_path))
+    writer = CorpusStatistics(str(tmp_path))
+    writer.add_book("java", {"class": 3})
+    writer.add_book("python", {"class": 1})
+    writer.remove_book("java")
+
+    reader.refresh()
+    assert len(reader) == 1 and reader.term_counts["class"] == 1
+
+    reopened = CorpusStatistics(str(tmp_path))
+    assert reopened.books.keys() == {"python"} and reopened.revision() == writer.revision()
+
+
+def test_common_words_are_filtered_once_the_library_is_large_enough(tmp_path):
+    corpus = CorpusStatistics(str(tmp_path))
+    for book in range(4):
+        corpus.add_book(f"book{book}", {"the": 10, f"topic{book}": 2, "java": 1 if book < 2 else 0})
+
+    word_freq_dict = {"the": 10, "topic0": 2, "java": 1}
+    assert corpus.filter_common(word_freq_dict, min_books=5) == word_freq_dict
+    assert corpus.filter_common(word_freq_dict, max_document_share=0.5, min_books=4) == {"topic0": 2, "java": 1}
+
+
+def test_filter_key_only_changes_with_the_words_dropped_from_the_book(tmp_path):
+    corpus = CorpusStatistics(str(tmp_path))
+    words = ["the", "topic0", "java"]
+    for book in range(3):
+        corpus.add_book(f"book{book}", {"the": 10, f"topic{book}": 2})
+        assert corpus.filter_key(words, min_books=4) is None
+
+    corpus.add_book("book3", {"the": 10, "topic3": 2})
+    key = corpus.filter_key(words, min_books=4)
+    assert key is not None
+    corpus.add_book("book4", {"the": 10, "topic4": 2})
+    assert corpus.filter_key(words, min_books=4) == key
+    for book in range(5, 11):
+        corpus.add_book(f"book{book}", {"the": 10, "java": 1})
+    assert corpus.filter_key(words, min_books=4) != key
+
+
+def test_reopening_replays_the_log_after_the_snapshot(tmp_path):
+    corpus = CorpusStatistics(str(tmp_path), snapshot_bytes=1)
+    corpus.add_book("java", {"class": 3})
+    CorpusStatistics(str(tmp_path), snapshot_bytes=2 ** 20).add_book("python", {"class": 1})
+
+    reopened = CorpusStatistics(str(tmp_path))
+    assert reopened.snapshot_offset < reopened.log.offset
+    assert len(reopened) == 2 and reopened.term_counts["class"] == 4
@@ -0,0 +1,51 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from com_worktwins_pipe.EmbeddingCache import EmbeddingCache
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def test_embeddings_persist_across_instances(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), MODEL)
+    vectors = np.random.default_rng(0).random((3, 8), dtype=np.float32)
+    cache.put_many(["a", "b", "c"], vectors)
+
+    reopened = EmbeddingCache(str(tmp_path), MODEL)
+    found = reopened.lookup(["c", "missing", "a"])
+    assert sorted(found) == [0, 2]
+    assert np.array_equal(found[0], vectors[2])
+    assert np.array_equal(found[2], vectors[0])
+    # Each model has its own entries
+    assert EmbeddingCache(str(tmp_path), "other-model").lookup(["a"]) == {}
+
+
+def test_encoding_parameters_have_their_own_entries(tmp_path):
+    params = {"pooling": "masked_mean", "max_length": 128}
+    EmbeddingCache(str(tmp_path), MODEL, params).put_many(["a"], np.ones((1, 4)))
+
+    assert 0 in EmbeddingCache(str(tmp_path), MODEL, dict(params)).lookup(["a"])
+    assert EmbeddingCache(str(tmp_path), MODEL, {**params, "max_length": 256}).lookup(["a"]) == {}
+    assert EmbeddingCache(str(tmp_path), MODEL).lookup(["a"]) == {}
+
+
+def test_appends_from_another_instance_are_picked_up(tmp_path):
+    reader = EmbeddingCache(str(tmp_path), MODEL, dtype="float16", hot_size=1)
+    writer = EmbeddingCache(str(tmp_path), MODEL, dtype="float16")
+    writer.put_many(["a"], np.ones((1, 4)))
+    writer.put_many(["b", "a"], np.full((2, 4), 2.0))
+
+    found = reader.lookup(["a", "b"])
+    assert found[0].dtype == np.float32
+    assert found[0].tolist() == [1.0] * 4
+    assert found[1].tolist() == [2.0] * 4
+    assert len(reader.hot) == 1
+    assert len(writer) == 2
+
+
+def test_dimension_mismatch_is_rejected(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), MODEL)
+    cache.put_many(["a"], np.ones((1, 4)))
+    with pytest.raises(ValueError):
+        cache.put_many(["b"], np.ones((1, 5)))
@@ -0,0 +1,66 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from com_worktwins_pipe.EmbeddingCache import EmbeddingCache
+from com_worktwins_pipe.EmbeddingEngine import EmbeddingEngine
+from com_worktwins_pipe.InferenceBackend import make_batches
+
+WORDS = ["git", "commit", "branch", "merge", "tree", "object", "remote", "push", "pull", "tag"]
+TEXTS = [
+    "git commit",
+    "branch merge tree object remote push pull tag git commit branch",
+    "tag",
+    "remote push pull",
+]
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    """
+    Engine on a tiny randomly initialized BERT, so the test needs no download.
+    """
+    vocab_file = tmp_path_factory.mktemp("vocab") / "vocab.txt"
+    vocab_file.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS))
+    tokenizer = transformers.BertTokenizerFast(vocab_file=str(vocab_file))
+    torch.manual_seed(0)
+    config = transformers.BertConfig(
+        vocab_size=len(WORDS) + 5, hidden_size=16, num_hidden_layers=1,
+        num_attention_heads=2, intermediate_size=32,
+    )
+    model = transformers.BertModel(config)
+    # Small budget so the texts are split over several batches
+    return EmbeddingEngine(batch_size=2, max_batch_tokens=16, tokenizer=tokenizer, model=model)
+
+
+def test_batches_respect_size_and_token_budget():
+    batches = make_batches([12, 2, 4, 5, 3], batch_size=2, max_batch_tokens=16)
+    assert sorted(index for batch in batches for index in batch) == [0, 1, 2, 3, 4]
+    assert all(len(batch) <= 2 for batch in batches)
+    assert batches[0] == [0]
+
+
+def test_batched_embeddings_match_unpadded_single_texts(engine):
+    embeddings = engine.encode(TEXTS)
+
+    assert embeddings.shape == (len(TEXTS), 16)
+    for text, embedding in zip(TEXTS, embeddings):
+        # A single text has no padding, so a plain mean is the reference
+        inputs = engine.tokenizer(text, return_tensors="pt")
+        with torch.no_grad():
+            reference = engine.model(**inputs).last_hidden_state.mean(dim=1)[0].numpy()
+        assert embedding == pytest.approx(reference, abs=1e-5)
+
+
+def test_cached_texts_are_not_embedded_again(engine, tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "tiny-bert")
+    cached_engine = EmbeddingEngine(tokenizer=engine.tokenizer, model=engine.model, cache=cache)
+    expected = engine.encode(TEXTS)
+
+    assert cached_engine.encode(TEXTS + TEXTS[:1]) == pytest.approx(np.vstack([expected, expected[:1]]), abs=1e-6)
+    assert len(cache) == len(TEXTS)
+
+    cached_engine.encode_batches = None  # Any model call would now fail
+    assert cached_engine.encode(TEXTS[::-1]) == pytest.approx(expected[::-1], abs=1e-6)
@@ -0,0 +1,41 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from com_worktwins_pipe.EnglishFrequencies import EnglishFrequencies
+
+
+def make_table():
+    words = np.array(sorted([b"commit", b"git", b"snapshot"]))
+    buckets = np.array([400, 523, 600], dtype=np.int16)  # commit, git, snapshot
+    return EnglishFrequencies(words, buckets)
+
+
+def test_words_are_looked_up_in_bulk():
+    table = make_table()
+    frequencies = table.lookup(["git", "svn", "commit", "snapshots", "gitlab", "a"])
+    assert frequencies.tolist() == [5.89e-06, 0.0, 0.0001, 0.0, 0.0, 0.0]
+
+
+def test_words_longer_than_the_table_are_unknown():
+    assert make_table().lookup(["commits", "snapshotting"]).tolist() == [0.0, 0.0]
+
+
+def test_bucket_frequencies_are_rounded_like_wordfreq():
+    assert EnglishFrequencies.rounded_frequency(10 ** (-523 / 100)) == 5.89e-06
+
+
+def test_saved_table_is_memory_mapped(tmp_path):
+    prefix = make_table().save(str(tmp_path / "en"))
+    table = EnglishFrequencies.load(prefix)
+
+    assert isinstance(table.words, np.memmap)
+    assert table.lookup(["snapshot", "git"]).tolist() == [1e-06, 5.89e-06]
+    assert EnglishFrequencies.load(str(tmp_path / "fr")) is None
+
+
+def test_lookup_matches_word_frequency():
+    wordfreq = pytest.importorskip("wordfreq")
+    words = ["the", "java", "polymorphism", "café", "x86", "zzzzqqq", "don't"]
+    table = EnglishFrequencies.get(cache_dir=None)
+    assert table.lookup(words).tolist() == [wordfreq.word_frequency(word, "en") for word in words]
@@ -0,0 +1,43 @@
+import os
+import pytest
+from com_worktwins_data_source.ExtractionCache import ExtractionCache
+
+
+@pytest.fixture
+def pdf_file(tmp_path):
+    path = tmp_path / "book.pdf"
+    path.write_bytes(b"%PDF-1.4 fake content")
+    return str(path)
+
+
+def test_fingerprint_reuses_known_hash_for_unchanged_file(pdf_file):
+    fingerprint = ExtractionCache.fingerprint(pdf_file)
+    known = dict(fingerprint, sha256="previously-computed")
+    assert ExtractionCache.fingerprint(pdf_file, known)["sha256"] == "previously-computed"
+
+    with open(pdf_file, "ab") as f:
+        f.write(b" changed")
+    assert ExtractionCache.fingerprint(pdf_file, known)["sha256"] != "previously-computed"
+
+
+def test_ranges_round_trip_compressed(tmp_path, pdf_file):
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    fingerprint = ExtractionCache.fingerprint(pdf_file)
+    ranges = ExtractionCache.page_ranges(40)
+    assert ranges == [(0, 16), (16, 32), (32, 40)]
+
+    cache.save_range(fingerprint, 0, 16, [f"page {i}" for i in range(16)])
+    assert cache.load_range(fingerprint, 0, 16)[3] == "page 3"
+    # Missing ranges are what an interrupted extraction resumes from
+    assert cache.load_range(fingerprint, 16, 32) is None
+    assert cache.load_index(fingerprint) is None
+
+
+def test_corrupt_range_is_ignored(tmp_path, pdf_file):
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    fingerprint = ExtractionCache.fingerprint(pdf_file)
+    path = cache.range_path(fingerprint, 0, 16)
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as f:
+        f.write(b"not gzip")
+    assert cache.load_range(fingerprint, 0, 16) is None
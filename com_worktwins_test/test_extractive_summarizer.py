@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("sklearn")
+
+from com_worktwins_pipe.ExtractiveSummarizer import ExtractiveSummarizer
+
+
+def paragraph(*sentences):
+    return {
+        "text": " ".join(text for text, _ in sentences),
+        "sentences": [{"text": text, "keywords": keywords} for text, keywords in sentences],
+    }
+
+
+def test_keyword_weights_favor_book_specific_words():
+    weights = ExtractiveSummarizer.keyword_weights([
+        {"word": "rebase", "book_frequency": 10, "english_frequency": 1e-7},
+        {"word": "time", "book_frequency": 10, "english_frequency": 1e-3},
+    ])
+    assert weights["rebase"] > weights["time"] > 0
+
+
+def test_best_sentences_are_kept_in_order():
+    paragraphs = [
+        paragraph(
+            ("It was a sunny day.", []),
+            ("Git stores commits as snapshots.", ["git", "commits"]),
+            ("Lunch was late.", []),
+            ("Commits in git point to their parents.", ["commits", "git"]),
+        ),
+        paragraph(("Short paragraph.", []), ("Kept as it is.", [])),
+    ]
+    summarizer = ExtractiveSummarizer(max_sentences=2, keyword_weight=0.8)
+    summaries = summarizer.summarize(paragraphs, {"git": 1.0, "commits": 1.0})
+
+    assert summaries == [
+        "Git stores commits as snapshots. Commits in git point to their parents.",
+        paragraphs[1]["text"],
+    ]
+
+
+def test_paragraphs_without_sentences_or_words():
+    summaries = ExtractiveSummarizer(max_sentences=1).summarize([{"text": "..."}, {"text": "!!"}], {})
+    assert summaries == ["...", "!!"]
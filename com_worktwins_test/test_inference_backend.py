@@ -0,0 +1,41 @@
+import pytest
+from com_worktwins_pipe.InferenceBackend import OnnxBackend, TorchBackend, create_backend
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def test_backends_are_created_from_their_names(tmp_path):
+    assert isinstance(create_backend("torch"), TorchBackend)
+    backend = create_backend("onnx", str(tmp_path))
+    assert backend.quantize and backend.get_config() == {"backend": "onnx", "precision": "int8"}
+    assert not create_backend("onnx-fp32", str(tmp_path)).quantize
+    with pytest.raises(ValueError):
+        create_backend("onnx")
+    with pytest.raises(ValueError):
+        create_backend("tensorrt", str(tmp_path))
+
+
+def test_each_backend_has_its_own_cache_entries(tmp_path):
+    names = {
+        TorchBackend().cache_name(MODEL),
+        OnnxBackend(str(tmp_path)).cache_name(MODEL),
+        OnnxBackend(str(tmp_path), quantize=False).cache_name(MODEL),
+    }
+    assert len(names) == 3
+    assert TorchBackend().cache_name(MODEL) == MODEL
+
+
+def test_validation_runs_once_per_export_and_enforces_the_tolerance(tmp_path):
+    calls = []
+
+    def min_cosine():
+        calls.append(1)
+        return 0.995
+
+    OnnxBackend(str(tmp_path), tolerance=0.99).validate(MODEL, min_cosine)
+    OnnxBackend(str(tmp_path), tolerance=0.99).validate(MODEL, min_cosine)
+    assert len(calls) == 1
+
+    # The stored result is checked against the tolerance of each backend
+    with pytest.raises(ValueError):
+        OnnxBackend(str(tmp_path), tolerance=0.999).validate(MODEL, min_cosine)
@@ -0,0 +1,100 @@
+import re
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+
+from com_worktwins_pipe.InvertedIndex import InvertedIndex
+
+PARAGRAPHS = [
+    {"id": "p0", "text": "", "sentences": [
+        {"id": "p0_s0", "text": "A Java class has fields."},
+        {"id": "p0_s1", "text": "The class keyword declares a class."},
+    ]},
+    {"id": "p1", "text": "", "sentences": [
+        {"id": "p1_s0", "text": "Python has no interfaces."},
+    ]},
+    {"id": "p2", "text": "An interface in Java has methods, and a Java class implements it.", "sentences": []},
+]
+
+
+@pytest.fixture
+def index():
+    return InvertedIndex.build(PARAGRAPHS)
+
+
+def test_postings_are_delta_encoded_and_decoded(index):
+    term_id = index.term_id("class")
+    assert index.term_id("svn") is None
+    assert index.arrays["sentence_gaps"].dtype == np.uint8
+
+    sentences, frequencies = index.postings(term_id, "sentence")
+    assert sentences.tolist() == [0, 1, 3] and frequencies.tolist() == [1, 2, 1]
+    paragraphs, frequencies = index.postings(term_id, "paragraph")
+    assert paragraphs.tolist() == [0, 2] and frequencies.tolist() == [3, 1]
+
+
+def test_boolean_queries(index):
+    assert index.boolean("java class") == ["p0", "p2"]
+    assert index.boolean("java class", level="sentence") == ["p0_s0", "p2"]
+    assert index.boolean("python interface", mode="or") == ["p1", "p2"]
+    assert index.boolean("java svn") == []
+
+
+def test_phrase_queries_use_positions(index):
+    assert index.phrase("java class") == ["p0_s0", "p2"]
+    assert index.phrase("class java") == []
+    assert index.phrase("a class", level="paragraph") == ["p0"]
+
+
+def test_bm25_ranks_rarer_and_denser_matches_first(index):
+    hits = index.bm25("class interfaces", k=2)
+    assert [paragraph_id for paragraph_id, _ in hits] == ["p1", "p0"]
+    assert hits[0][1] > hits[1][1] > 0
+    assert index.bm25("svn") == []
+
+
+def test_saved_index_is_memory_mapped(tmp_path, index):
+    index.save(str(tmp_path / "index"), source_hash="abc")
+    assert InvertedIndex.source_hash(str(tmp_path / "index")) == "abc"
+    assert InvertedIndex.source_hash(str(tmp_path / "missing")) is None
+
+    loaded = InvertedIndex.load(str(tmp_path / "index"))
+    assert isinstance(loaded.arrays["position_gaps"], np.memmap)
+    assert loaded.phrase("java class") == index.phrase("java class")
+    assert loaded.bm25("java") == index.bm25("java")
+
+
+def test_saving_over_an_index_replaces_it_whole(tmp_path, index):
+    directory = str(tmp_path / "index")
+    index.save(directory, source_hash="old")
+    loaded = InvertedIndex.load(directory)
+
+    InvertedIndex.build(PARAGRAPHS[:1]).save(directory, source_hash="new")
+    assert InvertedIndex.source_hash(directory) == "new"
+    assert InvertedIndex.load(directory).boolean("java") == ["p0"]
+    assert [path.name for path in tmp_path.iterdir()] == ["index"]
+    # The memory-mapped arrays of the previous index are left intact
+    assert loaded.boolean("java") == ["p0", "p2"]
+
+
+def test_matches_a_scan_of_the_text():
+    rng = np.random.default_rng(0)
+    vocabulary = [f"w{i}" for i in range(40)]
+    paragraphs = [
+        {"id": f"p{p}", "text": "", "sentences": [
+            {"id": f"p{p}_s{s}", "text": " ".join(rng.choice(vocabulary, size=rng.integers(1, 30)))}
+            for s in range(rng.integers(1, 4))
+        ]}
+        for p in range(200)
+    ]
+    index = InvertedIndex.build(paragraphs)
+    sentences = [sentence for paragraph in paragraphs for sentence in paragraph["sentences"]]
+
+    for query in ["w1 w2", "w3 w3", "w5 w6 w7"]:
+        expected = [s["id"] for s in sentences if re.search(rf"\b{query}\b", s["text"])]
+        assert index.phrase(query) == expected
+        words = query.split()
+        assert index.boolean(query, level="sentence") == [
+            s["id"] for s in sentences if set(words) <= set(s["text"].split())
+        ]
@@ -0,0 +1,36 @@
+from com_worktwins_pipe.JsonlLog import JsonlLog
+
+
+def collect(entries):
+    return lambda entry, offset, length: entries.append((entry, offset, length))
+
+
+def test_appends_from_another_log_are_read_with_their_locations(tmp_path):
+    path = str(tmp_path / "log" / "entries.jsonl")
+    reader, writer = JsonlLog(path), JsonlLog(path)
+    with writer.appending(collect([])):
+        appended = writer.append([{"n": 1}, {"n": "é"}])
+
+    read = []
+    reader.refresh(collect(read))
+    assert read == appended
+    with open(path, "rb") as f:
+        data = f.read()
+    for entry, offset, length in read:
+        assert data[offset:offset + length].endswith(b"\n")
+    assert reader.offset == writer.offset == len(data)
+
+
+def test_an_interrupted_append_is_skipped(tmp_path):
+    path = tmp_path / "entries.jsonl"
+    path.write_bytes(b'{"n": 1}\n{"n": 2, "cut')
+    log = JsonlLog(str(path))
+    read = []
+    with log.appending(collect(read)):
+        assert log.partial
+        log.append([{"n": 3}])
+
+    reopened = []
+    JsonlLog(str(path)).refresh(collect(reopened))
+    assert [entry for entry, _, _ in reopened] == [{"n": 1}, {"n": 3}]
+    assert [entry for entry, _, _ in read] == [{"n": 1}]
@@ -0,0 +1,73 @@
+from com_worktwins_languages.LanguageDetector import LanguageDetector
+
+LANGUAGES = {
+    "Java": {
+        "function_def": "public void myMethod() { }",
+        "import_statement": "import java.util.List;",
+        "print_statement": "System.out.println(\"my_text\");",
+    },
+    "Python": {
+        "function_def": "def my_function():",
+        "import_statement": "import my_module",
+        "print_statement": "print('my_text')",
+    },
+    "Ruby": {"function_def": "def my_method", "print_statement": "puts 'my_text'"},
+}
+
+
+def test_prior_languages_are_detected_without_the_full_scan():
+    detector = LanguageDetector(LANGUAGES, mentions={"Python": 12, "Java": 8})
+    detector.guess = None  # Any full scan would now fail
+
+    assert detector.detect("import os\nprint(os.getcwd())") == "Python"
+    assert detector.detect("public int size() { return n; }") == "Java"
+    assert detector.prior["Python"] == 13
+
+
+def test_prose_is_not_code():
+    detector = LanguageDetector(LANGUAGES, mentions={"Java": 1})
+    assert detector.detect("1. Java (Computer program language) I. Title.") == "unknown"
+
+
+def test_dominant_language_is_assumed_for_unclassified_code():
+    detector = LanguageDetector(LANGUAGES, mentions={"Java": 90, "Python": 10})
+    detector.guess = None
+    assert detector.detect("for(int j = 0; j < n; j++) c = new Circle(j);") == "Java"
+
+
+def test_snippets_are_memoized_by_hash():
+    detector = LanguageDetector(LANGUAGES)
+    calls = []
+    detector.guess = lambda code: calls.append(code) or "Ruby"
+
+    assert [detector.detect("x = [1, 2]") for _ in range(3)] == ["Ruby"] * 3
+    assert len(calls) == 1
+
+
+def test_full_scan_only_returns_known_languages():
+    detector = LanguageDetector({"Java": {}})
+    assert detector.detect("#!/usr/bin/env python\nx = [1, 2]") == "unknown"
+
+
+def test_first_detection_does_not_decide_the_later_snippets():
+    languages = {**LANGUAGES, "C": {"function_def": "void my_function() {}", "print_statement": "printf(\"my_text\");"},
+                 "SQL": {}, "JavaScript": {}}
+    detector = LanguageDetector(languages)
+    answers = {
+        "int x = 1;": "C",
+        "x = [1, 2]": "Python",
+        "SELECT name FROM users;": "SQL",
+        "let x = [1, 2];": "JavaScript",
+    }
+    detector.guess = answers.get
+
+    assert [detector.detect(code) for code in answers] == ["C", "Python", "SQL", "JavaScript"]
+    assert detector.dominant_language() is None
+
+
+def test_assumed_languages_are_not_added_to_the_prior():
+    detector = LanguageDetector(LANGUAGES, mentions={"Java": 9, "Python": 1})
+    detector.guess = None
+    for i in range(5):
+        assert detector.detect(f"for(int j = 0; j < {i}; j++) c = new Circle(j);") == "Java"
+    assert detector.prior["Java"] == 9
@@ -0,0 +1,32 @@
+import re
+from com_worktwins_languages.LanguageMentionCounter import LanguageMentionCounter
+
+LANGUAGES = {
+    "C": {},
+    "C++": {"aliases": ["cpp"]},
+    "Objective-C": {},
+    "Java": {},
+    "JavaScript": {"aliases": ["js"]},
+    "Go": {},
+}
+
+
+def test_mentions_of_all_languages_are_counted_in_one_pass():
+    text = "Java, JAVA and javascript. C++ (or cpp) is not C, nor Objective-C. Let's go!"
+    assert LanguageMentionCounter(LANGUAGES).count(text) == {
+        "C": 1, "C++": 2, "Objective-C": 1, "Java": 2, "JavaScript": 1, "Go": 1,
+    }
+
+
+def test_matches_per_language_scans_for_plain_names():
+    languages = {"Java": {}, "Python": {}, "Go": {}, "Ruby": {}}
+    text = "Python vs. Ruby: both beat Go? javas Java-based JavaBeans, python3 and ruby."
+    expected = {
+        name: len(re.findall(rf"\b{re.escape(name)}\b", text, re.IGNORECASE)) for name in languages
+    }
+    assert LanguageMentionCounter(languages, include_aliases=False).count(text) == expected
+
+
+def test_aliases_can_be_ignored():
+    counts = LanguageMentionCounter(LANGUAGES, include_aliases=False).count("js and cpp")
+    assert not any(counts.values())
@@ -40,3 +40,49 @@ def test_find_by_interpreter(language_instance):
     end_time = time.time()
     print(f"Execution time for find_by_interpreter: {end_time - start_time:.6f} seconds")
     assert 'Python' in languages
+
+
+LANGUAGES_YAML = """
+Python:
+  extensions: [".py", ".pyw"]
+  aliases: ["python3", "py"]
+  interpreters: ["python", "python3"]
+Shell:
+  extensions: [".sh"]
+  aliases: ["sh", "bash"]
+  interpreters: ["bash", "sh"]
+"""
+
+
+@pytest.fixture
+def languages_file(tmp_path):
+    path = tmp_path / "languages.yml"
+    path.write_text(LANGUAGES_YAML)
+    return str(path)
+
+
+def test_indexed_lookups(languages_file):
+    registry = Language(languages_file)
+    assert registry.get_language_attributes("PYTHON")["name"] == "Python"
+    assert registry.find_by_extension("PY") == ["Python"]
+    assert registry.find_by_alias("Bash") == ["Shell"]
+    assert registry.find_by_interpreter("python3") == ["Python"]
+    assert "Python" in registry.find_by_lexer("Python")
+    assert "Shell" in registry.find_by_lexer("Bash")
+    assert registry.get_language_attributes("Cobol") is None
+
+
+def test_registry_is_loaded_once_per_file(languages_file):
+    assert Language.get(languages_file) is Language.get(languages_file)
+    assert Language.load_languages(languages_file) is Language.get(languages_file).languages
+
+
+def test_saved_index_is_used_until_the_file_changes(languages_file, monkeypatch):
+    Language(languages_file).save_index()
+    monkeypatch.setattr(Language, "read_languages", None)  # Any parse would now fail
+    assert Language(languages_file).find_by_alias("py") == ["Python"]
+
+    with open(languages_file, "a") as f:
+        f.write("Ruby:\n  extensions: ['.rb']\n")
+    monkeypatch.undo()
+    assert Language(languages_file).find_by_extension(".rb") == ["Ruby"]
@@ -0,0 +1,38 @@
+import pytest
+
+spacy = pytest.importorskip("spacy")
+pytest.importorskip("pygments")
+
+from com_worktwins_pipe.BlockSegmenter import BlockSegmenter
+from com_worktwins_pipe.ParagraphsAndCodeUnifiedPipe import ParagraphsAndCodeUnifiedPipe
+
+PAGES = [
+    "Call `run` to start.\n\n    def run():\n        pass\n",
+    "\n\nCall `run` to start.\n\n    def run():\n        pass\n",
+]
+
+
+@pytest.fixture
+def pipe(tmp_path):
+    pipe = ParagraphsAndCodeUnifiedPipe("ParagraphsAndCodeUnified", str(tmp_path), "book")
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    pipe.keyword_extractor._nlp = nlp
+    return pipe
+
+
+def test_entries_keep_the_ids_and_positions_of_their_blocks(pipe):
+    text = "".join(PAGES)
+    blocks = BlockSegmenter([0, len(PAGES[0]) + 2]).segment(text)
+    entries = list(pipe.process_blocks(blocks, {"run": 2}, {"Python"}, {"id": None, "keywords": []}))
+
+    assert [entry["id"] for entry in entries] == [block["id"] for block in blocks if block["type"] != "inline_code"]
+    first, first_code, second, second_code = entries
+    assert second["id"] == f"{first['id']}-1" and second_code["id"] == f"{first_code['id']}-1"
+    assert second_code["linked_paragraph_id"] == second["id"]
+    assert [entry["page"] for entry in entries] == [1, 1, 2, 2]
+    for entry in entries:
+        assert text[entry["start"]:entry["end"]] == entry["text"]
+
+    inline = pipe.inline_code_snippet(blocks[1], first["id"])
+    assert inline["id"] == blocks[1]["id"] and inline["page"] == 1
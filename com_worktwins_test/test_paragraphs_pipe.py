@@ -0,0 +1,68 @@
+import pytest
+
+spacy = pytest.importorskip("spacy")
+
+from com_worktwins_pipe.Pipe import Pipe
+from com_worktwins_pipe.BlockSegmentationPipe import BlockSegmentationPipe
+from com_worktwins_pipe.CorpusStatistics import CorpusStatistics
+from com_worktwins_pipe.ParagraphsPipe import ParagraphsPipe
+
+TEXT = (
+    "Git stores snapshots.\n\n"
+    "Create a branch with:\n    git branch topic\nIt only writes a reference.\n\n"
+    "Git stores snapshots."
+)
+
+
+class WordFrequencies(Pipe):
+    def run(self, input_data):
+        return [{"word": "git", "book_frequency": 3}, {"word": "branch", "book_frequency": 1}]
+
+
+def make_pipe(tmp_path, **kwargs):
+    """
+    ParagraphsPipe over executed dependencies, with a blank English pipeline and a sentencizer.
+    """
+    word_frequencies = WordFrequencies("WordFrequencies", str(tmp_path), "book")
+    segmentation = BlockSegmentationPipe("BlockSegmentation", str(tmp_path), "book")
+    word_frequencies.execute()
+    segmentation.execute(TEXT)
+    pipe = ParagraphsPipe("Paragraphs", str(tmp_path), "book", dependencies=[word_frequencies, segmentation], **kwargs)
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    pipe.keyword_extractor._nlp = nlp
+    return pipe
+
+
+def test_prose_around_indented_code_is_kept_without_the_code():
+    paragraphs = ParagraphsPipe.split_into_paragraphs(TEXT)
+
+    # The second paragraph used to be dropped whole because it contains an indented line
+    assert [paragraph["text"] for paragraph in paragraphs] == [
+        "Git stores snapshots.", "Create a branch with:", "It only writes a reference.", "Git stores snapshots."
+    ]
+    assert paragraphs[3]["id"] == f"{paragraphs[0]['id']}-1"
+
+
+def test_run_reads_the_shared_segmentation(tmp_path):
+    pipe = make_pipe(tmp_path)
+    segmentation = pipe.dependencies[1]
+
+    paragraphs = pipe.execute()["enriched_paragraphs"]
+    blocks = [block for block in segmentation.load_output()["blocks"] if block["type"] == "paragraph"]
+    assert [paragraph["id"] for paragraph in paragraphs] == [block["id"] for block in blocks]
+    assert paragraphs[1]["keywords"] == ["branch"]
+    with pytest.raises(ValueError):
+        ParagraphsPipe("Paragraphs", str(tmp_path), "other").run()
+
+
+def test_library_common_words_are_not_keywords(tmp_path):
+    corpus = CorpusStatistics(str(tmp_path / "corpus"))
+    for book in range(3):
+        corpus.add_book(f"book{book}", {"git": 5, f"topic{book}": 1})
+    pipe = make_pipe(tmp_path, corpus_statistics=corpus, max_document_share=0.5, min_corpus_books=3)
+
+    paragraphs = pipe.execute()["enriched_paragraphs"]
+    assert paragraphs[0]["keywords"] == []  # "git" occurs in every book of the library
+    assert paragraphs[1]["keywords"] == ["branch"]
+    assert pipe.get_config()["corpus_filter"] == corpus.filter_key(["git", "branch"], 0.5, 3)
@@ -0,0 +1,75 @@
+import pytest
+
+fitz = pytest.importorskip("fitz")
+PDFBook = pytest.importorskip("com_worktwins_data_source.PDFBook").PDFBook
+
+
+def test_page_offsets_skip_the_separators():
+    pages = ["first page", "", "third"]
+    offsets = PDFBook.compute_page_offsets(pages)
+    text = "\n\n".join(pages)
+
+    assert offsets == [[0, 10], [12, 12], [14, 19]]
+    assert [text[start:end] for start, end in offsets] == pages
+    assert PDFBook.compute_page_offsets(pages, separator="\f") == [[0, 10], [11, 11], [12, 17]]
+    assert PDFBook.compute_page_offsets([]) == []
+
+
+def test_page_at_page_boundaries(tmp_path):
+    book = PDFBook(str(tmp_path / "book.pdf"))
+    assert book.page_at(0) is None
+
+    book.set_page_offsets(PDFBook.compute_page_offsets(["first page", "", "third"]))
+    assert book.page_at(0) == 1
+    assert book.page_at(9) == 1
+    # The separator after a page belongs to that page
+    assert book.page_at(11) == 1
+    # An empty page only holds its start offset
+    assert book.page_at(12) == 2
+    assert book.page_at(13) == 2
+    assert book.page_at(14) == 3
+    assert book.page_at(18) == 3
+    assert book.page_at(1000) == 3
+
+
+def test_parallel_extraction_matches_serial(tmp_path):
+    pdf_path = tmp_path / "book.pdf"
+    with fitz.open() as pdf:
+        for page_num in range(70):
+            page = pdf.new_page()
+            if page_num % 10 != 5:  # Some empty pages
+                page.insert_text((72, 72), f"Page {page_num} text.")
+        pdf.save(str(pdf_path))
+
+    book = PDFBook(str(pdf_path))
+    serial = book.extract_raw(workers=1, use_cache=False)
+    serial_offsets = book.page_offsets
+    parallel = book.extract_raw(workers=2, use_cache=False)
+
+    assert parallel == serial
+    assert book.page_offsets == serial_offsets
+    assert len(serial_offsets) == 70
+    start, end = serial_offsets[42]
+    assert serial[start:end].strip() == "Page 42 text."
+    assert book.page_at(serial.index("Page 69")) == 70
+
+
+def test_iter_pages_reads_the_extraction_cache(tmp_path, monkeypatch):
+    pdf_path = tmp_path / "book.pdf"
+    with fitz.open() as pdf:
+        for page_num in range(20):
+            pdf.new_page().insert_text((72, 72), f"Page {page_num} text.")
+        pdf.save(str(pdf_path))
+
+    book = PDFBook(str(pdf_path))
+    streamed = "".join(book.iter_pages())
+    assert streamed == book.extract_raw(use_cache=False)
+
+    def parse(*args):
+        raise AssertionError("the PDF was parsed again")
+
+    monkeypatch.setattr("com_worktwins_data_source.PDFBook.extract_page_range", parse)
+    monkeypatch.setattr(fitz, "open", parse)
+    assert "".join(book.iter_pages()) == streamed
+    assert book.extract_raw() == streamed
+    assert book.page_at(streamed.index("Page 19")) == 20
@@ -0,0 +1,78 @@
+import pytest
+from com_worktwins_pipe.Pipe import Pipe
+from com_worktwins_pipe.PipelineRunner import PipelineRunner
+
+
+class UpperPipe(Pipe):
+    """
+    Test pipe that upper-cases its input and counts its runs.
+    """
+    def __init__(self, name, output_dir, dependencies=None):
+        super().__init__(name, output_dir, "book", dependencies)
+        self.calls = 0
+
+    def run(self, input_data):
+        self.calls += 1
+        return {"text": input_data.upper()}
+
+
+@pytest.fixture
+def chain(tmp_path):
+    upper = UpperPipe("Upper", str(tmp_path))
+    shout = UpperPipe("Shout", str(tmp_path), dependencies=[upper])
+    return upper, shout
+
+
+def run_chain(chain, raw_text):
+    upper, shout = chain
+    return PipelineRunner([shout]).run({
+        "Upper": raw_text,
+        "Shout": lambda results: results["Upper"]["text"] + "!",
+    })
+
+
+def test_reuses_output_for_identical_input(chain):
+    run_chain(chain, "hello")
+    run_chain(chain, "hello")
+    assert [pipe.calls for pipe in chain] == [1, 1]
+
+
+def test_changed_input_invalidates_the_stage(chain):
+    run_chain(chain, "hello")
+    results = run_chain(chain, "world")
+    assert [pipe.calls for pipe in chain] == [2, 2]
+    assert results["Shout"]["text"] == "WORLD!"
+
+
+def test_unchanged_upstream_output_keeps_downstream_cached(chain):
+    upper, shout = chain
+    run_chain(chain, "hello")
+    # Different input, same upper-cased output: only the first stage reruns
+    run_chain(chain, "HELLO")
+    assert [pipe.calls for pipe in chain] == [2, 1]
+    assert not shout.is_stale("HELLO!")
+
+
+def test_config_change_invalidates_the_stage(chain):
+    upper, _ = chain
+    run_chain(chain, "hello")
+    upper.version = "2"
+    assert upper.is_stale("hello")
+
+
+def test_execute_reruns_a_stale_dependency(tmp_path):
+    source = UpperPipe("Source", str(tmp_path))
+    upper = UpperPipe("Upper", str(tmp_path), dependencies=[source])
+    upper.run = lambda input_data: {"text": upper.dependency_output(source)["text"]}
+    source.execute("hello")
+    upper.execute()
+
+    source.version = "2"
+    with pytest.raises(ValueError):
+        upper.execute()
+
+    source.execute("hello")
+    upper.version = "2"
+    shout = UpperPipe("Shout", str(tmp_path), dependencies=[upper])
+    assert shout.execute("hey")["text"] == "HEY"
+    assert not upper.is_stale()
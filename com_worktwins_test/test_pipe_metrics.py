@@ -0,0 +1,38 @@
+import csv
+import json
+from com_worktwins_pipe.Pipe import Pipe
+from com_worktwins_pipe.PipeMetrics import PipeMetrics
+
+
+class WordsPipe(Pipe):
+    """
+    Test pipe splitting its input into words.
+    """
+    def run(self, input_data):
+        return {"words": input_data.split()}
+
+
+def test_records_run_and_cache_metrics(tmp_path):
+    metrics = PipeMetrics(book="book")
+    pipe = WordsPipe("Words", str(tmp_path), "book", metrics=metrics)
+    pipe.execute("one two three")
+    pipe.execute("one two three")
+
+    stage = metrics.summary()["Words"]
+    assert stage["cache_misses"] == 1
+    assert stage["cache_hits"] == 1
+    assert stage["items"] == 3
+    run = next(record for record in metrics.records if record["phase"] == "run")
+    assert run["wall_time"] >= 0 and run["throughput"] > 0
+
+
+def test_writes_json_and_csv_reports(tmp_path):
+    metrics = PipeMetrics(book="book", profile="cprofile", profile_dir=str(tmp_path))
+    WordsPipe("Words", str(tmp_path), "book", metrics=metrics).execute("one two")
+
+    with open(metrics.write_json(str(tmp_path / "report.json")), "r", encoding="utf-8") as f:
+        assert "Words" in json.load(f)["stages"]
+    with open(metrics.write_csv(str(tmp_path / "report.csv")), "r", encoding="utf-8") as f:
+        phases = {row["phase"] for row in csv.DictReader(f)}
+    assert {"cache", "run", "save", "load"} <= phases
+    assert (tmp_path / "book-Words.prof").exists()
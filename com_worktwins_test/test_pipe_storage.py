@@ -0,0 +1,59 @@
+import os
+import json
+import pytest
+from com_worktwins_pipe.Pipe import Pipe
+from com_worktwins_pipe.PipeStorage import NumpyStorage, ParquetStorage
+
+np = pytest.importorskip("numpy")
+
+
+class TreePipe(Pipe):
+    """
+    Test pipe producing a small semantic-tree-like output with embeddings.
+    """
+    def run(self, input_data):
+        return {"semantic_tree": {
+            str(i): {"id": str(i), "text": text, "embedding": np.full(4, i, dtype="float32")}
+            for i, text in enumerate(input_data)
+        }}
+
+
+def test_numpy_storage_memory_maps_embeddings(tmp_path):
+    pipe = TreePipe("SemanticTree", str(tmp_path), "book", storage=NumpyStorage())
+    output = pipe.execute(["first", "second"])
+
+    embedding = output["semantic_tree"]["1"]["embedding"]
+    assert isinstance(embedding.base, np.memmap) or isinstance(embedding, np.memmap)
+    assert embedding.tolist() == [1.0, 1.0, 1.0, 1.0]
+    assert output["semantic_tree"]["0"]["text"] == "first"
+
+
+def test_export_json_converts_arrays_to_lists(tmp_path):
+    pipe = TreePipe("SemanticTree", str(tmp_path), "book", storage=NumpyStorage())
+    pipe.execute(["first"])
+
+    with open(pipe.export_json(), "r", encoding="utf-8") as f:
+        exported = json.load(f)
+    assert exported["semantic_tree"]["0"]["embedding"] == [0.0, 0.0, 0.0, 0.0]
+
+
+def test_parquet_storage_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    storage = ParquetStorage()
+    records = [{"word": "git", "book_frequency": 10, "english_frequency": 1.2e-05}]
+    path = storage.path(str(tmp_path), "book", "WordFrequencies")
+    storage.save(records, path)
+    assert storage.load(path) == records
+
+
+def test_numpy_storage_replaces_an_output_without_a_gap(tmp_path):
+    storage = NumpyStorage()
+    path = storage.path(str(tmp_path), "book", "SemanticTree")
+    storage.save({"semantic_tree": {"0": {"text": "old", "embedding": np.zeros(4)}}}, path)
+    storage.save({"semantic_tree": {"0": {"text": "new", "embedding": np.ones(4)}}}, path)
+    assert storage.load(path)["semantic_tree"]["0"]["text"] == "new"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["book-SemanticTree.arrays"]
+
+    # A save interrupted between its two renames leaves the previous output readable
+    os.replace(path, f"{path}.old")
+    assert storage.load(path)["semantic_tree"]["0"]["text"] == "new"
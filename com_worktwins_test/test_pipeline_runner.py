@@ -0,0 +1,72 @@
+import os
+import threading
+import pytest
+from com_worktwins_pipe.Pipe import Pipe
+from com_worktwins_pipe.PipelineContext import PipelineContext
+from com_worktwins_pipe.PipelineRunner import PipelineRunner
+
+
+class RecordingPipe(Pipe):
+    """
+    Test pipe that records how many times it ran and returns its input with its name appended.
+    """
+    def __init__(self, name, output_dir, dependencies=None, barrier=None):
+        super().__init__(name, output_dir, "book", dependencies)
+        self.calls = 0
+        self.barrier = barrier
+
+    def run(self, input_data):
+        self.calls += 1
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        return {"steps": (input_data or []) + [self.name]}
+
+
+@pytest.fixture
+def diamond(tmp_path):
+    """
+    A diamond DAG: two branches share the same root dependency.
+    """
+    barrier = threading.Barrier(2)
+    root = RecordingPipe("Root", str(tmp_path))
+    left = RecordingPipe("Left", str(tmp_path), dependencies=[root], barrier=barrier)
+    right = RecordingPipe("Right", str(tmp_path), dependencies=[root], barrier=barrier)
+    sink = RecordingPipe("Sink", str(tmp_path), dependencies=[left, right])
+    return root, left, right, sink
+
+
+def test_runs_each_node_once_and_branches_concurrently(diamond):
+    root, left, right, sink = diamond
+    runner = PipelineRunner([sink], max_workers=2)
+    results = runner.run({
+        "Left": lambda results: results["Root"]["steps"],
+        "Right": lambda results: results["Root"]["steps"],
+        "Sink": lambda results: results["Left"]["steps"] + results["Right"]["steps"],
+    })
+
+    # Left and Right wait on a shared barrier, so this only completes if they overlapped
+    assert [pipe.calls for pipe in diamond] == [1, 1, 1, 1]
+    assert results["Sink"]["steps"] == ["Root", "Left", "Root", "Right", "Sink"]
+
+
+def test_rejects_cycles(tmp_path):
+    first = RecordingPipe("First", str(tmp_path))
+    second = RecordingPipe("Second", str(tmp_path), dependencies=[first])
+    first.dependencies.append(second)
+    with pytest.raises(ValueError):
+        PipelineRunner([second])
+
+
+def test_hands_outputs_over_in_memory_and_releases_them(diamond):
+    root, left, right, sink = diamond
+    with PipelineContext() as context:
+        results = PipelineRunner([sink], max_workers=2).run({
+            "Left": lambda results: results["Root"]["steps"],
+            "Right": lambda results: results["Root"]["steps"],
+        }, context=context)
+        # Only the target is still held once every consumer is done
+        assert set(context.results) == {"Sink"}
+
+    assert results["Sink"]["steps"] == ["Sink"]
+    # Background saves completed when the context closed
+    assert all(os.path.exists(pipe.output_file) for pipe in diamond)
@@ -0,0 +1,90 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from com_worktwins_pipe.SemanticTreeBuilder import SemanticTreeBuilder
+
+
+def make_paragraphs(count):
+    return [{"semantics": f"paragraph {i}", "keywords": [], "text": f"text {i}"} for i in range(count)]
+
+
+def clustered_embeddings(count, clusters=12, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return (centers[rng.integers(0, clusters, count)] + rng.normal(scale=0.4, size=(count, dim))).astype(np.float32)
+
+
+def reference_tree(paragraphs, embeddings, threshold):
+    """
+    The original pairwise algorithm: each paragraph joins the most similar root.
+    """
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    tree, root_vectors = {}, {}
+    for paragraph, vector in zip(paragraphs, normalized):
+        parent_id, highest = None, 0.0
+        for node_id in tree:
+            similarity = float(root_vectors[node_id] @ vector)
+            if similarity > highest:
+                parent_id, highest = node_id, similarity
+        node = SemanticTreeBuilder.make_node(paragraph)
+        if parent_id and highest > threshold:
+            tree[parent_id]["children"][node["id"]] = node
+        else:
+            tree[node["id"]] = node
+            root_vectors[node["id"]] = vector
+    return tree
+
+
+def test_single_level_matches_pairwise_algorithm_across_blocks():
+    paragraphs = make_paragraphs(300)
+    embeddings = clustered_embeddings(300)
+    builder = SemanticTreeBuilder(thresholds=(0.7,), block_size=32)
+
+    assert builder.build(paragraphs, embeddings) == reference_tree(paragraphs, embeddings, 0.7)
+
+
+def test_paragraphs_descend_into_similar_children():
+    base = np.array([1.0, 0.0, 0.0, 0.0])
+    embeddings = np.array([
+        base,
+        base + [0, 0.6, 0, 0],     # Joins the root
+        base + [0, 0.65, 0, 0],    # Very close to the first child: goes one level deeper
+        base + [0, 0, 0.7, 0],     # Close to the root only
+        [0.0, 0.0, 0.0, 1.0],      # New root
+    ], dtype=np.float32)
+    tree = SemanticTreeBuilder(thresholds=(0.7, 0.95), block_size=2).build(make_paragraphs(5), embeddings)
+
+    root, other_root = tree.values()
+    first, second = root["children"].values()
+    assert [first["text"], second["text"], other_root["text"]] == ["text 1", "text 3", "text 4"]
+    assert [child["text"] for child in first["children"].values()] == ["text 2"]
+
+
+def test_empty_input():
+    assert SemanticTreeBuilder().build([], np.zeros((0, 8), np.float32)) == {}
+
+
+def test_paths_follow_the_hierarchy():
+    base = np.array([1.0, 0.0, 0.0])
+    embeddings = np.array([base, base + [0, 0.5, 0], [0.0, 0.0, 1.0]], dtype=np.float32)
+    paragraphs = [{"id": f"p{i}", "text": f"text {i}"} for i in range(3)]
+    tree = SemanticTreeBuilder(thresholds=(0.7,)).build(paragraphs, embeddings)
+
+    assert dict(SemanticTreeBuilder.paths(tree)) == {"p0": "p0", "p1": "p0/p1", "p2": "p2"}
+
+
+def test_repeated_root_keeps_its_children():
+    embeddings = np.array([
+        [1.0, 0.0, 0.0],
+        [1.0, 0.3, 0.0],  # Child of the first paragraph
+        [0.0, 0.0, 1.0],  # Same semantics as the first one, but not similar to it
+        [1.0, 0.0, 0.3],  # Joins the repeated root
+    ], dtype=np.float32)
+    paragraphs = make_paragraphs(4)
+    paragraphs[2]["semantics"] = paragraphs[0]["semantics"]
+    tree = SemanticTreeBuilder(thresholds=(0.7, 0.99)).build(paragraphs, embeddings)
+
+    (root,) = tree.values()
+    assert root["text"] == "text 2"
+    assert [child["text"] for child in root["children"].values()] == ["text 1", "text 3"]
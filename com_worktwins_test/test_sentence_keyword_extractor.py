@@ -0,0 +1,61 @@
+from hashlib import sha256
+import pytest
+from com_worktwins_pipe.SentenceKeywordExtractor import SentenceKeywordExtractor
+
+spacy = pytest.importorskip("spacy")
+
+PARAGRAPHS = [
+    "Git stores snapshots of the repository. Each commit points to a tree object.",
+    "Branches in Git are cheap! Creating one only writes a small reference file.",
+]
+WORD_FREQ_DICT = {"git": 40, "commit": 12, "snapshots": 3, "branches": 9, "reference": 4, "tree": 5}
+
+
+@pytest.fixture
+def extractor():
+    """
+    Extractor running on a blank English pipeline with a rule-based sentencizer,
+    so the test does not need a downloaded model.
+    """
+    extractor = SentenceKeywordExtractor(batch_size=1)
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    extractor._nlp = nlp
+    return extractor
+
+
+def reparse_keywords(nlp, paragraph_text):
+    """
+    The previous implementation: every sentence was parsed a second time.
+    """
+    return [
+        [token.text.lower() for token in nlp(sent.text.strip()) if token.is_alpha and not token.is_stop]
+        for sent in nlp(paragraph_text).sents
+    ]
+
+
+def test_matches_per_sentence_reparsing(extractor):
+    enriched = list(extractor.enrich(PARAGRAPHS, WORD_FREQ_DICT))
+
+    for paragraph_text, paragraph in zip(PARAGRAPHS, enriched):
+        expected = [
+            [word for word in words if word in WORD_FREQ_DICT]
+            for words in reparse_keywords(extractor.nlp, paragraph_text)
+        ]
+        assert [sentence["keywords"] for sentence in paragraph["sentences"]] == expected
+        assert paragraph["id"] == sha256(paragraph_text.encode()).hexdigest()[:8]
+
+
+def test_keeps_paragraph_order_and_schema(extractor):
+    enriched = list(extractor.enrich(PARAGRAPHS, WORD_FREQ_DICT))
+
+    assert [paragraph["text"] for paragraph in enriched] == PARAGRAPHS
+    assert enriched[1]["keywords"] == ["branches", "git", "reference"]
+    assert enriched[0]["sentences"][1]["id"].startswith(enriched[0]["id"] + "_")
+
+
+def test_paragraph_ids_can_be_given(extractor):
+    enriched = list(extractor.enrich(PARAGRAPHS + PARAGRAPHS[:1], WORD_FREQ_DICT, ["a", "b", "a-1"]))
+
+    assert [paragraph["id"] for paragraph in enriched] == ["a", "b", "a-1"]
+    assert enriched[2]["sentences"][0]["id"].startswith("a-1_")
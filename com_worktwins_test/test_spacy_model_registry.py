@@ -0,0 +1,43 @@
+import threading
+import pytest
+from com_worktwins_pipe.SpacyModelRegistry import SpacyModelRegistry
+
+spacy = pytest.importorskip("spacy")
+
+
+@pytest.fixture
+def load_calls(monkeypatch):
+    """
+    Replaces spacy.load with a blank pipeline and records every call.
+    """
+    calls = []
+
+    def fake_load(name, disable=(), exclude=()):
+        calls.append((name, tuple(disable)))
+        return spacy.blank("en")
+
+    monkeypatch.setattr(spacy, "load", fake_load)
+    SpacyModelRegistry.clear()
+    yield calls
+    SpacyModelRegistry.clear()
+
+
+def test_loads_each_pipeline_once_per_process(load_calls):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(SpacyModelRegistry.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(load_calls) == 1
+    assert all(model is results[0] for model in results)
+
+
+def test_component_configurations_are_separate(load_calls):
+    full = SpacyModelRegistry.get()
+    light = SpacyModelRegistry.get(disable=("ner", "lemmatizer"))
+
+    assert full is not light
+    assert SpacyModelRegistry.get(disable=("lemmatizer", "ner")) is light
+    assert load_calls == [("en_core_web_sm", ()), ("en_core_web_sm", ("ner", "lemmatizer"))]
@@ -0,0 +1,54 @@
+import json
+import pytest
+from com_worktwins_pipe.Pipe import Pipe
+from com_worktwins_pipe.StreamingPipeline import StreamingPipeline
+
+
+class SplitPipe(Pipe):
+    """
+    Test stage yielding one record per word of each chunk.
+    """
+    def stream(self, records):
+        for chunk in records:
+            for word in chunk.split():
+                yield {"word": word}
+
+
+class LengthPipe(Pipe):
+    """
+    Test stage adding the length of each word; fails on a configurable word.
+    """
+    def __init__(self, name, output_dir, pdf_name, fail_on=None):
+        super().__init__(name, output_dir, pdf_name)
+        self.fail_on = fail_on
+
+    def stream(self, records):
+        for record in records:
+            if record["word"] == self.fail_on:
+                raise ValueError(f"Cannot process {self.fail_on}")
+            yield {"word": record["word"], "length": len(record["word"])}
+
+
+def test_records_flow_through_stages_into_jsonl(tmp_path):
+    stages = [SplitPipe("Split", str(tmp_path), "book"), LengthPipe("Length", str(tmp_path), "book")]
+    pages = ("page one" for _ in range(100))
+
+    report = StreamingPipeline(stages, queue_size=4).run(pages)
+
+    assert report["Split"]["records"] == 200
+    assert report["Length"]["records"] == 200
+    with open(report["Length"]["path"], "r", encoding="utf-8") as f:
+        assert json.loads(f.readline()) == {"word": "page", "length": 4}
+
+
+def test_stage_errors_are_raised_without_deadlock(tmp_path):
+    stages = [SplitPipe("Split", str(tmp_path), "book"), LengthPipe("Length", str(tmp_path), "book", fail_on="two")]
+    pages = ["one", "two"] + ["three"] * 1000
+
+    with pytest.raises(ValueError):
+        StreamingPipeline(stages, queue_size=2).run(pages)
+
+
+def test_base_pipe_does_not_stream(tmp_path):
+    with pytest.raises(NotImplementedError):
+        next(Pipe("Base", str(tmp_path), "book").stream(["text"]))
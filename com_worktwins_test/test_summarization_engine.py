@@ -0,0 +1,62 @@
+from com_worktwins_pipe.SummaryCache import SummaryCache
+from com_worktwins_pipe.SummarizationEngine import SummarizationEngine
+
+
+class FakeSummarizer:
+    """
+    Stands in for the transformers pipeline: one token per word, summaries are the first words.
+    """
+    def __init__(self):
+        self.calls = []
+
+    def tokenizer(self, texts, truncation=True, max_length=None):
+        return {"input_ids": [text.split()[:max_length] for text in texts]}
+
+    def __call__(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        if any("broken" in text for text in texts):
+            raise RuntimeError("generation failed")
+        return [{"summary_text": " ".join(text.split()[:3])} for text in texts]
+
+
+def words(count, word="word"):
+    return " ".join(f"{word}{i}" for i in range(count))
+
+
+def make_engine(cache=None):
+    return SummarizationEngine(min_length=5, batch_size=2, summarizer=FakeSummarizer(), cache=cache)
+
+
+def test_short_and_duplicate_texts_are_not_summarized():
+    engine = make_engine()
+    texts = [words(8, "a"), "too short", words(8, "a"), words(12, "b")]
+
+    assert engine.summarize(texts) == ["a0 a1 a2", "too short", "a0 a1 a2", "b0 b1 b2"]
+    assert sorted(text for call in engine.summarizer.calls for text in call) == [words(8, "a"), words(12, "b")]
+
+
+def test_batches_are_sorted_by_length():
+    engine = make_engine()
+    texts = [words(6, "a"), words(20, "b"), words(7, "c"), words(19, "d")]
+    engine.summarize(texts)
+
+    assert engine.summarizer.calls == [[texts[1], texts[3]], [texts[2], texts[0]]]
+
+
+def test_failed_batch_is_retried_text_by_text():
+    engine = make_engine()
+    broken = words(6, "broken")
+
+    assert engine.summarize([words(6, "a"), broken]) == ["a0 a1 a2", broken]
+
+
+def test_summaries_persist_across_runs(tmp_path):
+    texts = [words(8, "a"), words(9, "broken"), words(10, "c")]
+    make_engine(SummaryCache(str(tmp_path), SummarizationEngine.DEFAULT_MODEL, {"max_length": 130})).summarize(texts)
+
+    engine = make_engine(SummaryCache(str(tmp_path), SummarizationEngine.DEFAULT_MODEL, {"max_length": 130}))
+    assert engine.summarize(texts[::-1]) == ["c0 c1 c2", texts[1], "a0 a1 a2"]
+    # Only the failed text is attempted again
+    assert engine.summarizer.calls == [[texts[1]]]
+    # Other generation parameters have their own entries
+    assert SummaryCache(str(tmp_path), SummarizationEngine.DEFAULT_MODEL, {"max_length": 60}).lookup(texts) == {}
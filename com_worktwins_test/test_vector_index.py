@@ -0,0 +1,74 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from com_worktwins_pipe.VectorIndex import VectorIndex
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).normal(size=(200, 16)).astype(np.float32)
+
+
+def brute_force(vectors, query):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return normalized @ (query / np.linalg.norm(query))
+
+
+def test_exact_search_matches_brute_force(vectors):
+    index = VectorIndex([f"n{i}" for i in range(len(vectors))], vectors)
+    queries = vectors[:3] + 0.1
+
+    scores, indices = index.search(queries, k=5)
+    for query, row_scores, row_indices in zip(queries, scores, indices):
+        expected = brute_force(vectors, query)
+        assert row_indices.tolist() == np.argsort(-expected)[:5].tolist()
+        assert row_scores == pytest.approx(expected[row_indices], abs=1e-5)
+
+
+def test_query_keeps_best_score_per_hit_above_threshold(vectors):
+    index = VectorIndex([f"n{i}" for i in range(len(vectors))], vectors, metadata=[{"row": i} for i in range(len(vectors))])
+    hits = index.query(np.stack([vectors[7], vectors[7] * 2, vectors[42]]), k=5, threshold=0.99)
+
+    assert [(node_id, meta) for node_id, _, meta in hits] == [("n7", {"row": 7}), ("n42", {"row": 42})]
+    assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_saved_index_is_memory_mapped(tmp_path, vectors):
+    VectorIndex(list(range(len(vectors))), vectors).save(str(tmp_path / "index"), source_hash="abc")
+    assert VectorIndex.source_hash(str(tmp_path / "index")) == "abc"
+    assert VectorIndex.source_hash(str(tmp_path / "missing")) is None
+
+    loaded = VectorIndex.load(str(tmp_path / "index"))
+    assert isinstance(loaded.vectors, np.memmap)
+    assert loaded.query(vectors[:1], k=1)[0][0] == 0
+
+
+def test_saving_over_an_index_replaces_it_whole(tmp_path, vectors):
+    directory = str(tmp_path / "index")
+    VectorIndex(list(range(len(vectors))), vectors).save(directory, source_hash="old")
+    loaded = VectorIndex.load(directory)
+
+    VectorIndex(["a", "b"], vectors[:2]).save(directory, source_hash="new")
+    assert VectorIndex.source_hash(directory) == "new"
+    assert VectorIndex.load(directory).ids == ["a", "b"]
+    assert [path.name for path in tmp_path.iterdir()] == ["index"]
+    # The previous files are not overwritten under their readers
+    assert loaded.vectors.shape == (len(vectors), 16)
+    assert loaded.query(vectors[:1], k=1)[0][0] == 0
+
+
+def test_faiss_flat_matches_exact(vectors):
+    pytest.importorskip("faiss")
+    exact = VectorIndex(list(range(len(vectors))), vectors)
+    flat = VectorIndex(list(range(len(vectors))), vectors, backend="flat")
+    assert flat.search(vectors[:4], k=5)[1].tolist() == exact.search(vectors[:4], k=5)[1].tolist()
+
+
+def test_search_can_be_restricted_to_candidates(vectors):
+    index = VectorIndex([f"n{i}" for i in range(len(vectors))], vectors)
+    scores, indices = index.search(vectors[:1], k=3, rows=[5, 0, 9])
+    assert indices[0, 0] == 0 and sorted(indices[0].tolist()) == [0, 5, 9]
+
+    hits = index.query(vectors[:1], k=5, ids=["n5", "n9"])
+    assert sorted(node_id for node_id, _, _ in hits) == ["n5", "n9"]
@@ -0,0 +1,38 @@
+import re
+from collections import defaultdict
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from com_worktwins_pipe.WordFrequencyEngine import WordFrequencyEngine
+
+TEXT = "Git stores Snapshots.\n\ngit commit -m 'snap'\n\n\n\nA commit, a snapshot: git_2 GIT.\n\n  \n\nCafé 42"
+
+
+def reference_counts(raw_text):
+    """
+    The former per-paragraph counting loop.
+    """
+    word_counts = defaultdict(int)
+    word_paragraph_map = defaultdict(set)
+    for idx, para in enumerate(raw_text.split("\n\n")):
+        for word in re.findall(r'\b\w+\b', para.strip().lower()):
+            word_counts[word] += 1
+            word_paragraph_map[word].add(idx)
+    return word_counts, word_paragraph_map
+
+
+def test_counts_and_postings_match_the_paragraph_loop():
+    counts = WordFrequencyEngine().count(TEXT)
+    word_counts, word_paragraph_map = reference_counts(TEXT)
+
+    assert counts.words == list(word_counts)
+    assert counts.counts.tolist() == list(word_counts.values())
+    for word, paragraphs in word_paragraph_map.items():
+        assert counts.postings(word).tolist() == sorted(paragraphs)
+    assert counts.postings("svn").tolist() == []
+
+
+def test_empty_text():
+    counts = WordFrequencyEngine().count("\n\n")
+    assert len(counts) == 0 and counts.offsets.tolist() == [0]
@@ -1,4 +1,5 @@
 from com_worktwins_languages.Language import Language
+from com_worktwins_languages.LanguageMentionCounter import LanguageMentionCounter
 
 
 # Usage example:
@@ -27,4 +28,10 @@ if __name__ == "__main__":
     # Find languages by interpreter
     interpreter = 'python3'
     languages_by_interpreter = lang.find_by_interpreter(interpreter)
-    print(f"Languages with interpreter '{interpreter}': {languages_by_interpreter}")
\ No newline at end of file
+    print(f"Languages with interpreter '{interpreter}': {languages_by_interpreter}")
+
+    # Count the mentions of every language in a text, in a single pass
+    mention_counter = LanguageMentionCounter(Language.load_languages())
+    text = "Examples are in Java and Python; the C++ version is in the appendix."
+    mentions = {name: count for name, count in mention_counter.count(text).items() if count}
+    print(f"Language mentions: {mentions}")
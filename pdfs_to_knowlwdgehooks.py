@@ -66,6 +66,10 @@ def parse_arguments():
         action="store_true",
         help="Disable CUDA and force the pipeline to run on the CPU."
     )
+    parser.add_argument(
+        "--corpus-dir",
+        help="Directory of the library-wide word statistics, updated with each processed book."
+    )
     return parser.parse_args()
 
 def process_pdf(args):
@@ -73,9 +77,9 @@ def process_pdf(args):
     Process a single PDF file.
 
     Args:
-        args (tuple): Tuple containing (pdf_path, disable_cuda).
+        args (tuple): Tuple containing (pdf_path, disable_cuda, corpus_dir).
     """
-    pdf_path, disable_cuda_flag = args
+    pdf_path, disable_cuda_flag, corpus_dir = args
     file_name = os.path.basename(pdf_path)
     print(f"Processing '{file_name}'...")
     
@@ -84,7 +88,7 @@ def process_pdf(args):
         disable_cuda()
     
     try:
-        book = PDFBook(pdf_path)
+        book = PDFBook(pdf_path, corpus_dir=corpus_dir)
         book.to_knowledge_hooks()
         print(f"Finished processing '{file_name}'.\n")
     except Exception as e:
@@ -134,7 +138,7 @@ def main():
     # Prepare arguments for processing
     # Each PDF will decide based on a flag whether to disable CUDA
     # For simplicity, we'll assume all PDFs use CUDA unless --disable-cuda is specified
-    process_args = [(pdf_path, args.disable_cuda) for pdf_path in pdf_paths]
+    process_args = [(pdf_path, args.disable_cuda, args.corpus_dir) for pdf_path in pdf_paths]
 
     # Process each PDF file
     for args_tuple in process_args:
@@ -2,10 +2,10 @@ import os
 import pandas as pd
 from collections import defaultdict
 from hashlib import sha256
-from wordfreq import word_frequency
+from com_worktwins_pipe.EnglishFrequencies import EnglishFrequencies
 from alive_progress import alive_bar
 from com_worktwins_data_source.PDFBook import PDFBook
-import spacy
+from com_worktwins_pipe.SpacyModelRegistry import SpacyModelRegistry
 import unicodedata
 import json
 
@@ -15,8 +15,9 @@ MIN_BOOK_FREQUENCY = 10  # Minimum frequency in the book for inclusion
 ENGLISH_TOP_PERCENTILE = 0.9  # Top 10% of English frequency
 BOOK_TOP_PERCENTILE = 0.9  # Top 10% of book frequency
 
-# Load spaCy model
-nlp = spacy.load("en_core_web_sm")
+# spaCy model, loaded on first use
+def nlp(text):
+    return SpacyModelRegistry.get()(text)
 
 
 def save_to_txt(data, output_path):
@@ -85,9 +86,10 @@ def extract_keywords(sentence, book_freq_df, english_freq_df):
     return top_keywords
 
 
-def generate_frequencies(book_text):
+def generate_frequencies(book_text, wordfreq_cache_dir=EnglishFrequencies.DEFAULT_CACHE_DIR):
     """
-    Generate word frequencies and related data from the book text.
+    Generate word frequencies and related data from the book text. The English frequency
+    tables are saved in wordfreq_cache_dir.
     """
     paragraphs = [para.strip() for para in book_text.split("\n\n") if para.strip()]
     paragraph_ids = [sha256(para.encode()).hexdigest()[:8] for para in paragraphs]
@@ -108,7 +110,7 @@ def generate_frequencies(book_text):
         [(word, count, list(word_paragraph_map[word])) for word, count in word_counts.items()],
         columns=["word", "book_frequency", "paragraphs"],
     )
-    book_freq_df["english_frequency"] = book_freq_df["word"].apply(lambda word: word_frequency(word, "en"))
+    book_freq_df["english_frequency"] = EnglishFrequencies.get(cache_dir=wordfreq_cache_dir).lookup(book_freq_df["word"])
 
     english_top_threshold = book_freq_df["english_frequency"].quantile(ENGLISH_TOP_PERCENTILE)
     book_top_threshold = book_freq_df["book_frequency"].quantile(BOOK_TOP_PERCENTILE)
@@ -203,7 +205,7 @@ def process_all_pdfs(directory):
             # Normalize text and generate frequencies
             normalized_text = book.extract_normalized()
             print(f"Generating frequencies and paragraphs for {pdf_name}...")
-            paragraphs_df, book_freq_df, excluded_words_df, english_freq_df = generate_frequencies(normalized_text)
+            paragraphs_df, book_freq_df, excluded_words_df, english_freq_df = generate_frequencies(normalized_text, book.wordfreq_cache_dir)
 
             # Save results to JSON
             save_to_json(paragraphs_df.to_dict(orient="records"), os.path.join(output_dir, f"{pdf_name}_paragraphs.json"))